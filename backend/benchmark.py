@@ -0,0 +1,326 @@
+# 분석 파이프라인 벤치마크 스크립트 (단계별 + analyze_image 종단 간)
+"""
+사용법:
+    python benchmark.py                                   # 고정 시드 합성 얼굴 코퍼스로 측정
+    python benchmark.py --images ./faces --repeats 20     # 얼굴 이미지 디렉터리를 각 해상도로 변환해 측정
+    python benchmark.py --output baseline.json            # 결과를 기준값으로 저장
+    python benchmark.py --baseline baseline.json          # 기준값과 비교 (회귀 시 종료 코드 1)
+
+원격 Hugging Face 호출은 같은 프로세스에서 띄운 fake_hf_server.py 대체 서버로 보내므로 네트워크 상태와 무관하게
+재현 가능한 결과를 얻습니다. 각 ModernSkinAnalyzer 메서드는 단독으로(스레드 풀 없이), analyze_image는
+실제 서버와 같이 스레드 풀/마이크로 배치를 거쳐 --concurrency 동시 요청으로 측정합니다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from fake_hf_server import start_fake_hf_server
+from main import (
+    AGE_MODEL_BACKEND,
+    FACE_DETECTOR,
+    PIPELINE_MODE,
+    ModernSkinAnalyzer,
+    decode_image_bytes,
+    ingest_image,
+)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# 코퍼스 해상도 (가로, 세로) - 320px부터 4K까지
+RESOLUTIONS = {
+    "320": (320, 240),
+    "640": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+def synthesize_face(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """Haar/BlazeFace가 검출하는 단순한 합성 얼굴 이미지 (RGB)"""
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = rng.integers(60, 120, 3)
+
+    cx, cy = width // 2, height // 2
+    fw, fh = int(height * 0.22), int(height * 0.30)
+    cv2.ellipse(image, (cx, cy), (fw, fh), 0, 0, 360, (200, 160, 140), -1)
+
+    # 눈/눈썹, 코, 입
+    ey, ex = cy - fh // 5, fw // 2
+    for side in (-1, 1):
+        cv2.ellipse(image, (cx + side * ex, ey), (fw // 5, fh // 12), 0, 0, 360, (245, 245, 245), -1)
+        cv2.circle(image, (cx + side * ex, ey), fh // 14, (40, 30, 30), -1)
+        cv2.line(image, (cx + side * ex - fw // 4, ey - fh // 6), (cx + side * ex + fw // 4, ey - fh // 6),
+                 (70, 50, 40), max(1, height // 120))
+    cv2.line(image, (cx, ey + fh // 12), (cx - fw // 10, cy + fh // 4), (150, 110, 100), max(1, height // 200))
+    cv2.ellipse(image, (cx, cy + fh // 2), (fw // 3, fh // 12), 0, 0, 180, (150, 60, 60), max(1, height // 150))
+
+    # 피부 질감/잡티 흉내를 위한 노이즈
+    noise = rng.normal(0, 6, image.shape)
+    image = np.clip(image + noise, 0, 255).astype(np.uint8)
+    return cv2.GaussianBlur(image, (0, 0), max(0.5, height / 640))
+
+def fit_to_resolution(image: np.ndarray, width: int, height: int) -> np.ndarray:
+    """원본 비율을 유지해 해상도에 맞춘 뒤 중앙을 잘라냄"""
+    scale = max(width / image.shape[1], height / image.shape[0])
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    resized = cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation)
+    top = (resized.shape[0] - height) // 2
+    left = (resized.shape[1] - width) // 2
+    return np.ascontiguousarray(resized[top:top + height, left:left + width])
+
+def build_corpus(image_dir: str, resolutions: list, count: int, seed: int) -> dict:
+    """해상도별 JPEG 바이트 목록 생성 (요청 경로와 같이 디코딩부터 측정하기 위해 인코딩 상태로 보관)"""
+    sources = []
+    if image_dir:
+        for name in sorted(os.listdir(image_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                image = cv2.imread(os.path.join(image_dir, name), cv2.IMREAD_COLOR)
+                if image is not None:
+                    sources.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        sources = sources[:count]
+
+    corpus = {}
+    for label in resolutions:
+        width, height = RESOLUTIONS[label]
+        rng = np.random.default_rng(seed)
+        if sources:
+            images = [fit_to_resolution(source, width, height) for source in sources]
+        else:
+            images = [synthesize_face(width, height, rng) for _ in range(count)]
+        corpus[label] = [
+            cv2.imencode(".jpg", cv2.cvtColor(image, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+            for image in images
+        ]
+    return corpus
+
+def peak_rss_mb() -> float:
+    """프로세스 최대 RSS (MB, Linux는 KB 단위, macOS는 바이트 단위)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def summarize(latencies_ms: list, wall_seconds: float) -> dict:
+    """지연 시간 분포와 처리량 요약"""
+    latencies = np.array(latencies_ms)
+    return {
+        "count": len(latencies),
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "throughput_per_s": len(latencies) / wall_seconds if wall_seconds > 0 else 0.0
+    }
+
+def time_sync(func, inputs: list, repeats: int, warmup: int) -> dict:
+    """동기 메서드를 입력별로 반복 측정"""
+    for args in inputs[:1] * warmup:
+        func(*args)
+
+    latencies = []
+    wall_start = time.perf_counter()
+    for _ in range(repeats):
+        for args in inputs:
+            start = time.perf_counter()
+            func(*args)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return summarize(latencies, time.perf_counter() - wall_start)
+
+async def time_async(func, inputs: list, repeats: int, warmup: int, concurrency: int = 1) -> dict:
+    """비동기 메서드를 concurrency 개의 동시 작업으로 측정"""
+    for args in inputs[:1] * warmup:
+        await func(*args)
+
+    jobs = [args for _ in range(repeats) for args in inputs]
+    latencies = []
+
+    async def worker(offset: int):
+        for args in jobs[offset::concurrency]:
+            start = time.perf_counter()
+            await func(*args)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    return summarize(latencies, time.perf_counter() - wall_start)
+
+async def benchmark_resolution(analyzer: ModernSkinAnalyzer, encoded: list, args) -> dict:
+    """한 해상도에서 각 단계와 analyze_image 측정"""
+    repeats, warmup = args.repeats, args.warmup
+
+    # 요청 경로와 같이 축소 디코딩 (원본 크기는 전처리 해상도 결정에 사용)
+    images, source_shapes = map(list, zip(*[ingest_image(data) for data in encoded]))
+    processed = [analyzer.preprocess_image_2025(image, shape) for image, shape in zip(images, source_shapes)]
+
+    # 얼굴 영역 (검출 실패 시 중앙 영역으로 대체해 이후 단계를 계속 측정)
+    faces = []
+    for image in processed:
+        detection = analyzer.detect_face(image)
+        if detection["face_detected"]:
+            bbox = detection["bbox"]
+            faces.append(analyzer.crop_face(image, bbox))
+        else:
+            h, w = image.shape[:2]
+            faces.append(np.ascontiguousarray(image[h // 4:h * 3 // 4, w // 4:w * 3 // 4]))
+    parsings = [analyzer.enhanced_skin_detection(face) for face in faces]
+    skin_analyses = [analyzer.analyze_skin_advanced_2025(face, parsing) for face, parsing in zip(faces, parsings)]
+
+    stages = {
+        "decode": time_sync(ingest_image, [(data,) for data in encoded], repeats, warmup),
+        "decode_full": time_sync(decode_image_bytes, [(data,) for data in encoded], repeats, warmup),
+        "preprocess_image_2025": time_sync(
+            analyzer.preprocess_image_2025, list(zip(images, source_shapes)), repeats, warmup
+        ),
+        "detect_face": time_sync(analyzer.detect_face, [(p,) for p in processed], repeats, warmup),
+        "detect_face_thumbnail": time_sync(analyzer.detect_face_thumbnail, [(p,) for p in processed], repeats, warmup),
+        "image_to_bytes": time_sync(analyzer.image_to_bytes, [(f,) for f in faces], repeats, warmup),
+        "advanced_face_parsing": await time_async(analyzer.advanced_face_parsing, [(f,) for f in faces], repeats, warmup),
+        "enhanced_skin_detection": time_sync(analyzer.enhanced_skin_detection, [(f,) for f in faces], repeats, warmup),
+        "analyze_skin_advanced_2025": time_sync(
+            analyzer.analyze_skin_advanced_2025, list(zip(faces, parsings)), repeats, warmup
+        ),
+        "analyze_skin_tone_ai_2025": time_sync(
+            analyzer.analyze_skin_tone_ai_2025, [(a['avg_skin_color'],) for a in skin_analyses], repeats, warmup
+        ),
+        "analyze_age_2025": time_sync(analyzer.analyze_age_2025, [(f,) for f in faces], repeats, warmup),
+        "detect_blemishes_ai_2025": time_sync(
+            analyzer.detect_blemishes_ai_2025,
+            [(p, parsing['masks'].get('skin')) for p, parsing in zip(processed, parsings)], repeats, warmup
+        ),
+        "analyze_image": await time_async(
+            analyzer.analyze_image, list(zip(images, source_shapes)), repeats, warmup, args.concurrency
+        ),
+    }
+    stages["analyze_image"]["peak_rss_mb"] = peak_rss_mb()
+    return stages
+
+def compare_to_baseline(report: dict, baseline: dict, latency_threshold: float,
+                        throughput_threshold: float, rss_threshold: float, min_delta_ms: float) -> list:
+    """기준값 대비 회귀 항목 목록 (p50/p95 증가, 처리량 감소, 최대 RSS 증가)
+    
+    1ms 미만 단계의 측정 잡음을 회귀로 보지 않도록 지연 시간 증가가 min_delta_ms 이하이면 무시합니다.
+    """
+    regressions = []
+    for resolution, stages in report["results"].items():
+        for stage, current in stages.items():
+            base = baseline.get("results", {}).get(resolution, {}).get(stage)
+            if base is None:
+                continue
+            for key in ("p50_ms", "p95_ms"):
+                if current[key] > base[key] * (1 + latency_threshold) and current[key] - base[key] > min_delta_ms:
+                    regressions.append(f"{resolution}/{stage} {key}: {base[key]:.2f} → {current[key]:.2f}")
+            if base["p50_ms"] < min_delta_ms:
+                continue
+            if current["throughput_per_s"] < base["throughput_per_s"] * (1 - throughput_threshold):
+                regressions.append(
+                    f"{resolution}/{stage} throughput: {base['throughput_per_s']:.2f} → {current['throughput_per_s']:.2f}/s"
+                )
+
+    if report["peak_rss_mb"] > baseline.get("peak_rss_mb", float("inf")) * (1 + rss_threshold):
+        regressions.append(f"peak_rss_mb: {baseline['peak_rss_mb']:.1f} → {report['peak_rss_mb']:.1f}")
+    return regressions
+
+def print_report(report: dict, baseline: dict):
+    """해상도/단계별 결과 표 출력 (기준값이 있으면 p50 변화율 포함)"""
+    print(f"{'resolution':<10} {'stage':<28} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'ops/s':>8} {'Δp50':>8}")
+    for resolution, stages in report["results"].items():
+        for stage, r in stages.items():
+            base = (baseline or {}).get("results", {}).get(resolution, {}).get(stage)
+            delta = f"{(r['p50_ms'] / base['p50_ms'] - 1):+.1%}" if base and base["p50_ms"] > 0 else ""
+            print(f"{resolution:<10} {stage:<28} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                  f"{r['throughput_per_s']:>8.1f} {delta:>8}")
+    print(f"peak RSS: {report['peak_rss_mb']:.1f} MB")
+
+async def run(args) -> dict:
+    corpus = build_corpus(args.images, args.resolutions, args.count, args.seed)
+
+    runner, api_base = await start_fake_hf_server(latency_ms=args.remote_latency_ms)
+    analyzer = ModernSkinAnalyzer()
+    analyzer.remote.base_url = api_base
+    try:
+        await analyzer.warm_up()
+        results = {}
+        for resolution in args.resolutions:
+            print(f"⏱️ {resolution} ({RESOLUTIONS[resolution][0]}x{RESOLUTIONS[resolution][1]}) 측정 중...", file=sys.stderr)
+            results[resolution] = await benchmark_resolution(analyzer, corpus[resolution], args)
+    finally:
+        await analyzer.close_session()
+        await runner.cleanup()
+
+    return {
+        "meta": {
+            "corpus": args.images or f"synthetic(seed={args.seed})",
+            "images_per_resolution": len(next(iter(corpus.values()))),
+            "repeats": args.repeats,
+            "concurrency": args.concurrency,
+            "remote_latency_ms": args.remote_latency_ms,
+            "pipeline_mode": PIPELINE_MODE,
+            "face_detector": FACE_DETECTOR,
+            "age_model_backend": AGE_MODEL_BACKEND,
+            "cv_threads": cv2.getNumThreads(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+        },
+        "results": results,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="피부 분석 파이프라인 단계별/종단 간 벤치마크")
+    parser.add_argument("--images", default=None, help="얼굴 이미지 디렉터리 (없으면 합성 코퍼스 사용)")
+    parser.add_argument("--count", type=int, default=4, help="해상도별 이미지 수")
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--repeats", type=int, default=5, help="이미지당 반복 횟수")
+    parser.add_argument("--warmup", type=int, default=2, help="측정 전 워밍업 횟수")
+    parser.add_argument("--concurrency", type=int, default=1, help="analyze_image 동시 요청 수")
+    parser.add_argument("--remote-latency-ms", type=float, default=0.0, help="대체 HF API 응답 지연")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--cv-threads", type=int, default=None, help="OpenCV 스레드 수 고정 (재현성)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로 (이후 --baseline으로 사용)")
+    parser.add_argument("--baseline", default=None, help="비교할 기준값 JSON")
+    parser.add_argument("--latency-threshold", type=float, default=0.15, help="허용 p50/p95 증가율")
+    parser.add_argument("--throughput-threshold", type=float, default=0.15, help="허용 처리량 감소율")
+    parser.add_argument("--rss-threshold", type=float, default=0.20, help="허용 최대 RSS 증가율")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="회귀로 판단할 최소 지연 시간 증가량")
+    args = parser.parse_args()
+
+    if args.cv_threads is not None:
+        cv2.setNumThreads(args.cv_threads)
+
+    report = asyncio.run(run(args))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.output}")
+
+    if baseline is not None:
+        regressions = compare_to_baseline(
+            report, baseline, args.latency_threshold, args.throughput_threshold, args.rss_threshold,
+            args.min_delta_ms
+        )
+        if regressions:
+            print("❌ 성능 회귀 감지:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("✅ 기준값 대비 회귀 없음")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
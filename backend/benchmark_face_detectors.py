@@ -0,0 +1,158 @@
+# 얼굴 검출기 벤치마크 스크립트 (Haar cascade vs BlazeFace)
+"""
+사용법:
+    python benchmark_face_detectors.py --images ./faces
+    python benchmark_face_detectors.py --images ./faces --annotations boxes.json --sizes 512 640
+
+--images 디렉터리의 모든 이미지에는 얼굴이 있다고 가정합니다.
+--annotations JSON({"파일명": [x, y, w, h], ...})을 주면 IoU 0.5 이상일 때만 검출로 인정합니다.
+각 이미지는 긴 변이 --sizes 크기가 되도록 축소한 뒤 측정합니다.
+
+recall은 검출기 원시 재현율, gate_pass는 분석기와 같이 가장 큰 얼굴이 face_confidence(검출기 box_scale 반영)
+MIN_FACE_CONFIDENCE 게이트를 통과한 비율입니다. 두 검출기가 같은 얼굴을 찾은 이미지에서 Haar/BlazeFace bbox
+변 길이 비율의 중앙값을 함께 출력하므로 BLAZEFACE_BOX_SCALE 보정에 사용합니다.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from main import MIN_FACE_CONFIDENCE, BlazeFaceDetector, HaarFaceDetector, face_confidence
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def load_images(image_dir: str) -> list:
+    """RGB 이미지 목록 로드 (파일명, 이미지)"""
+    images = []
+    for name in sorted(os.listdir(image_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        image = cv2.imread(os.path.join(image_dir, name), cv2.IMREAD_COLOR)
+        if image is not None:
+            images.append((name, cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+    return images
+
+def resize_long_side(image: np.ndarray, size: int) -> tuple:
+    """긴 변을 size에 맞추어 축소하고 배율 반환"""
+    scale = min(1.0, size / max(image.shape[:2]))
+    if scale < 1.0:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return image, scale
+
+def iou(box_a, box_b) -> float:
+    ax, ay, aw, ah = box_a[:4]
+    bx, by, bw, bh = box_b[:4]
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = inter_w * inter_h
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+def benchmark(detector, images: list, size: int, annotations: dict, repeats: int) -> dict:
+    """검출기 하나를 한 해상도에서 측정 (지연 시간, 재현율, 신뢰도 게이트 통과율, 이미지별 가장 큰 얼굴)"""
+    latencies = []
+    hits = 0
+    passed = 0
+    largest = {}
+    
+    for name, image in images:
+        resized, scale = resize_long_side(image, size)
+        detector.detect(resized)  # 워밍업
+        
+        for _ in range(repeats):
+            start = time.perf_counter()
+            faces = detector.detect(resized)
+            latencies.append((time.perf_counter() - start) * 1000)
+        
+        if name in annotations:
+            truth = [v * scale for v in annotations[name]]
+            hits += any(iou(face, truth) >= 0.5 for face in faces)
+        else:
+            hits += len(faces) > 0
+        
+        if faces:
+            x, y, w, h = max(faces, key=lambda face: face[2] * face[3])[:4]
+            largest[name] = (x, y, w, h)
+            passed += face_confidence(x, y, w, h, resized.shape, detector.box_scale) >= MIN_FACE_CONFIDENCE
+    
+    latencies = np.array(latencies)
+    return {
+        "detector": detector.name,
+        "size": size,
+        "images": len(images),
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "recall": hits / len(images),
+        "gate_pass": passed / len(images),
+        "largest": largest
+    }
+
+def box_side_ratio(haar: dict, other: dict) -> Optional[float]:
+    """같은 얼굴(다른 검출기 bbox 중심이 Haar bbox 안)로 보이는 이미지의 Haar/다른 검출기 변 길이 비율 중앙값"""
+    ratios = []
+    for name, (x, y, w, h) in haar.items():
+        if name not in other:
+            continue
+        ox, oy, ow, oh = other[name]
+        cx, cy = ox + ow / 2, oy + oh / 2
+        if x <= cx <= x + w and y <= cy <= y + h and ow * oh > 0:
+            ratios.append(float(np.sqrt(w * h / (ow * oh))))
+    return float(np.median(ratios)) if ratios else None
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="얼굴 검출기 지연 시간/재현율 비교")
+    parser.add_argument("--images", required=True, help="얼굴이 포함된 이미지 디렉터리")
+    parser.add_argument("--annotations", default=None, help="정답 bbox JSON 파일")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 640], help="측정할 긴 변 크기")
+    parser.add_argument("--repeats", type=int, default=5, help="이미지당 반복 횟수")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+    
+    images = load_images(args.images)
+    if not images:
+        print("❌ 이미지를 찾을 수 없습니다.")
+        return 1
+    
+    annotations = {}
+    if args.annotations:
+        with open(args.annotations, encoding="utf-8") as f:
+            annotations = json.load(f)
+    
+    detectors = [HaarFaceDetector()]
+    try:
+        detectors.append(BlazeFaceDetector())
+    except Exception as e:
+        print(f"⚠️ BlazeFace 검출기를 로드할 수 없어 제외합니다: {e}")
+    
+    results = [
+        benchmark(detector, images, size, annotations, args.repeats)
+        for size in args.sizes
+        for detector in detectors
+    ]
+    
+    # 해상도별 Haar 대비 bbox 변 길이 비율 (BLAZEFACE_BOX_SCALE 보정값)
+    for result in results:
+        haar = next(r for r in results if r["size"] == result["size"] and r["detector"] == "haar")
+        result["haar_side_ratio"] = box_side_ratio(haar["largest"], result["largest"])
+    for result in results:
+        del result["largest"]
+    
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'detector':<10} {'size':>5} {'mean(ms)':>9} {'p50(ms)':>8} {'p95(ms)':>8} {'recall':>7} "
+              f"{'gate':>7} {'haar/box':>9}")
+        for r in results:
+            ratio = f"{r['haar_side_ratio']:.2f}" if r["haar_side_ratio"] is not None else "-"
+            print(f"{r['detector']:<10} {r['size']:>5} {r['mean_ms']:>9.2f} {r['p50_ms']:>8.2f} "
+                  f"{r['p95_ms']:>8.2f} {r['recall']:>7.2%} {r['gate_pass']:>7.2%} {ratio:>9}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,417 @@
+# 오프라인 일괄 재분석 CLI (이미지 디렉터리/아카이브를 프로세스 풀로 분석해 CSV/Parquet로 저장)
+"""
+사용법:
+    python bulk_reanalyze.py ./photos results.csv                     # 디렉터리 (하위 폴더 포함)
+    python bulk_reanalyze.py photos.zip results.csv --workers 8       # zip / tar / tar.gz 아카이브
+    python bulk_reanalyze.py ./photos results_parquet --format parquet # Parquet 파트 파일 디렉터리
+    python bulk_reanalyze.py ./photos results.csv --retry-errors      # 중단 후 재개하며 오류 행도 다시 분석
+
+HTTP 서버 없이 워커 프로세스마다 ModernSkinAnalyzer를 한 번만 로드하고, 이미지를 --chunk-size 묶음으로
+analyze_images_batch에 보내 연령대 모델을 배치로 실행합니다. 원격 AI 호출은 끄고(REMOTE_INFERENCE=0)
+Hugging Face 허브도 오프라인으로 사용하므로 모델이 로컬 캐시에 있으면 네트워크가 필요 없습니다.
+
+- 입력은 스트리밍으로 읽고 처리 중인 묶음 수를 제한하므로 메모리 사용량이 입력 크기와 무관
+- 결과는 묶음마다 바로 기록 (CSV는 행 단위, Parquet는 --parquet-rows 행마다 파트 파일)
+- 같은 출력으로 다시 실행하면 이미 기록된 이미지(키 = 입력 기준 상대 경로)를 건너뛰고 이어서 분석
+  (--retry-errors: CSV는 오류 행을 지우고 다시 분석, Parquet는 새 파트에 추가되므로 키별 마지막 행 사용)
+- 진행률/처리량(이미지/초)/예상 남은 시간을 stderr로 출력
+"""
+import argparse
+import asyncio
+import csv
+import math
+import os
+import posixpath
+import signal
+import sys
+import tarfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import multiprocessing
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# 출력 열 (SkinAnalysisResult 필드를 평탄화 - avg_skin_color는 r/g/b, detected_features는 "|"로 연결)
+RESULT_FIELDS = [
+    "key", "status", "error",
+    "skin_type", "moisture_level", "oil_level", "blemish_count", "blemish_total", "skin_tone", "wrinkle_level",
+    "pore_size", "overall_score", "avg_skin_color_r", "avg_skin_color_g", "avg_skin_color_b",
+    "face_detected", "confidence", "skin_area_percentage", "detected_features",
+    "age_range", "age_confidence", "processing_time", "api_method", "analysis_version",
+    "source_width", "source_height",
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="오프라인 일괄 피부 재분석")
+    parser.add_argument("source", help="이미지 디렉터리 또는 .zip/.tar/.tar.gz 아카이브")
+    parser.add_argument("output", help="결과 CSV 파일 또는 Parquet 디렉터리")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None,
+                        help="출력 형식 (기본: 출력 경로가 .csv면 csv, 아니면 parquet)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="분석 워커 프로세스 수")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="워커별 torch/OpenCV 스레드 수")
+    parser.add_argument("--chunk-size", type=int, default=8, help="워커 한 번에 보낼 이미지 수 (연령대 배치 크기)")
+    parser.add_argument("--max-in-flight", type=int, default=0, help="동시에 처리 중인 묶음 수 (0 = 워커 수 × 2)")
+    parser.add_argument("--parquet-rows", type=int, default=5000, help="Parquet 파트 파일당 행 수")
+    parser.add_argument("--retry-errors", action="store_true", help="재개 시 오류로 기록된 이미지도 다시 분석")
+    parser.add_argument("--online", action="store_true", help="원격 AI 호출/모델 허브 접근 허용")
+    parser.add_argument("--progress-interval", type=float, default=2.0, help="진행률 출력 간격 (초)")
+    args = parser.parse_args()
+    if args.format is None:
+        args.format = "csv" if args.output.lower().endswith(".csv") else "parquet"
+    if args.max_in_flight <= 0:
+        args.max_in_flight = max(1, args.workers) * 2
+    return args
+
+# ---------------------------------------------------------------- 입력
+
+def is_image_name(name: str) -> bool:
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+def iter_source(source: str):
+    """(키, 바이트 읽기 함수) 스트림 - 키는 입력 기준 상대 경로, 읽기는 건너뛰지 않을 항목만 호출"""
+    if os.path.isdir(source):
+        for dirpath, dirnames, filenames in os.walk(source):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if is_image_name(name):
+                    path = os.path.join(dirpath, name)
+                    key = os.path.relpath(path, source).replace(os.sep, "/")
+                    yield key, lambda path=path: open(path, "rb").read()
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and is_image_name(info.filename):
+                    yield posixpath.normpath(info.filename), lambda info=info: archive.read(info)
+    elif tarfile.is_tarfile(source):
+        # 스트림 모드로 순서대로 읽어 .tar.gz도 한 번만 압축 해제
+        with tarfile.open(source, "r|*") as archive:
+            for member in archive:
+                if member.isfile() and is_image_name(member.name):
+                    yield posixpath.normpath(member.name), lambda member=member: archive.extractfile(member).read()
+    else:
+        raise SystemExit(f"❌ 지원하지 않는 입력입니다 (디렉터리, .zip, .tar, .tar.gz): {source}")
+
+def count_source(source: str):
+    """진행률 계산용 전체 이미지 수 (tar는 끝까지 읽어야 하므로 None)"""
+    if os.path.isdir(source):
+        return sum(
+            1 for _, _, filenames in os.walk(source) for name in filenames if is_image_name(name)
+        )
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            return sum(1 for info in archive.infolist() if not info.is_dir() and is_image_name(info.filename))
+    return None
+
+def iter_chunks(entries, completed: set, chunk_size: int, skipped: list):
+    """완료된 키를 건너뛰고 (키, 바이트) 묶음 생성 - 건너뛴 수는 skipped[0]에 누적"""
+    chunk = []
+    for key, read in entries:
+        if key in completed:
+            skipped[0] += 1
+            continue
+        chunk.append((key, read()))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# ---------------------------------------------------------------- 워커
+
+worker_analyzer = None
+worker_loop = None
+worker_main = None
+
+def configure_worker_environment(threads: int, online: bool):
+    """main을 import하기 전에 설정해야 하는 환경 변수 (명시적으로 지정한 값은 유지)"""
+    os.environ.setdefault("CV_EXECUTOR_WORKERS", str(threads))
+    os.environ.setdefault("TORCH_EXECUTOR_WORKERS", "1")
+    os.environ.setdefault("ANALYSIS_CACHE_SIZE", "0")
+    os.environ.setdefault("AGE_INFERENCE_PROCESS", "0")
+    os.environ["MODEL_LOADING_MODE"] = "eager"
+    if not online:
+        os.environ["REMOTE_INFERENCE"] = "0"
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+def init_worker(threads: int, online: bool):
+    """워커 프로세스 초기화: 분석기를 한 번 로드하고 묶음마다 재사용할 이벤트 루프 생성"""
+    global worker_analyzer, worker_loop, worker_main
+    # Ctrl+C는 부모만 처리 (부모가 기록을 마무리하고 풀을 종료)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    configure_worker_environment(threads, online)
+
+    import cv2
+    import main
+
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    worker_main = main
+    worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(worker_loop)
+    worker_analyzer = main.ModernSkinAnalyzer()
+
+def error_row(key: str, error) -> dict:
+    row = dict.fromkeys(RESULT_FIELDS, "")
+    row.update(key=key, status="error", error=str(getattr(error, "detail", error)))
+    return row
+
+def result_row(key: str, result, source_shape: tuple) -> dict:
+    """SkinAnalysisResult를 출력 행으로 평탄화"""
+    row = {name: getattr(result, name) for name in RESULT_FIELDS if hasattr(result, name)}
+    color = result.avg_skin_color or {}
+    row.update(
+        key=key, status="ok", error="",
+        avg_skin_color_r=color.get("r", ""), avg_skin_color_g=color.get("g", ""), avg_skin_color_b=color.get("b", ""),
+        detected_features="|".join(result.detected_features),
+        blemish_total=result.blemish_map.get("total", ""),
+        source_height=source_shape[0], source_width=source_shape[1],
+    )
+    return row
+
+def analyze_chunk(chunk: list) -> list:
+    """워커에서 묶음 분석 - 이미지별 디코딩 오류는 해당 행에만 기록"""
+    rows = [None] * len(chunk)
+    indexes, images, shapes = [], [], []
+    for i, (key, image_bytes) in enumerate(chunk):
+        try:
+            image, source_shape = worker_main.ingest_image(image_bytes)
+        except Exception as e:
+            rows[i] = error_row(key, e)
+            continue
+        indexes.append(i)
+        images.append(image)
+        shapes.append(source_shape)
+
+    if images:
+        try:
+            results = worker_loop.run_until_complete(worker_analyzer.analyze_images_batch(images, shapes))
+        except Exception:
+            # 묶음 전체가 실패하면 이미지별로 다시 분석해 실패한 이미지만 오류로 기록
+            results = []
+            for image, source_shape in zip(images, shapes):
+                try:
+                    results.append(worker_loop.run_until_complete(worker_analyzer.analyze_image(image, source_shape)))
+                except Exception as e:
+                    results.append(e)
+        for i, result, source_shape in zip(indexes, results, shapes):
+            key = chunk[i][0]
+            rows[i] = error_row(key, result) if isinstance(result, Exception) else result_row(key, result, source_shape)
+    return rows
+
+# ---------------------------------------------------------------- 출력
+
+class CsvResultWriter:
+    """행 단위로 추가 기록하는 CSV (중단 시 잘린 마지막 줄은 재개 때 제거)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+        self.writer = None
+
+    def completed_keys(self, retry_errors: bool) -> set:
+        if not os.path.exists(self.path):
+            return set()
+        self.truncate_partial_line()
+        with open(self.path, newline="", encoding="utf-8") as f:
+            rows = [row for row in csv.DictReader(f) if row.get("key")]
+        if retry_errors and any(row["status"] != "ok" for row in rows):
+            # 다시 분석할 오류 행은 제거해 이미지당 한 행만 남김
+            rows = [row for row in rows if row["status"] == "ok"]
+            with open(self.path + ".tmp", "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(rows)
+            os.replace(self.path + ".tmp", self.path)
+        return {row["key"] for row in rows}
+
+    def truncate_partial_line(self):
+        """마지막 줄이 개행으로 끝나지 않으면 (기록 중 중단) 잘라냄"""
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self.file = open(self.path, "a", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+        if new_file:
+            self.writer.writeheader()
+
+    def write(self, rows: list):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+def parquet_types() -> dict:
+    """문자열 외 열의 Parquet 타입"""
+    import pyarrow as pa
+
+    return {
+        **dict.fromkeys(["moisture_level", "oil_level", "blemish_count", "blemish_total", "wrinkle_level", "overall_score",
+                         "source_width", "source_height"], pa.int64()),
+        **dict.fromkeys(["avg_skin_color_r", "avg_skin_color_g", "avg_skin_color_b", "confidence",
+                         "skin_area_percentage", "age_confidence", "processing_time"], pa.float64()),
+        "face_detected": pa.bool_(),
+    }
+
+class ParquetResultWriter:
+    """Parquet 파트 파일 디렉터리 (part-00000.parquet ...) - pyarrow 필요"""
+
+    def __init__(self, path: str, rows_per_part: int):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("❌ Parquet 출력에는 pyarrow가 필요합니다 (pip install pyarrow) - CSV 출력은 --format csv")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        types = parquet_types()
+        self.schema = pyarrow.schema([
+            (name, types.get(name, pyarrow.string())) for name in RESULT_FIELDS
+        ])
+        self.path = path
+        self.rows_per_part = rows_per_part
+        self.buffer = []
+        self.next_part = 0
+
+    def part_files(self) -> list:
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name for name in os.listdir(self.path) if name.startswith("part-") and name.endswith(".parquet"))
+
+    def completed_keys(self, retry_errors: bool) -> set:
+        completed = set()
+        for name in self.part_files():
+            table = self.pq.read_table(os.path.join(self.path, name), columns=["key", "status"])
+            for key, status in zip(table.column("key").to_pylist(), table.column("status").to_pylist()):
+                if status == "ok" or not retry_errors:
+                    completed.add(key)
+        return completed
+
+    def open(self):
+        os.makedirs(self.path, exist_ok=True)
+        parts = self.part_files()
+        self.next_part = int(parts[-1][5:10]) + 1 if parts else 0
+
+    def write(self, rows: list):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.rows_per_part:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        # 오류 행의 빈 값은 null로 기록하고 파트 파일마다 같은 스키마를 사용
+        columns = {name: [None if row[name] == "" else row[name] for row in self.buffer] for name in RESULT_FIELDS}
+        table = self.pa.table(columns, schema=self.schema)
+        final_path = os.path.join(self.path, f"part-{self.next_part:05d}.parquet")
+        # 임시 파일에 쓴 뒤 이름을 바꿔 중단되어도 불완전한 파트 파일이 남지 않도록 함
+        self.pq.write_table(table, final_path + ".tmp")
+        os.replace(final_path + ".tmp", final_path)
+        self.next_part += 1
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+
+# ---------------------------------------------------------------- 실행
+
+class Progress:
+    """처리량/예상 남은 시간 출력"""
+
+    def __init__(self, total, interval: float):
+        self.total = total
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last_print = 0.0
+        self.done = 0
+        self.errors = 0
+
+    def update(self, rows: list, skipped: int):
+        self.done += len(rows)
+        self.errors += sum(1 for row in rows if row["status"] != "ok")
+        now = time.perf_counter()
+        if now - self.last_print >= self.interval:
+            self.last_print = now
+            self.print(skipped)
+
+    def print(self, skipped: int, end: str = ""):
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        line = f"\r📊 {self.done}개 분석 (오류 {self.errors}, 건너뜀 {skipped})"
+        if self.total is not None:
+            remaining = max(0, self.total - skipped - self.done)
+            eta = remaining / rate if rate > 0 else float("inf")
+            line += f" / 전체 {self.total}개 · 남은 시간 {eta:.0f}초" if math.isfinite(eta) else f" / 전체 {self.total}개"
+        line += f" · {rate:.2f} 이미지/초 · 경과 {elapsed:.0f}초"
+        print(line, end=end, file=sys.stderr, flush=True)
+
+def create_writer(args):
+    if args.format == "csv":
+        return CsvResultWriter(args.output)
+    return ParquetResultWriter(args.output, args.parquet_rows)
+
+def run(args) -> int:
+    writer = create_writer(args)
+    completed = writer.completed_keys(args.retry_errors)
+    writer.open()
+    if completed:
+        print(f"↩️ 이전 결과 {len(completed)}개를 건너뛰고 이어서 분석합니다", file=sys.stderr)
+
+    progress = Progress(count_source(args.source), args.progress_interval)
+    skipped = [0]
+    chunks = iter_chunks(iter_source(args.source), completed, args.chunk_size, skipped)
+
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers,
+        # fork 후 torch/OpenMP 스레드 풀이 망가지지 않도록 spawn으로 워커 시작
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(args.threads_per_worker, args.online),
+    )
+    pending = set()
+
+    def collect(done):
+        for future in done:
+            rows = future.result()
+            writer.write(rows)
+            progress.update(rows, skipped[0])
+
+    interrupted = False
+    try:
+        for chunk in chunks:
+            pending.add(executor.submit(analyze_chunk, chunk))
+            if len(pending) >= args.max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\n⏹️ 중단 - 완료된 결과까지 기록했습니다. 같은 명령으로 다시 실행하면 이어서 분석합니다.", file=sys.stderr)
+    finally:
+        executor.shutdown(wait=not interrupted, cancel_futures=True)
+        writer.close()
+
+    progress.print(skipped[0], end="\n")
+    return 130 if interrupted else 0
+
+def main():
+    args = parse_args()
+    sys.exit(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# 연령대 모델 ONNX 내보내기 및 백엔드 검증 스크립트
+"""
+사용법:
+    python export_age_model.py                       # 기본 경로(model/vit_age_classifier.onnx)로 내보내고 검증
+    python export_age_model.py --samples ./faces     # 얼굴 이미지 디렉터리로 검증
+    python export_age_model.py --skip-export         # 기존 ONNX 파일만 검증
+
+검증은 eager torch 모델을 기준으로 ONNX Runtime / int8 양자화 백엔드의 top-1 클래스 일치율을 확인합니다.
+"""
+import argparse
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+from transformers import ViTFeatureExtractor, ViTForImageClassification
+
+from main import (
+    AGE_MODEL_NAME,
+    AGE_ONNX_PATH,
+    OnnxAgeBackend,
+    QuantizedTorchAgeBackend,
+    TorchAgeBackend,
+    export_age_model_onnx,
+    get_age_input_spec,
+    prepare_age_inputs,
+    verify_age_backend,
+)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def load_sample_faces(sample_dir: str, count: int, seed: int) -> list:
+    """검증용 얼굴 이미지 로드 (디렉터리가 없으면 고정 시드의 합성 이미지 생성)"""
+    if sample_dir:
+        faces = []
+        for name in sorted(os.listdir(sample_dir)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            image = cv2.imread(os.path.join(sample_dir, name), cv2.IMREAD_COLOR)
+            if image is not None:
+                faces.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+            if len(faces) >= count:
+                break
+        return faces
+    
+    rng = np.random.default_rng(seed)
+    faces = []
+    for _ in range(count):
+        # 피부톤 배경 + 저주파 노이즈로 구성된 합성 얼굴 영역
+        base = rng.integers(90, 220, size=3)
+        noise = cv2.resize(rng.normal(0, 25, (16, 16, 3)), (224, 224), interpolation=cv2.INTER_CUBIC)
+        faces.append(np.clip(base + noise, 0, 255).astype(np.uint8))
+    return faces
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="연령대 모델 ONNX 내보내기 및 백엔드 검증")
+    parser.add_argument("--output", default=AGE_ONNX_PATH, help="ONNX 파일 경로")
+    parser.add_argument("--samples", default=None, help="검증용 얼굴 이미지 디렉터리")
+    parser.add_argument("--count", type=int, default=64, help="검증 샘플 수")
+    parser.add_argument("--seed", type=int, default=2025, help="합성 샘플 시드")
+    parser.add_argument("--min-agreement", type=float, default=0.98, help="최소 top-1 일치율")
+    parser.add_argument("--skip-export", action="store_true", help="내보내기 생략 (기존 파일 검증)")
+    parser.add_argument("--skip-int8", action="store_true", help="int8 양자화 백엔드 검증 생략")
+    args = parser.parse_args()
+    
+    transforms = ViTFeatureExtractor.from_pretrained(AGE_MODEL_NAME)
+    model = ViTForImageClassification.from_pretrained(AGE_MODEL_NAME)
+    input_spec = get_age_input_spec(transforms)
+    
+    if not args.skip_export:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        export_age_model_onnx(model, args.output, input_size=input_spec[0])
+        print(f"✅ ONNX 내보내기 완료: {args.output}")
+    
+    faces = load_sample_faces(args.samples, args.count, args.seed)
+    if not faces:
+        print("❌ 검증용 샘플이 없습니다.")
+        return 1
+    samples = prepare_age_inputs(faces, input_spec)
+    
+    reference = TorchAgeBackend(model)
+    candidates = [OnnxAgeBackend(args.output)]
+    if not args.skip_int8:
+        candidates.append(QuantizedTorchAgeBackend(
+            ViTForImageClassification.from_pretrained(AGE_MODEL_NAME)
+        ))
+    
+    passed = True
+    for candidate in candidates:
+        report = verify_age_backend(candidate, reference, samples)
+        ok = report["top1_agreement"] >= args.min_agreement
+        passed = passed and ok
+        print(("✅ " if ok else "❌ ") + json.dumps(report, ensure_ascii=False))
+    
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
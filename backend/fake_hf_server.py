@@ -0,0 +1,118 @@
+# 로컬 Hugging Face Inference API 대체 서버 (벤치마크/부하 테스트용)
+"""
+사용법:
+    python fake_hf_server.py --port 8081 --latency-ms 80
+    python fake_hf_server.py --port 8081 --status 503     # 모델 로딩 중 응답 (서킷 브레이커 확인용)
+    python fake_hf_server.py --latency-ms 300 --latency-dist lognormal --latency-spread 0.6 --error-rate 0.05
+    HF_API_BASE=http://127.0.0.1:8081/models python main.py
+
+실제 API와 같은 경로(/models/{모델 이름})로 POST 요청을 받아 모델 종류에 맞는 형식의 고정 응답을 반환합니다.
+외부 네트워크 없이 원격 호출 경로(성공 응답 처리)까지 재현 가능하게 측정하기 위한 용도입니다.
+부하 테스트(loadtest.py)에서는 지연 분포와 503(모델 로딩 중) 응답 비율을 지정해 실제 API의 꼬리 지연과
+간헐적 실패 상황에서 재시도/서킷 브레이커/기한 처리를 재현합니다.
+"""
+import argparse
+import asyncio
+import random
+from collections import Counter
+from typing import Optional
+
+from aiohttp import web
+
+# face-parsing 모델이 반환하는 라벨 (마스크는 분석기가 사용하지 않으므로 생략)
+FACE_PARSING_LABELS = ["background", "skin", "nose", "l_eye", "r_eye", "l_brow", "r_brow", "u_lip", "l_lip", "hair"]
+
+def fake_response(model: str) -> list:
+    """모델 종류별 고정 응답"""
+    if "face-parsing" in model:
+        return [{"score": 1.0, "label": label, "mask": ""} for label in FACE_PARSING_LABELS]
+    if "face" in model:
+        return [{"score": 0.92, "label": "face", "box": {"xmin": 96, "ymin": 64, "xmax": 416, "ymax": 448}}]
+    return []
+
+# 응답 지연 분포 (fixed = 고정, uniform = latency_ms ± spread 비율, exponential = 평균 latency_ms,
+# lognormal = 중앙값 latency_ms / 형상 모수 spread - 실제 API와 같이 긴 꼬리)
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+def sample_latency_ms(rng: random.Random, distribution: str, latency_ms: float, spread: float) -> float:
+    """지연 분포에서 응답 지연 시간 (밀리초) 추출"""
+    if latency_ms <= 0 or distribution == "fixed":
+        return latency_ms
+    if distribution == "uniform":
+        return rng.uniform(latency_ms * max(0.0, 1 - spread), latency_ms * (1 + spread))
+    if distribution == "exponential":
+        return rng.expovariate(1 / latency_ms)
+    if distribution == "lognormal":
+        return latency_ms * rng.lognormvariate(0.0, spread)
+    raise ValueError(f"알 수 없는 지연 분포: {distribution}")
+
+def create_app(latency_ms: float = 0.0, status: int = 200, latency_distribution: str = "fixed",
+               latency_spread: float = 0.5, error_rate: float = 0.0, seed: Optional[int] = None) -> web.Application:
+    """대체 API 애플리케이션 생성 (지연 분포에서 뽑은 시간만큼 응답 지연, error_rate 비율로 503 응답)
+    
+    app["state"]["status"]를 바꾸면 실행 중에도 응답 상태를 전환할 수 있고 (장애/복구 재현),
+    app["state"]["error_rate"]로 503 비율을 조정합니다. 상태 코드별 응답 수는 app["state"]["responses"]에 집계됩니다.
+    """
+    if latency_distribution not in LATENCY_DISTRIBUTIONS:
+        raise ValueError(f"알 수 없는 지연 분포: {latency_distribution}")
+    rng = random.Random(seed)
+
+    async def handle_inference(request: web.Request) -> web.Response:
+        await request.read()
+        state = request.app["state"]
+        delay_ms = sample_latency_ms(rng, latency_distribution, latency_ms, latency_spread)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        status = state["status"]
+        if status == 200 and rng.random() < state["error_rate"]:
+            status = 503
+        state["responses"][status] += 1
+        if status == 503:
+            return web.json_response({"error": "Model is currently loading", "estimated_time": 20.0}, status=503)
+        if status != 200:
+            return web.json_response({"error": "Internal Server Error"}, status=status)
+        return web.json_response(fake_response(request.match_info["model"]))
+
+    app = web.Application(client_max_size=32 * 1024 * 1024)
+    app["state"] = {"status": status, "error_rate": error_rate, "responses": Counter()}
+    app.router.add_post("/models/{model:.+}", handle_inference)
+    return app
+
+async def start_fake_hf_server(host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                               status: int = 200, latency_distribution: str = "fixed",
+                               latency_spread: float = 0.5, error_rate: float = 0.0, seed: Optional[int] = None) -> tuple:
+    """현재 이벤트 루프에서 대체 서버 시작 (port=0이면 빈 포트 사용) - (runner, API 기본 주소) 반환
+    
+    응답 집계는 runner.app["state"]["responses"]로 확인합니다.
+    """
+    runner = web.AppRunner(
+        create_app(latency_ms, status, latency_distribution, latency_spread, error_rate, seed), access_log=None
+    )
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_host, bound_port = runner.addresses[0][:2]
+    return runner, f"http://{bound_host}:{bound_port}/models"
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 Hugging Face Inference API 대체 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="응답 지연 시간 (밀리초, 분포의 중앙값/평균)")
+    parser.add_argument("--latency-dist", default="fixed", choices=LATENCY_DISTRIBUTIONS, help="응답 지연 분포")
+    parser.add_argument("--latency-spread", type=float, default=0.5,
+                        help="uniform은 ± 비율, lognormal은 형상 모수 (클수록 긴 꼬리)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 (모델 로딩 중) 응답 비율 (0~1)")
+    parser.add_argument("--status", type=int, default=200, help="응답 HTTP 상태 (503 = 모델 로딩 중)")
+    parser.add_argument("--seed", type=int, default=None, help="지연/오류 난수 시드 (재현성)")
+    args = parser.parse_args()
+
+    print(f"🧪 대체 HF API: http://{args.host}:{args.port}/models "
+          f"(지연 {args.latency_ms}ms {args.latency_dist}, 503 비율 {args.error_rate:.0%}, 상태 {args.status})")
+    web.run_app(
+        create_app(args.latency_ms, args.status, args.latency_dist, args.latency_spread, args.error_rate, args.seed),
+        host=args.host, port=args.port, print=None
+    )
+
+if __name__ == "__main__":
+    main()
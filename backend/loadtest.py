@@ -0,0 +1,441 @@
+# 분석 서버 부하 테스트 스크립트 (목표 요청률 또는 동시성으로 실제 HTTP 서버 구동)
+"""
+사용법:
+    python loadtest.py --url http://127.0.0.1:8000 --concurrency 16 --duration 60
+    python loadtest.py --rate 20 --duration 120 --endpoint base64 --endpoint binary
+    python loadtest.py --spawn-server --fake-hf --hf-latency-ms 300 --hf-latency-dist lognormal --hf-error-rate 0.05
+    python loadtest.py --payloads ./payloads --rate 10 --output loadtest.json --max-error-rate 0.01
+
+payload 코퍼스(이미지 파일 또는 .b64/.txt Base64 텍스트, 없으면 benchmark.py의 합성 얼굴)를 엔드포인트별 요청 본문으로
+미리 직렬화한 뒤 재생하므로, 부하 생성기 자체의 인코딩 비용이 측정에 섞이지 않습니다.
+
+- --rate: 열린 부하 (포아송/고정 간격 도착). 지연 시간은 예정 전송 시각부터 측정하므로 서버가 밀려도
+  요청 간격이 벌어져 지연이 작게 보이는 문제(coordinated omission)가 없고, --max-in-flight를 넘는 요청은 dropped로 집계
+- --concurrency: 닫힌 부하 (각 작업이 응답을 받은 뒤 다음 요청 전송)
+- --interval마다 구간별 처리량/오류/지연 백분위를 출력하고, 종료 후 전체 지연 히스토그램과 요약을 출력
+- --fake-hf: fake_hf_server.py 대체 HF API를 함께 띄움 (지연 분포와 503 비율 지정, 외부 네트워크 없이 원격 호출 경로 재현)
+- --spawn-server: HF_API_BASE를 대체 서버로 지정한 uvicorn 분석 서버를 띄우고 준비(/health/ready) 후 측정
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+import numpy as np
+
+from fake_hf_server import LATENCY_DISTRIBUTIONS, start_fake_hf_server
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+BASE64_EXTENSIONS = (".b64", ".txt")
+
+# 엔드포인트별 경로 (multi_face/mode/deadline_ms는 분석 엔드포인트에만 전달)
+ENDPOINTS = {
+    "base64": "/analyze-skin-base64",
+    "binary": "/analyze-skin",
+    "batch": "/analyze-skin-batch",
+    "detect": "/detect-face",
+}
+
+# 히스토그램 구간 상한 (밀리초, 1-2-5 간격으로 1ms ~ 100s)
+HISTOGRAM_BOUNDS_MS = [m * 10 ** e for e in range(0, 5) for m in (1, 2, 5)] + [100000]
+
+def load_payloads(payload_dir: Optional[str], count: int, resolution: str, seed: int) -> List[bytes]:
+    """payload 코퍼스를 이미지 바이트 목록으로 읽기 (디렉터리가 없으면 합성 얼굴 JPEG)
+
+    Base64 텍스트 파일은 data URL 접두사를 허용하며 디코딩해 보관하고, 요청 본문은 엔드포인트별로 다시 인코딩합니다.
+    """
+    if payload_dir:
+        payloads = []
+        for name in sorted(os.listdir(payload_dir)):
+            path = os.path.join(payload_dir, name)
+            lower = name.lower()
+            if lower.endswith(IMAGE_EXTENSIONS):
+                with open(path, "rb") as f:
+                    payloads.append(f.read())
+            elif lower.endswith(BASE64_EXTENSIONS):
+                with open(path, encoding="ascii") as f:
+                    text = f.read().strip()
+                payloads.append(base64.b64decode(text.split(",", 1)[-1]))
+        if not payloads:
+            raise SystemExit(f"❌ payload가 없습니다: {payload_dir}")
+        return payloads[:count] if count > 0 else payloads
+
+    # 합성 코퍼스는 분석 서버 모듈을 불러오므로 필요할 때만 import
+    from benchmark import build_corpus
+    return build_corpus(None, [resolution], max(1, count), seed)[resolution]
+
+def build_requests(payloads: List[bytes], endpoints: List[str], args) -> List[tuple]:
+    """(엔드포인트, 경로, 본문, 헤더) 요청 목록 - 엔드포인트를 번갈아 가며 payload를 순환"""
+    query = {}
+    if args.mode:
+        query["mode"] = args.mode
+    if args.deadline_ms is not None:
+        query["deadline_ms"] = args.deadline_ms
+    if args.multi_face:
+        query["multi_face"] = True
+
+    encoded = [base64.b64encode(payload).decode("ascii") for payload in payloads]
+    json_headers = {"Content-Type": "application/json"}
+    requests = []
+    for i in range(max(len(payloads), len(endpoints))):
+        endpoint = endpoints[i % len(endpoints)]
+        index = i % len(payloads)
+        path = ENDPOINTS[endpoint]
+        if endpoint == "binary":
+            params = "&".join(f"{key}={str(value).lower()}" for key, value in query.items())
+            requests.append((endpoint, f"{path}?{params}" if params else path, payloads[index],
+                             {"Content-Type": "application/octet-stream"}))
+        elif endpoint == "batch":
+            images = [encoded[(index + j) % len(encoded)] for j in range(args.batch_size)]
+            requests.append((endpoint, path, json.dumps({"images": images}).encode(), json_headers))
+        elif endpoint == "detect":
+            requests.append((endpoint, path, json.dumps({"image": encoded[index]}).encode(), json_headers))
+        else:
+            requests.append((endpoint, path, json.dumps({"image": encoded[index], **query}).encode(), json_headers))
+    return requests
+
+class LoadRecorder:
+    """요청 결과 기록 (예정 전송 시각, 완료 시각, 지연 시간, 결과) 및 구간별/전체 요약
+
+    구간 요약(timeline)은 워밍업 구간도 포함하고, 전체 요약과 히스토그램은 워밍업 이후 전송한 요청만 사용합니다.
+    """
+
+    def __init__(self, start: float, warmup: float):
+        self.start = start
+        self.measure_from = start + warmup
+        self.samples: List[tuple] = []  # (완료 시각 오프셋, 지연 ms, 결과, 엔드포인트, 측정 대상 여부)
+        self.sent = 0
+        self.window_start = 0
+
+    def record(self, scheduled: float, finished: float, outcome: str, endpoint: str):
+        self.samples.append((finished - self.start, (finished - scheduled) * 1000, outcome, endpoint,
+                             scheduled >= self.measure_from))
+
+    def measured(self, endpoint: Optional[str] = None) -> List[tuple]:
+        """워밍업 이후 전송한 요청 결과 (endpoint를 주면 해당 엔드포인트만)"""
+        return [s for s in self.samples if s[4] and (endpoint is None or s[3] == endpoint)]
+
+    def window(self) -> List[tuple]:
+        """지난 window() 호출 이후 기록된 결과"""
+        samples = self.samples[self.window_start:]
+        self.window_start = len(self.samples)
+        return samples
+
+    @staticmethod
+    def summarize(samples: List[tuple], seconds: float) -> Dict:
+        """결과별 건수, 오류율, 성공 처리량과 성공 요청의 지연 백분위"""
+        outcomes = Counter(outcome for _, _, outcome, *_ in samples)
+        latencies = np.array([latency for _, latency, outcome, *_ in samples if outcome == "200"])
+        completed = sum(count for outcome, count in outcomes.items() if outcome != "dropped")
+        errors = len(samples) - outcomes["200"]
+        summary = {
+            "requests": len(samples),
+            "ok": outcomes["200"],
+            "errors": errors,
+            "error_rate": errors / len(samples) if samples else 0.0,
+            "outcomes": dict(outcomes),
+            "throughput_per_s": outcomes["200"] / seconds if seconds > 0 else 0.0,
+            "completed_per_s": completed / seconds if seconds > 0 else 0.0,
+        }
+        if latencies.size:
+            summary.update({
+                "mean_ms": float(latencies.mean()),
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p90_ms": float(np.percentile(latencies, 90)),
+                "p99_ms": float(np.percentile(latencies, 99)),
+                "p999_ms": float(np.percentile(latencies, 99.9)),
+                "max_ms": float(latencies.max()),
+            })
+        return summary
+
+    def histogram(self) -> List[Dict]:
+        """성공 요청 지연 시간의 로그 간격 히스토그램 (빈 구간 제외)"""
+        latencies = np.array([latency for _, latency, outcome, *_ in self.measured() if outcome == "200"])
+        counts = np.bincount(np.searchsorted(HISTOGRAM_BOUNDS_MS, latencies).astype(np.int64),
+                             minlength=len(HISTOGRAM_BOUNDS_MS) + 1)
+        # 마지막 구간(le_ms = None)은 최대 상한 초과
+        return [
+            {"le_ms": HISTOGRAM_BOUNDS_MS[i] if i < len(HISTOGRAM_BOUNDS_MS) else None, "count": int(count)}
+            for i, count in enumerate(counts) if count
+        ]
+
+async def send_request(session: aiohttp.ClientSession, base_url: str, request: tuple, scheduled: float,
+                       recorder: LoadRecorder):
+    """요청 하나를 보내고 상태 코드(또는 timeout/connection_error)를 기록"""
+    endpoint, path, body, headers = request
+    loop = asyncio.get_running_loop()
+    try:
+        async with session.post(base_url + path, data=body, headers=headers) as response:
+            await response.read()
+            outcome = str(response.status)
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+    except aiohttp.ClientError:
+        outcome = "connection_error"
+    recorder.record(scheduled, loop.time(), outcome, endpoint)
+
+async def open_loop(session: aiohttp.ClientSession, base_url: str, requests: List[tuple], recorder: LoadRecorder,
+                    end: float, args):
+    """목표 요청률로 도착 시각을 미리 정해 전송 (응답을 기다리지 않음, 동시 요청 상한 초과 시 dropped)"""
+    loop = asyncio.get_running_loop()
+    rng = random.Random(args.seed)
+    in_flight = set()
+    scheduled = recorder.start
+    for i in itertools.count():
+        if scheduled >= end:
+            break
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        request = requests[i % len(requests)]
+        recorder.sent += 1
+        if len(in_flight) >= args.max_in_flight:
+            recorder.record(scheduled, scheduled, "dropped", request[0])
+        else:
+            task = asyncio.ensure_future(send_request(session, base_url, request, scheduled, recorder))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        scheduled += rng.expovariate(args.rate) if args.arrival == "poisson" else 1 / args.rate
+    if in_flight:
+        await asyncio.wait(in_flight)
+
+async def closed_loop(session: aiohttp.ClientSession, base_url: str, requests: List[tuple], recorder: LoadRecorder,
+                      end: float, args):
+    """concurrency 개의 작업이 각각 응답을 받은 뒤 다음 요청 전송"""
+    loop = asyncio.get_running_loop()
+
+    async def worker(offset: int):
+        for i in itertools.count(offset, args.concurrency):
+            now = loop.time()
+            if now >= end:
+                return
+            recorder.sent += 1
+            await send_request(session, base_url, requests[i % len(requests)], now, recorder)
+
+    await asyncio.gather(*[worker(i) for i in range(args.concurrency)])
+
+def emit_window(recorder: LoadRecorder, timeline: List[Dict]):
+    """지난 구간 요약을 출력하고 timeline에 추가"""
+    now = asyncio.get_running_loop().time() - recorder.start
+    previous = timeline[-1] if timeline else {"t_s": 0.0, "sent_total": 0}
+    window = LoadRecorder.summarize(recorder.window(), now - previous["t_s"])
+    window.update({"t_s": round(now, 3), "sent": recorder.sent - previous["sent_total"], "sent_total": recorder.sent})
+    timeline.append(window)
+    print(f"{window['t_s']:>7.1f} {window['sent']:>6} {window['requests']:>6} {window['throughput_per_s']:>7.1f} "
+          f"{window['error_rate']:>6.1%} {window.get('p50_ms', 0):>9.1f} {window.get('p90_ms', 0):>9.1f} "
+          f"{window.get('p99_ms', 0):>9.1f}", file=sys.stderr)
+
+async def report_progress(recorder: LoadRecorder, interval: float, timeline: List[Dict]):
+    """interval마다 구간 요약 출력 (취소 후 마지막 구간은 emit_window로 따로 출력)"""
+    print(f"{'t(s)':>7} {'sent':>6} {'done':>6} {'ok/s':>7} {'err%':>6} {'p50(ms)':>9} {'p90(ms)':>9} {'p99(ms)':>9}",
+          file=sys.stderr)
+    while True:
+        await asyncio.sleep(interval)
+        emit_window(recorder, timeline)
+
+def spawn_server(base_url: str, hf_api_base: Optional[str], server_env: List[str]) -> subprocess.Popen:
+    """uvicorn 분석 서버 실행 (대체 HF API가 있으면 HF_API_BASE로 지정, server_env는 KEY=VALUE 목록)"""
+    parts = urlsplit(base_url)
+    env = dict(os.environ)
+    env.update(item.split("=", 1) for item in server_env)
+    if hf_api_base:
+        env["HF_API_BASE"] = hf_api_base
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", parts.hostname, "--port", str(parts.port or 80),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+
+async def wait_until_ready(session: aiohttp.ClientSession, base_url: str, timeout: float,
+                           server: Optional[subprocess.Popen] = None):
+    """/health/ready가 200을 반환할 때까지 대기 (서버 프로세스가 종료되거나 시간 초과 시 종료)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise SystemExit(f"❌ 분석 서버가 종료되었습니다 (종료 코드 {server.returncode})")
+        try:
+            async with session.get(base_url + "/health/ready") as response:
+                if response.status == 200:
+                    return
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+        await asyncio.sleep(0.5)
+    raise SystemExit(f"❌ 분석 서버가 {timeout:.0f}초 안에 준비되지 않았습니다: {base_url}")
+
+def print_report(report: Dict):
+    """전체 요약과 지연 시간 히스토그램 출력"""
+    summary = report["summary"]
+    print(f"요청 {summary['requests']}건, 성공 {summary['ok']}건, 오류율 {summary['error_rate']:.2%}, "
+          f"처리량 {summary['throughput_per_s']:.2f} req/s")
+    print("결과별: " + ", ".join(f"{outcome}={count}" for outcome, count in sorted(summary["outcomes"].items())))
+    if "p50_ms" in summary:
+        print(f"지연(ms): mean {summary['mean_ms']:.1f}  p50 {summary['p50_ms']:.1f}  p90 {summary['p90_ms']:.1f}  "
+              f"p99 {summary['p99_ms']:.1f}  p99.9 {summary['p999_ms']:.1f}  max {summary['max_ms']:.1f}")
+    for endpoint, endpoint_summary in report["endpoints"].items():
+        print(f"  {endpoint:<7} 요청 {endpoint_summary['requests']:>6}  오류율 {endpoint_summary['error_rate']:>6.2%}  "
+              f"p50 {endpoint_summary.get('p50_ms', 0):>8.1f}ms  p99 {endpoint_summary.get('p99_ms', 0):>8.1f}ms")
+
+    histogram = report["histogram"]
+    peak = max((bucket["count"] for bucket in histogram), default=0)
+    if peak:
+        print("지연 히스토그램 (성공 요청):")
+        for bucket in histogram:
+            label = "+Inf" if bucket["le_ms"] is None else f"{bucket['le_ms']:g}"
+            bar = "#" * max(1, round(40 * bucket["count"] / peak))
+            print(f"  ≤{label:>7}ms {bucket['count']:>7} {bar}")
+    if report.get("fake_hf") is not None:
+        print(f"대체 HF API 응답: {report['fake_hf']['responses']}")
+
+async def run(args) -> Dict:
+    payloads = load_payloads(args.payloads, args.count, args.resolution, args.seed)
+    requests = build_requests(payloads, args.endpoint, args)
+    base_url = args.url.rstrip("/")
+
+    hf_runner, hf_api_base, server, fake_hf = None, None, None, None
+    if args.fake_hf:
+        hf_runner, hf_api_base = await start_fake_hf_server(
+            args.hf_host, args.hf_port, args.hf_latency_ms, latency_distribution=args.hf_latency_dist,
+            latency_spread=args.hf_latency_spread, error_rate=args.hf_error_rate, seed=args.seed
+        )
+        print(f"🧪 대체 HF API: {hf_api_base} (서버를 직접 띄우면 HF_API_BASE로 지정)", file=sys.stderr)
+
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            if args.spawn_server:
+                server = spawn_server(base_url, hf_api_base, args.server_env)
+            await wait_until_ready(session, base_url, args.ready_timeout, server)
+
+            load = f"rate {args.rate}/s ({args.arrival})" if args.rate else f"concurrency {args.concurrency}"
+            print(f"🚀 {base_url} {'+'.join(args.endpoint)} - {load}, {args.duration:.0f}s "
+                  f"(워밍업 {args.warmup:.0f}s 제외), payload {len(payloads)}개", file=sys.stderr)
+
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            recorder = LoadRecorder(start, args.warmup)
+            timeline: List[Dict] = []
+            progress = asyncio.ensure_future(report_progress(recorder, args.interval, timeline))
+            try:
+                end = start + args.warmup + args.duration
+                if args.rate:
+                    await open_loop(session, base_url, requests, recorder, end, args)
+                else:
+                    await closed_loop(session, base_url, requests, recorder, end, args)
+            finally:
+                progress.cancel()
+            emit_window(recorder, timeline)
+            measured_seconds = max(1e-9, loop.time() - recorder.measure_from)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        if hf_runner is not None:
+            fake_hf = {"responses": {str(status): count for status, count in hf_runner.app["state"]["responses"].items()}}
+            await hf_runner.cleanup()
+
+    endpoints = {
+        endpoint: LoadRecorder.summarize(recorder.measured(endpoint), measured_seconds)
+        for endpoint in dict.fromkeys(args.endpoint)
+    }
+    return {
+        "meta": {
+            "url": base_url,
+            "endpoints": args.endpoint,
+            "load": "open" if args.rate else "closed",
+            "rate": args.rate,
+            "arrival": args.arrival if args.rate else None,
+            "concurrency": None if args.rate else args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "payloads": args.payloads or f"synthetic({args.resolution}, seed={args.seed})",
+            "payload_count": len(payloads),
+            "mode": args.mode,
+            "deadline_ms": args.deadline_ms,
+            "multi_face": args.multi_face,
+            "fake_hf": {
+                "latency_ms": args.hf_latency_ms,
+                "latency_dist": args.hf_latency_dist,
+                "latency_spread": args.hf_latency_spread,
+                "error_rate": args.hf_error_rate,
+            } if args.fake_hf else None,
+        },
+        "summary": LoadRecorder.summarize(recorder.measured(), measured_seconds),
+        "endpoints": endpoints,
+        "histogram": recorder.histogram(),
+        "timeline": timeline,
+        "fake_hf": fake_hf,
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="분석 서버 HTTP 부하 테스트")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="분석 서버 주소")
+    parser.add_argument("--endpoint", action="append", choices=list(ENDPOINTS),
+                        help="요청할 엔드포인트 (여러 번 지정하면 번갈아 요청, 기본 base64)")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rate", type=float, default=None, help="목표 요청률 (req/s, 열린 부하)")
+    load.add_argument("--concurrency", type=int, default=8, help="동시 요청 수 (닫힌 부하)")
+    parser.add_argument("--arrival", default="poisson", choices=("poisson", "constant"), help="--rate 도착 간격 분포")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="--rate에서 동시 요청 상한 (초과 시 dropped)")
+    parser.add_argument("--duration", type=float, default=30.0, help="측정 시간 (초)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="결과에서 제외할 시작 구간 (초)")
+    parser.add_argument("--interval", type=float, default=5.0, help="구간 요약 출력 간격 (초)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="요청 타임아웃 (초)")
+    parser.add_argument("--payloads", default=None, help="이미지 또는 .b64/.txt 파일 디렉터리 (없으면 합성 얼굴)")
+    parser.add_argument("--count", type=int, default=8, help="사용할 payload 수 (0 = 디렉터리 전체)")
+    parser.add_argument("--resolution", default="720p", help="합성 payload 해상도 (benchmark.py RESOLUTIONS)")
+    parser.add_argument("--batch-size", type=int, default=2, help="batch 엔드포인트 요청당 이미지 수")
+    parser.add_argument("--mode", default=None, choices=("fast", "balanced", "accurate"), help="분석 품질 단계")
+    parser.add_argument("--deadline-ms", type=float, default=None, help="분석 기한 (밀리초)")
+    parser.add_argument("--multi-face", action="store_true", help="다중 얼굴 분석 요청")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--spawn-server", action="store_true", help="--url 주소로 분석 서버(uvicorn)를 띄워서 측정")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="--spawn-server 서버 환경 변수 (예: ANALYSIS_CACHE_SIZE=0, 여러 번 지정 가능)")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="서버 준비 대기 시간 (초)")
+    parser.add_argument("--fake-hf", action="store_true", help="대체 HF API 서버 실행")
+    parser.add_argument("--hf-host", default="127.0.0.1")
+    parser.add_argument("--hf-port", type=int, default=8081, help="대체 HF API 포트 (0 = 빈 포트)")
+    parser.add_argument("--hf-latency-ms", type=float, default=300.0, help="대체 HF API 지연 (중앙값/평균, 밀리초)")
+    parser.add_argument("--hf-latency-dist", default="lognormal", choices=LATENCY_DISTRIBUTIONS)
+    parser.add_argument("--hf-latency-spread", type=float, default=0.5, help="uniform ± 비율 / lognormal 형상 모수")
+    parser.add_argument("--hf-error-rate", type=float, default=0.0, help="대체 HF API 503 응답 비율 (0~1)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="허용 오류율 (초과 시 종료 코드 1)")
+    args = parser.parse_args()
+    args.endpoint = args.endpoint or ["base64"]
+    if any("=" not in item for item in args.server_env):
+        parser.error("--server-env는 KEY=VALUE 형식이어야 합니다")
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate는 0보다 커야 합니다")
+    if args.concurrency <= 0 or args.batch_size <= 0 or args.duration <= 0 or args.interval <= 0:
+        parser.error("--concurrency, --batch-size, --duration, --interval은 0보다 커야 합니다")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.output}")
+    if args.max_error_rate is not None and report["summary"]["error_rate"] > args.max_error_rate:
+        print(f"❌ 오류율 {report['summary']['error_rate']:.2%} > 허용 {args.max_error_rate:.2%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
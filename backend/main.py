@@ -1,7 +1,10 @@
 # 2025년 최신 버전 - AI 피부 분석기 백엔드
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from fastapi.responses import Response
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.routing import Match
+from contextlib import asynccontextmanager, contextmanager, nullcontext
 import cv2
 import numpy as np
 from PIL import Image
@@ -9,32 +12,314 @@ import io
 import base64
 from typing import Dict, List, Optional
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 import math
-import requests
-import aiohttp
 import asyncio
-from scipy import ndimage
-from sklearn.cluster import KMeans
 import time
 import os
-from transformers import ViTFeatureExtractor, ViTForImageClassification
-import torch
+import functools
+import hashlib
+import hmac
+import threading
+import heapq
+import itertools
+import multiprocessing
+import queue
+import sqlite3
+from multiprocessing import shared_memory
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, generate_latest, multiprocess, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+
+# torch / transformers / aiohttp는 무거우므로 실제로 사용하는 시점에 import (서버 기동 시간 단축)
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Hugging Face Inference API 주소 (벤치마크/부하 테스트 시 fake_hf_server.py 주소로 교체)
+HF_API_BASE = os.getenv("HF_API_BASE", "https://api-inference.huggingface.co/models")
+HF_API_TOKEN = os.getenv("HF_API_TOKEN", "")
+
+# 원격 AI 호출 사용 여부 (0이면 네트워크 없이 항상 로컬 분석 - 오프라인 일괄 재분석 등)
+REMOTE_INFERENCE = os.getenv("REMOTE_INFERENCE", "1") == "1"
+
+# 원격 추론 호출 정책: 시도별 타임아웃(초), 요청 전체 기한(초), 최대 시도 횟수, 동시 호출 상한,
+# 헤징 지연(ms, 0 = 사용 안 함), 서킷 브레이커 연속 실패 기준과 차단 중 복구 확인(프로브) 주기(초)
+HF_ATTEMPT_TIMEOUT = float(os.getenv("HF_ATTEMPT_TIMEOUT", "2.0"))
+HF_REQUEST_DEADLINE = float(os.getenv("HF_REQUEST_DEADLINE", "4.0"))
+HF_MAX_ATTEMPTS = int(os.getenv("HF_MAX_ATTEMPTS", "2"))
+HF_MAX_CONCURRENCY = int(os.getenv("HF_MAX_CONCURRENCY", "8"))
+HF_HEDGE_DELAY_MS = float(os.getenv("HF_HEDGE_DELAY_MS", "0"))
+HF_BREAKER_FAILURES = int(os.getenv("HF_BREAKER_FAILURES", "5"))
+HF_BREAKER_PROBE_INTERVAL = float(os.getenv("HF_BREAKER_PROBE_INTERVAL", "15"))
+
+# 모델 로딩 방식: background = 서버를 먼저 띄우고 백그라운드에서 로딩 후 readiness 전환, eager = 로딩 완료 후 기동
+MODEL_LOADING_MODE = os.getenv("MODEL_LOADING_MODE", "background")
+
+# 실시간 얼굴 감지용 썸네일 최대 변 길이 (픽셀)
+FACE_CHECK_MAX_SIDE = int(os.getenv("FACE_CHECK_MAX_SIDE", "160"))
+
+# 분석 파이프라인 모드 (full = 전체 프레임 전처리 후 감지, roi = 썸네일에서 감지 후 얼굴 영역만 고정 해상도로 분석)
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "full")
+ROI_DETECT_MAX_SIDE = int(os.getenv("ROI_DETECT_MAX_SIDE", "320"))  # ROI 모드 감지용 썸네일 긴 변
+ROI_ANALYSIS_SIZE = int(os.getenv("ROI_ANALYSIS_SIZE", "512"))  # 여백 포함 얼굴 영역의 분석 해상도 (긴 변)
+ROI_PADDING = float(os.getenv("ROI_PADDING", "0.25"))  # 얼굴 bbox 각 변에 더할 여백 비율
+
+# 다중 얼굴 분석: 프레임당 최대 얼굴 수 (면적이 큰 순)와 감지 이미지 긴 변 대비 최소 얼굴 크기 비율
+MULTI_FACE_MAX_FACES = int(os.getenv("MULTI_FACE_MAX_FACES", "8"))
+MULTI_FACE_MIN_SIZE_RATIO = float(os.getenv("MULTI_FACE_MIN_SIZE_RATIO", "0.04"))
+# 다중 얼굴 후보 채택 기준: 검출기 점수 x 피부색 비율 계수가 이 값 이상인 얼굴만 분석
+MULTI_FACE_MIN_CONFIDENCE = float(os.getenv("MULTI_FACE_MIN_CONFIDENCE", "0.5"))
+
+# 분석 품질 단계 (fast = 선택 단계를 모두 대체, balanced = 기본 기한 안에서 실행, accurate = 기한이 없으면 모든 단계)
+ANALYSIS_MODES = ("fast", "balanced", "accurate")
+DEFAULT_ANALYSIS_MODE = os.getenv("DEFAULT_ANALYSIS_MODE", "accurate")
+BALANCED_DEADLINE_MS = float(os.getenv("BALANCED_DEADLINE_MS", "1500"))  # balanced 모드의 기본 기한
+ANALYSIS_MAX_DEADLINE_MS = float(os.getenv("ANALYSIS_MAX_DEADLINE_MS", "60000"))  # 요청에 지정할 수 있는 최대 기한
+ANALYSIS_DEADLINE_RESERVE_MS = float(os.getenv("ANALYSIS_DEADLINE_RESERVE_MS", "50"))  # 필수 단계용으로 남겨 둘 시간
+
+# 선택 단계별 처리 시간 초기 추정값 (초, 이후 측정값 EWMA로 갱신)
+OPTIONAL_STAGE_INITIAL_COST = {"denoise": 0.02, "remote_parsing": 0.5, "age_model": 0.1, "blemishes_full": 0.03}
+
+# 잡티 감지: 후보 면적 범위(픽셀, 양 끝 제외), 점수용 개수 상한, 응답에 포함할 최대 위치 수, 히트맵 격자 크기,
+# 타일 크기(긴 변이 이보다 크면 타일 단위로 처리)와 타일 경계 여백(픽셀)
+BLEMISH_MIN_AREA = int(os.getenv("BLEMISH_MIN_AREA", "8"))
+BLEMISH_MAX_AREA = int(os.getenv("BLEMISH_MAX_AREA", "150"))
+BLEMISH_COUNT_CAP = int(os.getenv("BLEMISH_COUNT_CAP", "40"))
+BLEMISH_MAX_LOCATIONS = int(os.getenv("BLEMISH_MAX_LOCATIONS", "100"))
+BLEMISH_HEATMAP_SIZE = int(os.getenv("BLEMISH_HEATMAP_SIZE", "16"))
+BLEMISH_TILE_SIZE = int(os.getenv("BLEMISH_TILE_SIZE", "768"))
+BLEMISH_TILE_HALO = int(os.getenv("BLEMISH_TILE_HALO", "24"))
+# 잡티 후보 조건: 주변 대비 최소 밝기 차(적응형 임계값 C), 피부 마스크 경계에서 제외할 폭(픽셀, 눈썹/눈/머리선),
+# 외접 사각형 대비 최소 채움 비율, 최대 가로세로 비 (가는 선 모양의 머리카락/주름 제외)
+BLEMISH_MIN_CONTRAST = int(os.getenv("BLEMISH_MIN_CONTRAST", "8"))
+BLEMISH_EDGE_MARGIN = int(os.getenv("BLEMISH_EDGE_MARGIN", "8"))
+BLEMISH_MIN_FILL = float(os.getenv("BLEMISH_MIN_FILL", "0.4"))
+BLEMISH_MAX_ASPECT = float(os.getenv("BLEMISH_MAX_ASPECT", "3"))
+
+# WebSocket 얼굴 추적 설정: 검출 주기(프레임), 템플릿 매칭 최소 점수, 촬영 준비 판정에 필요한 연속 프레임 수
+FACE_TRACK_DETECT_INTERVAL = int(os.getenv("FACE_TRACK_DETECT_INTERVAL", "5"))
+FACE_TRACK_MIN_MATCH = float(os.getenv("FACE_TRACK_MIN_MATCH", "0.6"))
+FACE_TRACK_READY_FRAMES = int(os.getenv("FACE_TRACK_READY_FRAMES", "3"))
+
+# 업로드 이미지 최대 크기 (바이트)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# multipart 본문에서 이미지 외에 허용할 경계/파트 헤더/필드 크기 (바이트)
+MULTIPART_OVERHEAD_BYTES = int(os.getenv("MULTIPART_OVERHEAD_BYTES", str(64 * 1024)))
+
+# 이미지 헤더에 선언된 최대 픽셀 수 (디코딩 전에 거부)
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", str(64 * 1000 * 1000)))
+
+# JPEG 축소 디코딩 (1/2, 1/4, 1/8 DCT 스케일링) 사용 여부와 roi 모드에서 디코딩 결과가 유지할 최소 긴 변
+REDUCED_DECODE = os.getenv("REDUCED_DECODE", "1") == "1"
+ROI_DECODE_MIN_SIDE = int(os.getenv("ROI_DECODE_MIN_SIDE", str(ROI_ANALYSIS_SIZE * 2)))
+
+# 바이너리 업로드 허용 Content-Type
+BINARY_UPLOAD_TYPES = ("application/octet-stream", "image/jpeg", "image/png")
+
+# 배치 분석 요청당 최대 이미지 수
+MAX_BATCH_IMAGES = int(os.getenv("MAX_BATCH_IMAGES", "8"))
+
+# 분석 결과 캐시 설정 (키는 디코딩된 이미지 내용 해시 - 비슷한 이미지끼리 결과를 공유하지 않음)
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "256"))
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "300"))
+
+# 실행기 설정: OpenCV 단계는 GIL을 해제하므로 스레드 풀, torch 추론은 작은 전용 풀에서 실행
+CV_EXECUTOR_WORKERS = int(os.getenv("CV_EXECUTOR_WORKERS", str(min(8, os.cpu_count() or 1))))
+TORCH_EXECUTOR_WORKERS = int(os.getenv("TORCH_EXECUTOR_WORKERS", "1"))
+
+# 연령대 모델 설정 (백엔드: torch = eager fp32, torch_int8 = 동적 int8 양자화, onnx = ONNX Runtime)
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model")
+AGE_MODEL_NAME = os.getenv("AGE_MODEL_NAME", "nateraw/vit-age-classifier")
+AGE_MODEL_BACKEND = os.getenv("AGE_MODEL_BACKEND", "torch")
+AGE_ONNX_PATH = os.getenv("AGE_ONNX_PATH", os.path.join(MODEL_DIR, "vit_age_classifier.onnx"))
+AGE_ONNX_THREADS = int(os.getenv("AGE_ONNX_THREADS", "0"))
+
+# torch 연령대 모델 가중치를 파일 매핑 텐서로 로드 (prefork 워커/여러 프로세스가 같은 페이지 캐시 공유)
+AGE_MODEL_MMAP = os.getenv("AGE_MODEL_MMAP", "0") == "1"
+AGE_MMAP_PATH = os.getenv("AGE_MMAP_PATH", os.path.join(MODEL_DIR, AGE_MODEL_NAME.replace("/", "--") + ".weights.pt"))
+
+# 연령대 추론 워커 프로세스: 사용 여부, 공유 메모리 링 슬롯 수/슬롯 한 변 크기, 고정할 CPU 목록(예: "2,3"),
+# 워커 torch 스레드 수(0 = CPU 목록 크기), 요청 타임아웃(초), 모델 로딩 대기 시간(초)
+AGE_INFERENCE_PROCESS = os.getenv("AGE_INFERENCE_PROCESS", "0") == "1"
+AGE_WORKER_SLOTS = int(os.getenv("AGE_WORKER_SLOTS", "32"))
+AGE_WORKER_INPUT_SIZE = int(os.getenv("AGE_WORKER_INPUT_SIZE", "224"))
+AGE_WORKER_CPUS = os.getenv("AGE_WORKER_CPUS", "")
+AGE_WORKER_THREADS = int(os.getenv("AGE_WORKER_THREADS", "0"))
+AGE_WORKER_TIMEOUT = float(os.getenv("AGE_WORKER_TIMEOUT", "10"))
+AGE_WORKER_START_TIMEOUT = float(os.getenv("AGE_WORKER_START_TIMEOUT", "120"))
+
+# 멀티 프로세스 메트릭 디렉터리 (prefork.py가 설정, 워커별 메트릭을 /metrics에서 합산)
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+# 얼굴 검출기 설정 (haar = OpenCV Haar cascade, blazeface = 번들된 BlazeFace short-range 모델)
+FACE_DETECTOR = os.getenv("FACE_DETECTOR", "haar")
+BLAZEFACE_MODEL_PATH = os.getenv("BLAZEFACE_MODEL_PATH", os.path.join(MODEL_DIR, "blaze_face_short_range.tflite"))
+BLAZEFACE_SCORE_THRESHOLD = float(os.getenv("BLAZEFACE_SCORE_THRESHOLD", "0.5"))
+# BlazeFace bbox를 Haar bbox 크기로 환산하는 변 길이 배율 (면적 기반 신뢰도 게이트용).
+# benchmark_face_detectors.py의 haar/box 열로 보정하며, short-range 모델은 변 길이가 Haar와 거의 같고 (약 0.97~0.98)
+# 아래쪽으로 치우쳐 있어 기본값은 1.0
+BLAZEFACE_BOX_SCALE = float(os.getenv("BLAZEFACE_BOX_SCALE", "1.0"))
+
+# 분석을 진행할 최소 얼굴 신뢰도 (face_confidence 기준)
+MIN_FACE_CONFIDENCE = 0.8
+
+# YCrCb 피부색 범위 (피부 감지와 다중 얼굴 후보 검증에서 공유)
+SKIN_YCRCB_LOWER = np.array([0, 133, 77], dtype=np.uint8)
+SKIN_YCRCB_UPPER = np.array([255, 173, 127], dtype=np.uint8)
+
+# 수락 제어: 동시 분석 수, 대기열 길이 상한, 대기 시간 SLO(ms, 예상 대기 시간이 넘으면 429로 즉시 거부)
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", str(CV_EXECUTOR_WORKERS)))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_QUEUE_SLO_MS = float(os.getenv("ADMISSION_QUEUE_SLO_MS", "2000"))
+
+# 요청 종류별 우선순위 (낮을수록 먼저 실행)와 처리 시간 측정 전 초기 추정값 (초)
+ADMISSION_PRIORITIES = {"face_check": 0, "analysis": 1, "batch": 1}
+ADMISSION_INITIAL_SERVICE_TIME = {"face_check": 0.01, "analysis": 0.15, "batch": 0.6}
+
+# 분석 기록 저장소 (SQLite, 빈 값이면 사용 안 함): 한 번에 기록할 최대 건수, 최대 기록 지연(ms), 대기열 상한
+HISTORY_DB_PATH = os.getenv(
+    "HISTORY_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "analysis_history.db")
+)
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "128"))
+HISTORY_FLUSH_INTERVAL_MS = float(os.getenv("HISTORY_FLUSH_INTERVAL_MS", "200"))
+HISTORY_MAX_QUEUE = int(os.getenv("HISTORY_MAX_QUEUE", "10000"))
+# 분석 기록 접근 토큰 서명용 공유 비밀 (인증 서버가 사용자 ID의 HMAC-SHA256을 발급, 빈 값이면 기록/조회 비활성화)
+HISTORY_AUTH_SECRET = os.getenv("HISTORY_AUTH_SECRET", "")
+
+# 연령대 추론 마이크로 배치 설정
+AGE_BATCH_WINDOW_MS = float(os.getenv("AGE_BATCH_WINDOW_MS", "5"))
+AGE_BATCH_MAX_SIZE = int(os.getenv("AGE_BATCH_MAX_SIZE", "16"))
+
+# Prometheus 메트릭 (/metrics 에서 텍스트 형식으로 노출)
+STAGE_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_COUNT = Counter(
+    "skin_analyzer_requests_total", "HTTP 요청 수", ["endpoint", "method", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "skin_analyzer_request_duration_seconds", "HTTP 요청 처리 시간", ["endpoint"],
+    buckets=STAGE_LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "skin_analyzer_requests_in_flight", "처리 중인 HTTP 요청 수", ["endpoint"], multiprocess_mode="livesum"
+)
+STAGE_LATENCY = Histogram(
+    "skin_analyzer_stage_duration_seconds", "분석 파이프라인 단계별 처리 시간 (스레드 풀 대기 포함)", ["stage"],
+    buckets=STAGE_LATENCY_BUCKETS
+)
+STAGE_IN_FLIGHT = Gauge(
+    "skin_analyzer_stage_in_flight", "실행 중인 파이프라인 단계 수", ["stage"], multiprocess_mode="livesum"
+)
+STAGE_ERRORS = Counter(
+    "skin_analyzer_stage_errors_total", "파이프라인 단계 오류 수", ["stage"]
+)
+FALLBACK_COUNT = Counter(
+    "skin_analyzer_fallbacks_total", "백업 경로 사용 횟수 (예: HF API 실패 후 enhanced_skin_detection)", ["stage", "reason"]
+)
+STAGE_SKIPS = Counter(
+    "skin_analyzer_stage_skips_total", "생략/대체된 선택 분석 단계 수 (reason: mode, deadline, 원격 실패 유형)", ["stage", "reason"]
+)
+REMOTE_CALLS = Counter(
+    "skin_analyzer_remote_calls_total", "Hugging Face API 호출 결과", ["model", "outcome"]
+)
+REMOTE_ATTEMPTS = Counter(
+    "skin_analyzer_remote_attempts_total", "Hugging Face API 개별 시도 결과 (재시도/헤징 포함)", ["model", "outcome"]
+)
+REMOTE_HEDGES = Counter(
+    "skin_analyzer_remote_hedges_total", "지연된 요청에 대해 보낸 헤징 요청 수", ["model"]
+)
+REMOTE_CIRCUIT_OPEN = Gauge(
+    "skin_analyzer_remote_circuit_open", "서킷 브레이커 차단 여부 (1 = 원격 호출 생략)", ["model"],
+    multiprocess_mode="livemax"
+)
+AGE_WORKER_RESTARTS = Counter(
+    "skin_analyzer_age_worker_restarts_total", "비정상 종료 후 다시 시작한 연령대 추론 워커 프로세스 수"
+)
+HISTORY_WRITES = Counter(
+    "skin_analyzer_history_writes_total", "분석 기록 저장 결과 (written/dropped/error)", ["outcome"]
+)
+ADMISSION_QUEUED = Gauge(
+    "skin_analyzer_admission_queued", "수락 대기열에서 기다리는 요청 수", ["traffic_class"], multiprocess_mode="livesum"
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "skin_analyzer_admission_wait_seconds", "수락 대기열 대기 시간", ["traffic_class"],
+    buckets=STAGE_LATENCY_BUCKETS
+)
+ADMISSION_REJECTED = Counter(
+    "skin_analyzer_admission_rejected_total", "과부하로 거부한 요청 수 (429)", ["traffic_class", "reason"]
+)
+
+@contextmanager
+def track_stage(stage: str):
+    """파이프라인 단계의 처리 시간, 실행 중 수, 오류를 기록"""
+    STAGE_IN_FLIGHT.labels(stage).inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - start)
+        STAGE_IN_FLIGHT.labels(stage).dec()
+
+class AnalyzerCacheCollector:
+    """분석 결과 캐시 통계를 스크레이프 시점에 메트릭으로 변환"""
+    
+    EVENTS = ("hits", "misses", "coalesced", "evictions", "expirations")
+    
+    def metric_families(self):
+        return (
+            CounterMetricFamily("skin_analyzer_cache_events", "분석 결과 캐시 이벤트 수", labels=["event"]),
+            GaugeMetricFamily("skin_analyzer_cache_entries", "캐시된 분석 결과 수"),
+            GaugeMetricFamily("skin_analyzer_cache_in_flight", "진행 중인 (병합 대상) 분석 수")
+        )
+    
+    def describe(self):
+        return self.metric_families()
+    
+    def collect(self):
+        if analyzer is None:
+            return []
+        stats = analyzer.result_cache.get_stats()
+        events, entries, in_flight = self.metric_families()
+        for event in self.EVENTS:
+            events.add_metric([event], stats[event])
+        entries.add_metric([], stats["size"])
+        in_flight.add_metric([], stats["in_flight"])
+        return [events, entries, in_flight]
+
+REGISTRY.register(AnalyzerCacheCollector())
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """서버 시작시 설정과 종료시 정리를 처리하는 라이프스팬 이벤트 핸들러"""
-    global analyzer
+    global history_store
     logger.info("🚀 2025년 최신 AI 피부 분석기 서버 시작...")
-    analyzer = ModernSkinAnalyzer()
-    logger.info("✅ 2025년 AI 분석기 준비 완료!")
+    if HISTORY_DB_PATH and HISTORY_AUTH_SECRET:
+        history_store = AnalysisHistoryStore(HISTORY_DB_PATH)
+    elif HISTORY_DB_PATH:
+        logger.info("HISTORY_AUTH_SECRET이 없어 분석 기록 저장/조회를 비활성화합니다.")
+    if analyzer is not None:
+        # prefork 워커: 부모 프로세스에서 로드/워밍업된 분석기를 그대로 사용
+        loader_task = None
+    elif MODEL_LOADING_MODE == "eager":
+        await load_analyzer()
+        loader_task = None
+    else:
+        # 모델 로딩을 기다리지 않고 바로 요청을 받음 (readiness는 로딩 완료 후 전환)
+        loader_task = asyncio.create_task(load_analyzer())
     yield
+    if loader_task is not None and not loader_task.done():
+        loader_task.cancel()
     if analyzer:
         await analyzer.close_session()
+    if history_store is not None:
+        await asyncio.get_running_loop().run_in_executor(None, history_store.close)
+        history_store = None
 
 app = FastAPI(
     title="AI 피부 분석기 API", 
@@ -52,32 +337,1686 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@dataclass
-class SkinAnalysisResult:
-    skin_type: str
-    moisture_level: int
-    oil_level: int
-    blemish_count: int
-    skin_tone: str
-    wrinkle_level: int
-    pore_size: str
-    overall_score: int
-    avg_skin_color: Dict[str, float]
-    face_detected: bool
-    confidence: float
-    skin_area_percentage: float
-    detected_features: List[str]
-    processing_time: float
-    api_method: str
-    analysis_version: str = "2025.1.0"
-    age_range: str = "분석 불가"
-    age_confidence: float = 0.0
+def resolve_endpoint_label(scope) -> str:
+    """요청 경로를 라우트 템플릿으로 변환 (존재하지 않는 경로는 하나의 라벨로 묶어 카디널리티 제한)"""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """엔드포인트별 요청 수/처리 시간/진행 중 요청 수 기록"""
+    endpoint = resolve_endpoint_label(request.scope)
+    
+    REQUESTS_IN_FLIGHT.labels(endpoint).inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+        REQUEST_COUNT.labels(endpoint, request.method, str(status)).inc()
+        REQUESTS_IN_FLIGHT.labels(endpoint).dec()
+
+@dataclass
+class SkinAnalysisResult:
+    skin_type: str
+    moisture_level: int
+    oil_level: int
+    blemish_count: int
+    skin_tone: str
+    wrinkle_level: int
+    pore_size: str
+    overall_score: int
+    avg_skin_color: Dict[str, float]
+    face_detected: bool
+    confidence: float
+    skin_area_percentage: float
+    detected_features: List[str]
+    processing_time: float
+    api_method: str
+    analysis_version: str = "2025.1.0"
+    age_range: str = "분석 불가"
+    age_confidence: float = 0.0
+    blemish_map: Dict = field(default_factory=dict)
+    analysis_mode: str = DEFAULT_ANALYSIS_MODE
+    stages_run: List[str] = field(default_factory=list)
+    stages_skipped: List[str] = field(default_factory=list)
+    face_region: Dict = field(default_factory=dict)
+
+def get_age_input_spec(transforms) -> tuple:
+    """ViT 전처리 설정 (입력 크기, 정규화 평균/표준편차) 추출"""
+    size, mean, std = 224, [0.5, 0.5, 0.5], [0.5, 0.5, 0.5]
+    if transforms is not None:
+        configured = getattr(transforms, "size", size)
+        if isinstance(configured, dict):
+            configured = configured.get("height", configured.get("shortest_edge", size))
+        size = int(configured)
+        mean = getattr(transforms, "image_mean", None) or mean
+        std = getattr(transforms, "image_std", None) or std
+    return (
+        size,
+        np.asarray(mean, dtype=np.float32).reshape(3, 1, 1),
+        np.asarray(std, dtype=np.float32).reshape(3, 1, 1)
+    )
+
+def prepare_age_inputs(face_images: List[np.ndarray], input_spec: tuple) -> np.ndarray:
+    """RGB 얼굴 crop을 PIL 변환 없이 ViT 입력 배열(NCHW float32)로 변환"""
+    size, mean, std = input_spec
+    batch = np.empty((len(face_images), 3, size, size), dtype=np.float32)
+    
+    for i, face in enumerate(face_images):
+        interpolation = cv2.INTER_AREA if min(face.shape[:2]) > size else cv2.INTER_LINEAR
+        resized = cv2.resize(face, (size, size), interpolation=interpolation)
+        batch[i] = resized.transpose(2, 0, 1)
+    
+    batch *= 1.0 / 255.0
+    batch -= mean
+    batch /= std
+    return batch
+
+class AgeModelBackend:
+    """연령대 모델 추론 백엔드 인터페이스 (NCHW float32 입력 → 클래스별 확률)"""
+    name = "base"
+    
+    def predict(self, pixel_values: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+    
+    def predict_faces(self, face_images: List[np.ndarray], input_spec: tuple) -> np.ndarray:
+        """RGB 얼굴 crop 목록 → 클래스별 확률"""
+        return self.predict(prepare_age_inputs(face_images, input_spec))
+    
+    def before_fork(self):
+        """fork 직전 부모 프로세스에서 호출 (워커가 물려받으면 안 되는 자원 정리)"""
+    
+    def after_fork(self, num_threads: int) -> "AgeModelBackend":
+        """fork된 워커에서 사용할 백엔드 (런타임 내부 스레드 풀이 없으면 그대로 공유)"""
+        return self
+    
+    def close(self):
+        """백엔드 자원 정리"""
+
+class TorchAgeBackend(AgeModelBackend):
+    """eager PyTorch (fp32) 백엔드"""
+    name = "torch"
+    
+    def __init__(self, model):
+        self.model = model.eval()
+    
+    def predict(self, pixel_values: np.ndarray) -> np.ndarray:
+        import torch
+        
+        with torch.inference_mode():
+            logits = self.model(pixel_values=torch.from_numpy(pixel_values)).logits
+            return logits.softmax(1).numpy()
+
+class QuantizedTorchAgeBackend(TorchAgeBackend):
+    """Linear 계층을 동적 int8 양자화한 PyTorch 백엔드"""
+    name = "torch_int8"
+    
+    def __init__(self, model):
+        import torch
+        
+        quantized = torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+        super().__init__(quantized)
+
+class OnnxAgeBackend(AgeModelBackend):
+    """export_age_model.py로 내보낸 ONNX 그래프를 ONNX Runtime(CPU)으로 실행하는 백엔드"""
+    name = "onnx"
+    
+    def __init__(self, onnx_path: str, num_threads: int = 0):
+        import onnxruntime as ort
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.onnx_path = onnx_path
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+    
+    def after_fork(self, num_threads: int) -> AgeModelBackend:
+        # ONNX Runtime 세션의 스레드 풀은 fork 후 복제되지 않으므로 워커에서 세션을 다시 생성
+        return OnnxAgeBackend(self.onnx_path, num_threads=num_threads)
+    
+    def predict(self, pixel_values: np.ndarray) -> np.ndarray:
+        logits = self.session.run(None, {self.input_name: pixel_values})[0]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+class SharedFrameRing:
+    """공유 메모리 위의 고정 크기 RGB 프레임 슬롯 (slots x size x size x 3 uint8)
+    
+    생성한 프로세스가 소유(해제)하며, 다른 프로세스는 이름으로 붙어서 같은 메모리를 NumPy 뷰로 복사 없이 읽습니다.
+    """
+    
+    def __init__(self, slots: int, size: int, name: Optional[str] = None):
+        self.slots = slots
+        self.size = size
+        self.owner = name is None
+        nbytes = slots * size * size * 3
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        else:
+            # spawn된 워커는 부모와 같은 resource_tracker를 사용하므로 해제는 소유 프로세스의 unlink에서만 일어남
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.frames = np.ndarray((slots, size, size, 3), dtype=np.uint8, buffer=self.shm.buf)
+    
+    @property
+    def name(self) -> str:
+        return self.shm.name
+    
+    def close(self):
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def parse_cpu_list(cpus: str) -> List[int]:
+    """"2,3" 또는 "4-7" 형식의 CPU 목록"""
+    result = []
+    for part in filter(None, (p.strip() for p in cpus.split(","))):
+        start, _, end = part.partition("-")
+        result.extend(range(int(start), int(end or start) + 1))
+    return result
+
+def run_age_inference_worker(ring_name: str, slots: int, size: int, task_queue, result_queue,
+                             cpus: List[int], num_threads: int):
+    """연령대 추론 워커 프로세스 본체 (모델 로드 후 슬롯 번호 목록을 받아 클래스별 확률 반환)"""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    num_threads = num_threads or len(cpus)
+    if num_threads > 0:
+        cv2.setNumThreads(num_threads)
+        try:
+            import torch
+            
+            torch.set_num_threads(num_threads)
+        except ImportError:
+            pass
+    
+    backend, input_spec = load_age_model()
+    if backend is None:
+        result_queue.put(("failed", "연령대 모델 로드 실패"))
+        return
+    
+    ring = SharedFrameRing(slots, size, name=ring_name)
+    result_queue.put(("ready", backend.name, input_spec))
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            request_id, slot_ids = task
+            try:
+                probs = backend.predict(prepare_age_inputs([ring.frames[slot] for slot in slot_ids], input_spec))
+                result_queue.put(("result", request_id, probs, None))
+            except Exception as e:
+                result_queue.put(("result", request_id, None, str(e)))
+    finally:
+        ring.close()
+
+class ProcessAgeBackend(AgeModelBackend):
+    """별도 워커 프로세스에서 연령대 모델을 실행하는 백엔드
+    
+    얼굴 crop은 공유 메모리 링 슬롯에 바로 리사이즈해 쓰고 큐로는 슬롯 번호만 보내며, 결과(클래스별 확률)는
+    결과 큐로 받습니다. torch 추론과 GIL 경합이 API 프로세스 밖에서 일어나고, 워커를 지정한 CPU에 고정할 수 있습니다.
+    감독 스레드가 결과를 전달하고, 워커가 비정상 종료하면 진행 중인 요청을 실패 처리한 뒤 다시 시작합니다.
+    """
+    name = "process"
+    
+    def __init__(self, slots: int = AGE_WORKER_SLOTS, size: int = AGE_WORKER_INPUT_SIZE, cpus: str = AGE_WORKER_CPUS,
+                 num_threads: int = AGE_WORKER_THREADS, timeout: float = AGE_WORKER_TIMEOUT,
+                 start_timeout: float = AGE_WORKER_START_TIMEOUT):
+        self.context = multiprocessing.get_context("spawn")
+        self.ring = SharedFrameRing(slots, size)
+        self.cpus = parse_cpu_list(cpus)
+        self.num_threads = num_threads
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.free_slots = deque(range(slots))
+        self.slot_available = threading.Condition()
+        self.pending: Dict[int, Future] = {}
+        self.request_ids = itertools.count()
+        self.ready = threading.Event()
+        self.restart_failures = 0
+        self.closed = False
+        self.worker_backend = None
+        self.input_spec = None
+        
+        self.start_worker()
+        try:
+            self.wait_ready(start_timeout)
+        except Exception:
+            self.close()
+            raise
+        self.supervisor = threading.Thread(target=self.supervise, name="age-worker-supervisor", daemon=True)
+        self.supervisor.start()
+    
+    def start_worker(self):
+        """새 큐와 함께 워커 프로세스 시작 (종료된 워커가 잡고 있던 큐 잠금은 재사용하지 않음)"""
+        self.ready.clear()
+        self.task_queue = self.context.Queue()
+        self.result_queue = self.context.Queue()
+        self.process = self.context.Process(
+            target=run_age_inference_worker,
+            args=(self.ring.name, self.ring.slots, self.ring.size, self.task_queue, self.result_queue,
+                  self.cpus, self.num_threads),
+            name="age-inference-worker",
+            daemon=True
+        )
+        self.process.start()
+    
+    def wait_ready(self, timeout: float):
+        """최초 모델 로딩 완료 대기 (워커가 먼저 종료되면 바로 실패)"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                message = self.result_queue.get(timeout=0.5)
+                break
+            except queue.Empty:
+                if not self.process.is_alive():
+                    raise RuntimeError(f"연령대 추론 워커 시작 실패 (exitcode={self.process.exitcode})")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"연령대 추론 워커가 {timeout:.0f}초 안에 준비되지 않았습니다")
+        self.handle_message(message)
+        if not self.ready.is_set():
+            raise RuntimeError(message[1])
+    
+    def handle_message(self, message: tuple):
+        if message[0] == "ready":
+            _, self.worker_backend, self.input_spec = message
+            self.restart_failures = 0
+            self.ready.set()
+        elif message[0] == "result":
+            _, request_id, probs, error = message
+            future = self.pending.pop(request_id, None)
+            if future is None or future.done():
+                return
+            if error is None:
+                future.set_result(probs)
+            else:
+                future.set_exception(RuntimeError(error))
+        elif message[0] == "failed":
+            logger.error(f"연령대 추론 워커 오류: {message[1]}")
+    
+    def supervise(self):
+        """결과 전달 및 워커 감시 (비정상 종료 시 진행 중 요청 실패 처리 후 재시작)"""
+        while not self.closed:
+            try:
+                message = self.result_queue.get(timeout=0.5)
+            except queue.Empty:
+                if not self.closed and not self.process.is_alive():
+                    self.restart_worker()
+                continue
+            except (EOFError, OSError):
+                if not self.closed:
+                    self.restart_worker()
+                continue
+            self.handle_message(message)
+    
+    def restart_worker(self):
+        logger.error(f"연령대 추론 워커 종료 감지 (exitcode={self.process.exitcode}), 다시 시작합니다")
+        AGE_WORKER_RESTARTS.inc()
+        self.fail_pending(RuntimeError("연령대 추론 워커 프로세스가 종료되었습니다"))
+        # 준비되기 전에 반복 종료되면 재시작 간격을 늘림 (최대 30초)
+        if not self.ready.is_set():
+            self.restart_failures += 1
+            time.sleep(min(30.0, 2 ** self.restart_failures))
+        self.start_worker()
+    
+    def fail_pending(self, error: Exception):
+        for request_id in list(self.pending):
+            future = self.pending.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_exception(error)
+    
+    def acquire_slots(self, count: int) -> List[int]:
+        with self.slot_available:
+            if not self.slot_available.wait_for(lambda: len(self.free_slots) >= count, self.timeout):
+                raise TimeoutError("연령대 추론 슬롯 대기 시간 초과")
+            return [self.free_slots.popleft() for _ in range(count)]
+    
+    def release_slots(self, slot_ids: List[int]):
+        with self.slot_available:
+            self.free_slots.extend(slot_ids)
+            self.slot_available.notify_all()
+    
+    def predict_faces(self, face_images: List[np.ndarray], input_spec: tuple) -> np.ndarray:
+        """얼굴 crop을 링 슬롯에 리사이즈해 쓰고 워커 결과를 기다림 (슬롯 수보다 많으면 나눠서 요청)"""
+        if len(face_images) > self.ring.slots:
+            return np.concatenate([
+                self.predict_faces(face_images[i:i + self.ring.slots], input_spec)
+                for i in range(0, len(face_images), self.ring.slots)
+            ])
+        
+        size = self.ring.size
+        slot_ids = self.acquire_slots(len(face_images))
+        request_id = next(self.request_ids)
+        try:
+            for slot, face in zip(slot_ids, face_images):
+                interpolation = cv2.INTER_AREA if min(face.shape[:2]) > size else cv2.INTER_LINEAR
+                cv2.resize(face, (size, size), dst=self.ring.frames[slot], interpolation=interpolation)
+            
+            future = Future()
+            self.pending[request_id] = future
+            self.task_queue.put((request_id, slot_ids))
+            return future.result(timeout=self.timeout)
+        finally:
+            self.pending.pop(request_id, None)
+            self.release_slots(slot_ids)
+    
+    def predict(self, pixel_values: np.ndarray) -> np.ndarray:
+        raise NotImplementedError("워커 프로세스 백엔드는 predict_faces로 얼굴 crop을 전달합니다")
+    
+    def before_fork(self):
+        # 서버 워커마다 자체 추론 워커를 만들고 부모는 요청을 처리하지 않으므로 부모의 추론 워커와 공유 메모리는 종료
+        self.close()
+    
+    def after_fork(self, num_threads: int) -> AgeModelBackend:
+        # 워커 프로세스와 감독 스레드는 부모 프로세스 소유이므로 fork된 서버 워커마다 별도 추론 워커 사용
+        return ProcessAgeBackend(self.ring.slots, self.ring.size, AGE_WORKER_CPUS, self.num_threads, self.timeout,
+                                 self.start_timeout)
+    
+    def close(self):
+        """워커 종료 후 공유 메모리 해제"""
+        self.closed = True
+        if self.process.is_alive():
+            self.task_queue.put(None)
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.fail_pending(RuntimeError("연령대 추론 워커가 종료되었습니다"))
+        self.ring.close()
+
+def export_age_model_onnx(model, onnx_path: str, input_size: int = 224, opset: int = 17) -> str:
+    """eager ViT 모델을 배치 크기가 가변인 ONNX 그래프로 내보내기"""
+    import torch
+    
+    class LogitsOnly(torch.nn.Module):
+        def __init__(self, wrapped):
+            super().__init__()
+            self.wrapped = wrapped
+        
+        def forward(self, pixel_values):
+            return self.wrapped(pixel_values=pixel_values).logits
+    
+    dummy = torch.zeros(1, 3, input_size, input_size, dtype=torch.float32)
+    with torch.no_grad():
+        torch.onnx.export(
+            LogitsOnly(model.eval()),
+            (dummy,),
+            onnx_path,
+            input_names=["pixel_values"],
+            output_names=["logits"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+            opset_version=opset
+        )
+    return onnx_path
+
+def verify_age_backend(candidate: AgeModelBackend, reference: AgeModelBackend, samples: np.ndarray,
+                       batch_size: int = 16) -> Dict:
+    """후보 백엔드의 top-1 클래스가 기준(eager torch) 모델과 일치하는지 검증"""
+    reference_probs = np.concatenate([reference.predict(samples[i:i + batch_size])
+                                      for i in range(0, len(samples), batch_size)])
+    candidate_probs = np.concatenate([candidate.predict(samples[i:i + batch_size])
+                                      for i in range(0, len(samples), batch_size)])
+    
+    matches = reference_probs.argmax(1) == candidate_probs.argmax(1)
+    return {
+        "backend": candidate.name,
+        "samples": int(len(samples)),
+        "top1_agreement": float(matches.mean()) if len(samples) else 0.0,
+        "mismatches": [int(i) for i in np.flatnonzero(~matches)],
+        "max_prob_diff": float(np.abs(reference_probs - candidate_probs).max()) if len(samples) else 0.0
+    }
+
+def memory_map_weights(model, weights_path: str):
+    """모델 가중치를 파일 매핑(mmap) 텐서로 교체
+    
+    가중치가 익명 메모리가 아니라 페이지 캐시에 올라가므로 fork된 워커나 별도 프로세스가 한 벌을 공유합니다.
+    가중치 파일이 없으면 현재 state_dict로 한 번 생성합니다.
+    """
+    import torch
+    
+    if not os.path.exists(weights_path):
+        os.makedirs(os.path.dirname(weights_path), exist_ok=True)
+        temp_path = f"{weights_path}.{os.getpid()}.tmp"
+        torch.save(model.state_dict(), temp_path)
+        os.replace(temp_path, weights_path)
+    
+    state_dict = torch.load(weights_path, mmap=True, weights_only=True)
+    model.load_state_dict(state_dict, assign=True)
+    return model
+
+def load_age_model(backend_name: str = AGE_MODEL_BACKEND) -> tuple:
+    """ViT 연령대 모델을 현재 프로세스에 로드 - (추론 백엔드, 입력 설정), 실패 시 (None, None)"""
+    try:
+        from transformers import ViTFeatureExtractor, ViTForImageClassification
+        
+        transforms = ViTFeatureExtractor.from_pretrained(AGE_MODEL_NAME)
+    except Exception as e:
+        logger.error(f"나이 분석 모델 로드 실패: {e}")
+        return None, None
+    
+    backend = None
+    if backend_name == "onnx":
+        try:
+            backend = OnnxAgeBackend(AGE_ONNX_PATH, num_threads=AGE_ONNX_THREADS)
+        except Exception as e:
+            logger.warning(f"ONNX 연령대 백엔드 로드 실패, torch 백엔드로 대체: {e}")
+    
+    if backend is None:
+        try:
+            model = ViTForImageClassification.from_pretrained(AGE_MODEL_NAME)
+            if AGE_MODEL_MMAP and backend_name == "torch":
+                model = memory_map_weights(model, AGE_MMAP_PATH)
+            if backend_name == "torch_int8":
+                backend = QuantizedTorchAgeBackend(model)
+            else:
+                backend = TorchAgeBackend(model)
+        except Exception as e:
+            logger.error(f"나이 분석 모델 로드 실패: {e}")
+            return None, None
+    
+    logger.info(f"✨ 연령대 모델 백엔드: {backend.name}")
+    return backend, get_age_input_spec(transforms)
+
+def face_confidence(x: int, y: int, w: int, h: int, image_shape: tuple, box_scale: float = 1.0) -> float:
+    """얼굴 크기와 위치에 따른 신뢰도 계산 (0.0 ~ 1.0)
+    
+    면적 비율 기준은 Haar cascade bbox에 맞춰져 있으므로 box_scale로 검출기 bbox를 Haar 크기로 환산합니다.
+    """
+    image_area = image_shape[0] * image_shape[1]
+    face_area = w * h * box_scale ** 2
+    area_ratio = face_area / image_area
+    
+    # 신뢰도 점수 계산 (0.0 ~ 1.0)
+    confidence = min(1.0, area_ratio * 5) if 0.05 <= area_ratio <= 0.6 else 0.0
+    
+    # 중앙에 가까울수록 높은 신뢰도
+    center_x = x + w/2
+    center_y = y + h/2
+    image_center_x = image_shape[1]/2
+    image_center_y = image_shape[0]/2
+    
+    distance_from_center = math.sqrt(
+        ((center_x - image_center_x) / image_shape[1]) ** 2 +
+        ((center_y - image_center_y) / image_shape[0]) ** 2
+    )
+    
+    # 중앙 거리에 따른 신뢰도 조정
+    confidence *= max(0.5, 1 - distance_from_center)
+    return float(confidence)
+
+class FaceDetector:
+    """얼굴 검출기 인터페이스: 이미지에서 (x, y, w, h, score) 목록을 반환
+    
+    OpenCV 분류기와 TFLite 인터프리터는 스레드 간 공유가 안전하지 않으므로
+    실제 모델 핸들은 스레드별로 생성합니다.
+    """
+    name = "base"
+    color_input = False  # True면 RGB 입력 필요, False면 그레이스케일로 충분
+    box_scale = 1.0  # Haar bbox 대비 변 길이 환산 배율 (face_confidence 면적 게이트용)
+    
+    def __init__(self):
+        self._local = threading.local()
+    
+    def _get_model(self):
+        model = getattr(self._local, "model", None)
+        if model is None:
+            model = self._local.model = self._load_model()
+        return model
+    
+    def _load_model(self):
+        raise NotImplementedError
+    
+    def detect(self, image: np.ndarray, min_size: tuple = (30, 30)) -> List[tuple]:
+        raise NotImplementedError
+
+class HaarFaceDetector(FaceDetector):
+    """OpenCV Haar cascade 다중 스케일 검출기
+    
+    점수는 마지막 단계 가중치 합(levelWeights)을 1 - exp(-weight / WEIGHT_SCALE)로 0~1에 대응시킨 값입니다.
+    """
+    name = "haar"
+    WEIGHT_SCALE = 2.0  # 실제 얼굴의 가중치 합은 대략 4~8 (점수 0.86~0.98)
+    
+    def __init__(self, cascade_path: Optional[str] = None, scale_factor: float = 1.1, min_neighbors: int = 5):
+        super().__init__()
+        self.cascade_path = cascade_path or os.path.join(
+            os.path.dirname(cv2.__file__), 'data', 'haarcascade_frontalface_default.xml'
+        )
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self._get_model()  # 경로 오류를 초기화 시점에 확인
+    
+    def _load_model(self):
+        cascade = cv2.CascadeClassifier(self.cascade_path)
+        if cascade.empty():
+            raise ValueError("얼굴 검출 모델을 로드할 수 없습니다.")
+        return cascade
+    
+    def detect(self, image: np.ndarray, min_size: tuple = (30, 30), max_size: tuple = (0, 0)) -> List[tuple]:
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        faces, _, weights = self._get_model().detectMultiScale3(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=min_size,
+            maxSize=max_size,
+            flags=cv2.CASCADE_SCALE_IMAGE,
+            outputRejectLevels=True
+        )
+        return [
+            (int(x), int(y), int(w), int(h), float(1.0 - math.exp(-max(0.0, weight) / self.WEIGHT_SCALE)))
+            for (x, y, w, h), weight in zip(faces, np.ravel(weights))
+        ]
+
+class BlazeFaceDetector(FaceDetector):
+    """BlazeFace short-range 단일 스케일(128x128) 검출기 (TFLite 또는 ONNX Runtime, CPU)"""
+    name = "blazeface"
+    color_input = True
+    INPUT_SIZE = 128
+    
+    def __init__(self, model_path: str = BLAZEFACE_MODEL_PATH, score_threshold: float = BLAZEFACE_SCORE_THRESHOLD,
+                 iou_threshold: float = 0.3, box_scale: float = BLAZEFACE_BOX_SCALE):
+        super().__init__()
+        self.model_path = model_path
+        self.box_scale = box_scale
+        self.score_threshold = score_threshold
+        self.iou_threshold = iou_threshold
+        self.anchors = self.generate_anchors()
+        self._get_model()
+    
+    @classmethod
+    def generate_anchors(cls) -> np.ndarray:
+        """short-range 모델 앵커 (stride 8: 셀당 2개, stride 16: 셀당 6개, 총 896개) 중심 좌표"""
+        anchors = []
+        for stride, per_cell in ((8, 2), (16, 6)):
+            grid = cls.INPUT_SIZE // stride
+            ys, xs = np.meshgrid(np.arange(grid), np.arange(grid), indexing="ij")
+            centers = np.stack([(xs.ravel() + 0.5) / grid, (ys.ravel() + 0.5) / grid], axis=1)
+            anchors.append(np.repeat(centers, per_cell, axis=0))
+        return np.concatenate(anchors).astype(np.float32)
+    
+    def _load_model(self):
+        if self.model_path.endswith(".onnx"):
+            import onnxruntime as ort
+            
+            session = ort.InferenceSession(self.model_path, providers=["CPUExecutionProvider"])
+            input_name = session.get_inputs()[0].name
+            return lambda tensor: session.run(None, {input_name: tensor})
+        
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                from tensorflow.lite import Interpreter
+        
+        interpreter = Interpreter(model_path=self.model_path, num_threads=1)
+        interpreter.allocate_tensors()
+        input_index = interpreter.get_input_details()[0]["index"]
+        output_indices = [detail["index"] for detail in interpreter.get_output_details()]
+        
+        def run(tensor):
+            interpreter.set_tensor(input_index, tensor)
+            interpreter.invoke()
+            return [interpreter.get_tensor(index) for index in output_indices]
+        return run
+    
+    def detect(self, image: np.ndarray, min_size: tuple = (30, 30)) -> List[tuple]:
+        rgb = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB) if image.ndim == 2 else image
+        height, width = rgb.shape[:2]
+        
+        # 비율을 유지한 채 128x128에 맞추고 남는 영역은 패딩 (letterbox)
+        side = max(height, width)
+        scale = self.INPUT_SIZE / side
+        resized = cv2.resize(rgb, (max(1, round(width * scale)), max(1, round(height * scale))),
+                             interpolation=cv2.INTER_AREA)
+        tensor = np.zeros((1, self.INPUT_SIZE, self.INPUT_SIZE, 3), dtype=np.float32)
+        tensor[0, :resized.shape[0], :resized.shape[1]] = resized
+        tensor *= 2.0 / 255.0
+        tensor -= 1.0
+        
+        outputs = self._get_model()(tensor)
+        regressors = next(o for o in outputs if o.shape[-1] == 16)[0]
+        scores = next(o for o in outputs if o.shape[-1] == 1)[0, :, 0].astype(np.float64)
+        scores = 1.0 / (1.0 + np.exp(-np.clip(scores, -100, 100)))
+        
+        candidates = np.flatnonzero(scores >= self.score_threshold)
+        if len(candidates) == 0:
+            return []
+        
+        # 앵커 기준 상대 좌표를 원본 픽셀 좌표로 변환
+        raw = regressors[candidates, :4] / self.INPUT_SIZE
+        centers = raw[:, :2] + self.anchors[candidates]
+        sizes = raw[:, 2:4]
+        boxes = np.concatenate([centers - sizes / 2, sizes], axis=1) * side
+        
+        keep = cv2.dnn.NMSBoxes(boxes.tolist(), scores[candidates].tolist(),
+                                self.score_threshold, self.iou_threshold)
+        faces = []
+        for i in np.array(keep).reshape(-1):
+            x, y, w, h = boxes[i]
+            x0, y0 = max(0, int(round(x))), max(0, int(round(y)))
+            x1, y1 = min(width, int(round(x + w))), min(height, int(round(y + h)))
+            if x1 - x0 >= min_size[0] and y1 - y0 >= min_size[1]:
+                faces.append((x0, y0, x1 - x0, y1 - y0, float(scores[candidates[i]])))
+        return faces
+
+def create_face_detector(name: str = FACE_DETECTOR) -> FaceDetector:
+    """설정된 얼굴 검출기 생성 (BlazeFace 런타임이 없으면 Haar로 대체)"""
+    if name == "blazeface":
+        try:
+            return BlazeFaceDetector()
+        except Exception as e:
+            logger.warning(f"BlazeFace 검출기 로드 실패, Haar cascade로 대체: {e}")
+    return HaarFaceDetector()
+
+class AgeInferenceBatcher:
+    """동시 요청의 얼굴 이미지를 짧은 시간 모아 한 번의 배치로 추론하는 큐"""
+    
+    def __init__(self, analyzer: "ModernSkinAnalyzer", window_ms: float = AGE_BATCH_WINDOW_MS,
+                 max_batch_size: int = AGE_BATCH_MAX_SIZE):
+        self.analyzer = analyzer
+        self.window = max(0.0, window_ms) / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker_task: Optional[asyncio.Task] = None
+    
+    def submit(self, face_image: np.ndarray) -> asyncio.Future:
+        """얼굴 이미지를 큐에 넣고 (연령대, 신뢰도) 결과를 받을 future 반환"""
+        loop = asyncio.get_running_loop()
+        if self.worker_task is None or self.worker_task.done():
+            self.queue = asyncio.Queue()
+            self.worker_task = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        self.queue.put_nowait((face_image, future))
+        return future
+    
+    async def _collect_batch(self) -> List[tuple]:
+        """첫 요청 도착 후 배치 창 동안 추가 요청을 모음"""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.window
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    batch.append(self.queue.get_nowait())
+                else:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+        return batch
+    
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            faces = [face for face, _ in batch]
+            
+            try:
+                with track_stage("age_batch_inference"):
+                    results = await self.analyzer.run_torch(self.analyzer.analyze_age_batch_2025, faces)
+            except Exception as e:
+                logger.error(f"연령대 배치 추론 오류: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+    
+    async def close(self):
+        """배치 작업 종료"""
+        if self.worker_task is not None:
+            self.worker_task.cancel()
+            try:
+                await self.worker_task
+            except asyncio.CancelledError:
+                pass
+            self.worker_task = None
+
+class AnalysisResultCache:
+    """이미지 해시 기반 분석 결과 캐시 (LRU + TTL, 진행 중인 동일 요청 병합)"""
+    
+    def __init__(self, max_size: int = ANALYSIS_CACHE_SIZE, ttl: float = ANALYSIS_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expirations": 0}
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+    
+    def make_key(self, image: np.ndarray) -> str:
+        """이미지 캐시 키 생성 (픽셀과 크기의 128비트 해시)
+        
+        썸네일 지각 해시(dHash 등)는 다른 사용자의 비슷한 셀카가 같은 키가 되어 남의 결과를 받을 수 있으므로 쓰지 않습니다.
+        """
+        digest = hashlib.blake2b(np.ascontiguousarray(image).data, digest_size=16)
+        digest.update(str(image.shape).encode())
+        return f"c:{digest.hexdigest()}"
+    
+    def get(self, key: str):
+        """캐시 조회 (만료된 항목은 제거)"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            self.stats["expirations"] += 1
+            return None
+        
+        self.entries.move_to_end(key)
+        return result
+    
+    def put(self, key: str, result) -> None:
+        """캐시 저장 (용량 초과 시 가장 오래 사용하지 않은 항목 제거)"""
+        self.entries[key] = (time.monotonic() + self.ttl, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+    
+    async def get_or_compute(self, key: str, compute, cacheable=None, coalesce: bool = True):
+        """캐시된 결과 반환, 없으면 계산 (같은 키로 진행 중인 계산이 있으면 그 결과를 대기)
+        
+        cacheable(결과)가 False이면 진행 중인 요청에는 공유하되 저장하지 않습니다.
+        coalesce가 False이면 진행 중인 계산을 기다리지도, 다른 요청에 공유하지도 않고 직접 계산합니다.
+        """
+        result = self.get(key)
+        if result is not None:
+            self.stats["hits"] += 1
+            return result
+        
+        if not coalesce:
+            self.stats["misses"] += 1
+            result = await compute()
+            if cacheable is None or cacheable(result):
+                self.put(key, result)
+            return result
+        
+        task = self.in_flight.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            task = asyncio.ensure_future(self._compute(key, compute, cacheable))
+            self.in_flight[key] = task
+        else:
+            self.stats["coalesced"] += 1
+        
+        # 한 요청이 취소되어도 다른 대기 요청을 위해 계산은 계속 진행
+        return await asyncio.shield(task)
+    
+    async def _compute(self, key: str, compute, cacheable=None):
+        try:
+            result = await compute()
+            if cacheable is None or cacheable(result):
+                self.put(key, result)
+            return result
+        finally:
+            self.in_flight.pop(key, None)
+    
+    def get_stats(self) -> Dict:
+        """캐시 통계 (크기 조정용)"""
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "in_flight": len(self.in_flight),
+            "ttl_seconds": self.ttl,
+            "hit_rate": (self.stats["hits"] + self.stats["coalesced"]) / lookups if lookups else 0.0
+        }
+
+class CircuitBreaker:
+    """연속 실패 횟수 기준 서킷 브레이커 (차단 해제는 백그라운드 프로브 성공 시에만)"""
+    
+    def __init__(self, failure_threshold: int = HF_BREAKER_FAILURES):
+        self.failure_threshold = failure_threshold
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+    
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+    
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+    
+    def record_failure(self) -> bool:
+        """실패 기록 - 이번 실패로 차단 상태가 되었으면 True"""
+        self.consecutive_failures += 1
+        if self.opened_at is None and self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+class RemoteInferenceClient:
+    """Hugging Face Inference API 클라이언트
+    
+    - 시도별 짧은 타임아웃과 요청 전체 기한 안에서만 재시도 (503 모델 로딩/429/5xx/타임아웃/네트워크 오류)
+    - 동시 호출 상한을 넘으면 기다리지 않고 즉시 실패를 반환해 로컬 백업 경로로 넘김
+    - 헤징: 첫 시도가 지연되면 두 번째 요청을 보내 먼저 성공한 응답 사용
+    - 모델별 서킷 브레이커: 연속 실패 시 원격 호출을 생략하고, 백그라운드 프로브가 성공하면 다시 사용
+    """
+    RETRYABLE_ERRORS = ("model_loading", "rate_limited", "server_error", "timeout", "network_error")
+    PROBE_IMAGE_SIZE = 32
+    
+    def __init__(self, base_url: str, models: Dict[str, str], token: str = HF_API_TOKEN,
+                 attempt_timeout: float = HF_ATTEMPT_TIMEOUT, deadline: float = HF_REQUEST_DEADLINE,
+                 max_attempts: int = HF_MAX_ATTEMPTS, max_concurrency: int = HF_MAX_CONCURRENCY,
+                 hedge_delay_ms: float = HF_HEDGE_DELAY_MS, breaker_failures: int = HF_BREAKER_FAILURES,
+                 probe_interval: float = HF_BREAKER_PROBE_INTERVAL, enabled: bool = REMOTE_INFERENCE):
+        self.base_url = base_url.rstrip("/")
+        self.enabled = enabled
+        self.models = models
+        self.token = token
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.max_attempts = max(1, max_attempts)
+        self.max_concurrency = max(1, max_concurrency)
+        self.hedge_delay = hedge_delay_ms / 1000
+        self.probe_interval = probe_interval
+        self.breakers = {model_name: CircuitBreaker(breaker_failures) for model_name in models}
+        self.probe_tasks: Dict[str, asyncio.Task] = {}
+        self.active_requests = 0
+        self.session = None
+    
+    async def get_session(self):
+        """비동기 HTTP 세션 (최초 호출 시 생성)"""
+        if self.session is None:
+            import aiohttp
+            
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+            headers = {"User-Agent": "SkinAnalyzer-2025/3.0"}
+            if self.token:
+                headers["Authorization"] = f"Bearer {self.token}"
+            self.session = aiohttp.ClientSession(connector=connector, headers=headers)
+        return self.session
+    
+    async def close(self):
+        """프로브 작업과 세션 종료"""
+        for task in self.probe_tasks.values():
+            task.cancel()
+        self.probe_tasks.clear()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+    
+    def is_available(self, model_name: str) -> bool:
+        """원격 호출이 켜져 있고 서킷 브레이커가 닫혀 있어 호출이 가능한지 여부"""
+        return self.enabled and not self.breakers[model_name].is_open
+    
+    async def infer(self, model_name: str, image_bytes: bytes) -> Dict:
+        """원격 추론 요청 - 실패 시 {"success": False, "error": 유형, "message": 설명} 반환 (예외 없음)"""
+        breaker = self.breakers[model_name]
+        if breaker.is_open:
+            return {
+                "success": False,
+                "error": "circuit_open",
+                "message": "원격 AI 서비스 장애로 로컬 분석을 사용합니다."
+            }
+        
+        url = f"{self.base_url}/{self.models[model_name]}"
+        deadline = time.monotonic() + self.deadline
+        result = None
+        
+        for attempt in range(self.max_attempts):
+            if attempt > 0:
+                # 짧은 백오프 후 재시도 (남은 기한 안에서만)
+                await asyncio.sleep(min(0.1 * attempt, max(0.0, deadline - time.monotonic())))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            
+            attempt_result = await self.hedged_attempt(model_name, url, image_bytes, min(self.attempt_timeout, remaining))
+            if not attempt_result["success"] and attempt_result["error"] == "saturated":
+                # 동시 호출 상한 초과 - 대기하지 않고 로컬 경로 사용 (브레이커 실패로 세지 않음)
+                return result or attempt_result
+            result = attempt_result
+            if result["success"] or result["error"] not in self.RETRYABLE_ERRORS:
+                break
+        
+        if result is None:
+            result = {"success": False, "error": "timeout", "message": "AI 분석 시간 초과. 다시 시도해주세요."}
+        
+        if result["success"]:
+            breaker.record_success()
+        elif breaker.record_failure():
+            logger.warning(f"⚠️ {model_name} 원격 호출 {breaker.consecutive_failures}회 연속 실패 - 서킷 브레이커 차단")
+            REMOTE_CIRCUIT_OPEN.labels(model_name).set(1)
+            self.start_probe(model_name)
+        return result
+    
+    async def hedged_attempt(self, model_name: str, url: str, image_bytes: bytes, timeout: float) -> Dict:
+        """시도 1회 - 헤징이 켜져 있으면 지연 시 두 번째 요청을 보내 먼저 성공한 결과 사용"""
+        primary = self.launch_attempt(model_name, url, image_bytes, timeout)
+        if primary is None:
+            return {
+                "success": False,
+                "error": "saturated",
+                "message": "원격 AI 호출이 많아 로컬 분석을 사용합니다."
+            }
+        hedge = None
+        try:
+            if self.hedge_delay <= 0 or self.hedge_delay >= timeout:
+                return await primary
+            
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay)
+            hedge = None if done else self.launch_attempt(model_name, url, image_bytes, timeout - self.hedge_delay)
+            if hedge is None:
+                return await primary
+            
+            REMOTE_HEDGES.labels(model_name).inc()
+            pending = {primary, hedge}
+            result = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result["success"]:
+                        return result
+            return result
+        finally:
+            # 먼저 성공한 결과를 반환했거나 호출자가 취소되면 남은 시도를 취소해 동시 호출 슬롯 반환
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    def launch_attempt(self, model_name: str, url: str, image_bytes: bytes, timeout: float) -> Optional[asyncio.Future]:
+        """동시 호출 상한 안에서 시도 시작 (상한에 도달했으면 None - 기다리지 않음)"""
+        if self.active_requests >= self.max_concurrency:
+            return None
+        self.active_requests += 1
+        task = asyncio.ensure_future(self.attempt(model_name, url, image_bytes, timeout))
+        task.add_done_callback(self._release_slot)
+        return task
+    
+    def _release_slot(self, _task):
+        self.active_requests -= 1
+    
+    async def attempt(self, model_name: str, url: str, image_bytes: bytes, timeout: float) -> Dict:
+        """HTTP 요청 1회 (시도별 타임아웃 적용, 오류 유형 분류)"""
+        import aiohttp
+        
+        session = await self.get_session()
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "X-Request-ID": f"skin-analyzer-{int(time.time())}",
+        }
+        
+        try:
+            async with session.post(url, headers=headers, data=image_bytes,
+                                    timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status == 200:
+                    result = {"success": True, "data": await response.json()}
+                elif response.status == 503:
+                    result = {
+                        "success": False,
+                        "error": "model_loading",
+                        "message": "AI 모델 로딩 중입니다. 30초 후 다시 시도하세요."
+                    }
+                elif response.status == 429:
+                    result = {
+                        "success": False,
+                        "error": "rate_limited",
+                        "message": "AI API 요청 한도를 초과했습니다."
+                    }
+                else:
+                    error_text = await response.text()
+                    result = {
+                        "success": False,
+                        "error": "server_error" if response.status >= 500 else "api_error",
+                        "message": f"API 오류: {error_text[:100]}"
+                    }
+        
+        except asyncio.TimeoutError:
+            result = {
+                "success": False,
+                "error": "timeout",
+                "message": "AI 분석 시간 초과. 다시 시도해주세요."
+            }
+        except Exception as e:
+            logger.error(f"HF API 호출 오류: {e}")
+            result = {
+                "success": False,
+                "error": "network_error",
+                "message": f"네트워크 오류: {str(e)}"
+            }
+        
+        REMOTE_ATTEMPTS.labels(model_name, "success" if result["success"] else result["error"]).inc()
+        return result
+    
+    def start_probe(self, model_name: str):
+        """차단된 모델의 복구 확인 작업 시작"""
+        task = self.probe_tasks.get(model_name)
+        if task is None or task.done():
+            self.probe_tasks[model_name] = asyncio.create_task(self.probe(model_name))
+    
+    async def probe(self, model_name: str):
+        """차단 중 주기적으로 작은 이미지를 보내 서비스 복구 확인 (사용자 요청은 기다리지 않음)"""
+        url = f"{self.base_url}/{self.models[model_name]}"
+        size = self.PROBE_IMAGE_SIZE
+        probe_image = cv2.imencode(".jpg", np.full((size, size, 3), 128, dtype=np.uint8))[1].tobytes()
+        
+        while self.breakers[model_name].is_open:
+            await asyncio.sleep(self.probe_interval)
+            probe = self.launch_attempt(model_name, url, probe_image, self.attempt_timeout)
+            if probe is None:
+                continue
+            result = await probe
+            if result["success"]:
+                self.breakers[model_name].record_success()
+                REMOTE_CIRCUIT_OPEN.labels(model_name).set(0)
+                logger.info(f"✅ {model_name} 원격 서비스 복구 확인 - 서킷 브레이커 해제")
+
+class AdmissionController:
+    """분석 요청 수락 제어 (동시 실행 상한 + 우선순위 대기열 + 대기 시간 SLO 기반 즉시 거부)
+    
+    예상 대기 시간은 앞선 대기 요청과 요청 종류별 처리 시간 EWMA로 계산합니다. SLO를 넘을 요청은 대기열에 넣지 않고
+    429와 Retry-After로 바로 거부하여, 과부하 시에도 수락한 요청은 클라이언트가 포기하기 전에 끝나도록 합니다.
+    얼굴 감지(face_check)는 우선순위가 높아 대기 중인 분석 요청보다 먼저 실행됩니다.
+    """
+    
+    def __init__(self, max_concurrency: int = ADMISSION_MAX_CONCURRENCY, max_queue: int = ADMISSION_MAX_QUEUE,
+                 queue_slo_ms: float = ADMISSION_QUEUE_SLO_MS, ewma_alpha: float = 0.2):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_slo = queue_slo_ms / 1000
+        self.ewma_alpha = ewma_alpha
+        self.service_time = dict(ADMISSION_INITIAL_SERVICE_TIME)
+        self.running = {traffic_class: 0 for traffic_class in ADMISSION_PRIORITIES}
+        self.waiters: List[list] = []  # [우선순위, 도착 순서, 요청 종류, future] 힙
+        self.sequence = itertools.count()
+    
+    @property
+    def active(self) -> int:
+        return sum(self.running.values())
+    
+    def queued_ahead(self, priority: int) -> List[str]:
+        """같거나 높은 우선순위로 대기 중인 요청 종류 목록"""
+        return [waiter[2] for waiter in self.waiters if waiter[0] <= priority]
+    
+    def estimate_wait(self, traffic_class: str) -> float:
+        """대기열에 들어갔을 때의 예상 대기 시간 (초)
+        
+        앞선 대기 요청의 처리 시간 합에 실행 중 요청 하나가 끝날 때까지의 평균 시간을 더해 동시 실행 수로 나눕니다.
+        """
+        ahead = self.queued_ahead(ADMISSION_PRIORITIES[traffic_class])
+        if self.active < self.max_concurrency and not ahead:
+            return 0.0
+        
+        work = sum(self.service_time[waiting_class] for waiting_class in ahead)
+        if self.active >= self.max_concurrency:
+            work += sum(
+                self.service_time[running_class] * count for running_class, count in self.running.items()
+            ) / self.active
+        return work / self.max_concurrency
+    
+    def reject(self, traffic_class: str, reason: str, estimated_wait: float):
+        """429 거부 (Retry-After는 예상 대기 시간 기준, 최소 1초)"""
+        ADMISSION_REJECTED.labels(traffic_class, reason).inc()
+        raise HTTPException(
+            status_code=429,
+            detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(max(1, math.ceil(estimated_wait)))}
+        )
+    
+    async def acquire(self, traffic_class: str):
+        """실행 슬롯 확보 (빈 슬롯이 없으면 우선순위 대기열에서 SLO 안에서만 대기)"""
+        priority = ADMISSION_PRIORITIES[traffic_class]
+        if self.active < self.max_concurrency and not self.queued_ahead(priority):
+            self.running[traffic_class] += 1
+            ADMISSION_QUEUE_WAIT.labels(traffic_class).observe(0.0)
+            return
+        
+        estimated_wait = self.estimate_wait(traffic_class)
+        if len(self.queued_ahead(priority)) >= self.max_queue:
+            self.reject(traffic_class, "queue_full", estimated_wait)
+        if estimated_wait > self.queue_slo:
+            self.reject(traffic_class, "slo", estimated_wait)
+        
+        future = asyncio.get_running_loop().create_future()
+        waiter = [priority, next(self.sequence), traffic_class, future]
+        heapq.heappush(self.waiters, waiter)
+        ADMISSION_QUEUED.labels(traffic_class).inc()
+        start = time.perf_counter()
+        
+        try:
+            # wait_for는 슬롯을 넘겨받은 직후의 취소를 삼키므로 (Python 3.11) future를 취소하지 않는 wait 사용
+            await asyncio.wait((future,), timeout=self.queue_slo)
+        except asyncio.CancelledError:
+            # 클라이언트 연결 종료: 이미 슬롯을 받았다면 반납
+            if future.done():
+                self.release(traffic_class)
+            else:
+                self.remove_waiter(waiter)
+            raise
+        
+        if not future.done():
+            # 추정이 빗나가 SLO를 넘겨 기다린 요청도 실행하지 않고 거부
+            self.remove_waiter(waiter)
+            self.reject(traffic_class, "timeout", self.estimate_wait(traffic_class))
+        ADMISSION_QUEUE_WAIT.labels(traffic_class).observe(time.perf_counter() - start)
+    
+    def remove_waiter(self, waiter: list):
+        self.waiters.remove(waiter)
+        heapq.heapify(self.waiters)
+        ADMISSION_QUEUED.labels(waiter[2]).dec()
+    
+    def release(self, traffic_class: str, service_time: Optional[float] = None):
+        """슬롯 반납 후 우선순위가 가장 높은 대기 요청에 넘김 (처리 시간 EWMA 갱신)"""
+        self.running[traffic_class] -= 1
+        if service_time is not None:
+            previous = self.service_time[traffic_class]
+            self.service_time[traffic_class] = previous + self.ewma_alpha * (service_time - previous)
+        
+        while self.waiters and self.active < self.max_concurrency:
+            _, _, waiting_class, future = heapq.heappop(self.waiters)
+            ADMISSION_QUEUED.labels(waiting_class).dec()
+            self.running[waiting_class] += 1
+            future.set_result(None)
+    
+    @asynccontextmanager
+    async def admit(self, traffic_class: str):
+        """슬롯을 확보한 동안만 블록을 실행 (거부 시 HTTPException 429)"""
+        await self.acquire(traffic_class)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(traffic_class, time.perf_counter() - start)
+    
+    def get_stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": dict(self.running),
+            "queued": len(self.waiters),
+            "service_time_ms": {key: value * 1000 for key, value in self.service_time.items()}
+        }
+
+class AnalysisHistoryStore:
+    """사용자별 분석 기록 저장소 (SQLite, write-behind)
+    
+    요청 처리 경로는 대기열에 넣기만 하고, 전용 스레드가 모인 기록을 한 트랜잭션의 executemany로 저장합니다.
+    대기열이 가득 차면 요청을 지연시키지 않도록 기록을 버립니다. 조회는 (user_id, created_at) 커버링 인덱스를
+    사용하며, 추세는 SQL 집계(구간별 평균/최소/최대, 회귀 합계)로 계산합니다.
+    """
+    METRICS = ("overall_score", "moisture_level", "oil_level", "blemish_count")
+    COLUMNS = (
+        "user_id", "created_at", "overall_score", "moisture_level", "oil_level", "blemish_count",
+        "wrinkle_level", "skin_type", "skin_tone", "age_range", "confidence", "analysis_version"
+    )
+    BUCKET_FORMATS = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m"}
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS analysis_history (
+            id INTEGER PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            overall_score INTEGER NOT NULL,
+            moisture_level INTEGER NOT NULL,
+            oil_level INTEGER NOT NULL,
+            blemish_count INTEGER NOT NULL,
+            wrinkle_level INTEGER NOT NULL,
+            skin_type TEXT,
+            skin_tone TEXT,
+            age_range TEXT,
+            confidence REAL,
+            analysis_version TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_history_user_time
+            ON analysis_history (user_id, created_at, overall_score, moisture_level, oil_level, blemish_count);
+    """
+    
+    def __init__(self, path: str = HISTORY_DB_PATH, batch_size: int = HISTORY_BATCH_SIZE,
+                 flush_interval_ms: float = HISTORY_FLUSH_INTERVAL_MS, max_queue: int = HISTORY_MAX_QUEUE):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000
+        self.queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max(1, max_queue))
+        self.local = threading.local()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(self.SCHEMA)
+        
+        self.writer = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self.writer.start()
+    
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+    
+    def reader(self) -> sqlite3.Connection:
+        """조회용 스레드별 연결 (WAL 모드라 기록 중에도 읽기 가능)"""
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = self.connect()
+            connection.row_factory = sqlite3.Row
+        return connection
+    
+    def record(self, user_id: str, result: "SkinAnalysisResult"):
+        """분석 결과를 기록 대기열에 추가 (대기하지 않음)"""
+        row = (
+            user_id, time.time(), result.overall_score, result.moisture_level, result.oil_level,
+            result.blemish_count, result.wrinkle_level, result.skin_type, result.skin_tone,
+            result.age_range, float(result.confidence), result.analysis_version
+        )
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            HISTORY_WRITES.labels("dropped").inc()
+    
+    def _collect_batch(self) -> tuple:
+        """첫 기록 도착 후 flush 간격 동안 추가 기록을 모음 - (기록 목록, 종료 요청 여부)"""
+        first = self.queue.get()
+        if first is None:
+            return [], True
+        
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                row = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is None:
+                return batch, True
+            batch.append(row)
+        return batch, False
+    
+    def _run(self):
+        connection = self.connect()
+        insert = (
+            f"INSERT INTO analysis_history ({', '.join(self.COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in self.COLUMNS)})"
+        )
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect_batch()
+            if not batch:
+                continue
+            try:
+                with track_stage("history_flush"), connection:
+                    connection.executemany(insert, batch)
+                HISTORY_WRITES.labels("written").inc(len(batch))
+            except Exception as e:
+                logger.error(f"분석 기록 저장 오류: {e}")
+                HISTORY_WRITES.labels("error").inc(len(batch))
+        connection.close()
+    
+    def close(self, timeout: float = 5.0):
+        """남은 기록을 저장한 뒤 기록 스레드 종료"""
+        self.queue.put(None)
+        self.writer.join(timeout)
+    
+    def get_history(self, user_id: str, since: float, limit: int) -> List[Dict]:
+        """기간 내 분석 기록 (최신순)"""
+        rows = self.reader().execute(
+            f"SELECT {', '.join(self.COLUMNS[1:])} FROM analysis_history "
+            "WHERE user_id = ? AND created_at >= ? ORDER BY created_at DESC LIMIT ?",
+            (user_id, since, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def get_trend(self, user_id: str, since: float, bucket: str) -> Dict:
+        """구간별 지표 집계와 일 단위 변화율(최소제곱 기울기)을 SQL 집계로 계산"""
+        connection = self.reader()
+        bucket_format = self.BUCKET_FORMATS[bucket]
+        aggregates = ", ".join(
+            f"AVG({metric}) AS {metric}_avg, MIN({metric}) AS {metric}_min, MAX({metric}) AS {metric}_max"
+            for metric in self.METRICS
+        )
+        rows = connection.execute(
+            f"SELECT strftime(?, created_at, 'unixepoch') AS bucket, COUNT(*) AS count, "
+            f"MIN(created_at) AS started_at, {aggregates} FROM analysis_history "
+            "WHERE user_id = ? AND created_at >= ? GROUP BY bucket ORDER BY started_at",
+            (bucket_format, user_id, since)
+        ).fetchall()
+        
+        # x = 기간 시작부터의 일 수, 기울기 = (nΣxy - ΣxΣy) / (nΣx² - (Σx)²)
+        sums = ", ".join(f"SUM({metric}) AS sum_{metric}, SUM(x * {metric}) AS sum_x_{metric}" for metric in self.METRICS)
+        totals = connection.execute(
+            f"SELECT COUNT(*) AS n, SUM(x) AS sum_x, SUM(x * x) AS sum_xx, {sums} FROM ("
+            "SELECT (created_at - ?) / 86400.0 AS x, overall_score, moisture_level, oil_level, blemish_count "
+            "FROM analysis_history WHERE user_id = ? AND created_at >= ?)",
+            (since, user_id, since)
+        ).fetchone()
+        
+        n = totals["n"]
+        denominator = n * (totals["sum_xx"] or 0) - (totals["sum_x"] or 0) ** 2 if n else 0
+        slopes = {
+            metric: (
+                (n * totals[f"sum_x_{metric}"] - totals["sum_x"] * totals[f"sum_{metric}"]) / denominator
+                if n > 1 and denominator > 1e-9 else 0.0
+            )
+            for metric in self.METRICS
+        }
+        
+        buckets = [
+            {
+                "bucket": row["bucket"],
+                "count": row["count"],
+                **{
+                    metric: {
+                        "avg": round(row[f"{metric}_avg"], 2),
+                        "min": row[f"{metric}_min"],
+                        "max": row[f"{metric}_max"]
+                    }
+                    for metric in self.METRICS
+                }
+            }
+            for row in rows
+        ]
+        return {
+            "total_analyses": n,
+            "buckets": buckets,
+            "change": {
+                metric: round(buckets[-1][metric]["avg"] - buckets[0][metric]["avg"], 2) if buckets else 0.0
+                for metric in self.METRICS
+            },
+            "slope_per_day": {metric: round(value, 4) for metric, value in slopes.items()}
+        }
+
+class FaceTrackingSession:
+    """WebSocket 연결별 얼굴 추적 상태
+    
+    매 프레임 검출하지 않고, 마지막 검출 결과의 얼굴 템플릿을 주변 영역에서 매칭하여 추적합니다.
+    N 프레임이 지나거나 템플릿 매칭 점수가 기준 미만이면 검출기를 다시 실행합니다.
+    """
+    TEMPLATE_SIZE = 48  # 매칭 비용을 줄이기 위한 템플릿 긴 변 크기 (픽셀)
+    
+    def __init__(self, analyzer: "ModernSkinAnalyzer", detect_interval: int = FACE_TRACK_DETECT_INTERVAL,
+                 min_match_score: float = FACE_TRACK_MIN_MATCH, ready_frames: int = FACE_TRACK_READY_FRAMES):
+        self.analyzer = analyzer
+        self.detect_interval = max(1, detect_interval)
+        self.min_match_score = min_match_score
+        self.ready_frames = max(1, ready_frames)
+        self.last_detection: Optional[Dict] = None
+        self.template: Optional[np.ndarray] = None
+        self.template_scale = 1.0
+        self.frames_since_detect = 0
+        self.stable_frames = 0
+        self.frame_count = 0
+    
+    def _update_template(self, gray: np.ndarray, bbox: Dict) -> None:
+        x, y, w, h = bbox["xmin"], bbox["ymin"], bbox["width"], bbox["height"]
+        patch = gray[max(0, y):y + h, max(0, x):x + w]
+        if patch.size == 0:
+            self.template = None
+            return
+        self.template_scale = min(1.0, self.TEMPLATE_SIZE / max(w, h))
+        if self.template_scale < 1.0:
+            patch = cv2.resize(patch, None, fx=self.template_scale, fy=self.template_scale,
+                               interpolation=cv2.INTER_AREA)
+        self.template = patch
+    
+    def _track(self, gray: np.ndarray) -> Optional[Dict]:
+        """이전 얼굴 주변 영역에서 템플릿 매칭으로 얼굴 위치 추적"""
+        if self.template is None:
+            return None
+        
+        bbox = self.last_detection["bbox"]
+        x, y, w, h = bbox["xmin"], bbox["ymin"], bbox["width"], bbox["height"]
+        x0, y0 = max(0, x - w // 2), max(0, y - h // 2)
+        x1, y1 = min(gray.shape[1], x + w + w // 2), min(gray.shape[0], y + h + h // 2)
+        
+        region = gray[y0:y1, x0:x1]
+        scale = self.template_scale
+        if scale < 1.0:
+            region = cv2.resize(region, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        if region.shape[0] < self.template.shape[0] or region.shape[1] < self.template.shape[1]:
+            return None
+        
+        scores = cv2.matchTemplate(region, self.template, cv2.TM_CCOEFF_NORMED)
+        _, match_score, _, location = cv2.minMaxLoc(scores)
+        if match_score < self.min_match_score:
+            return None
+        
+        new_x = x0 + int(round(location[0] / scale))
+        new_y = y0 + int(round(location[1] / scale))
+        return {
+            "face_detected": True,
+            "confidence": self.analyzer.face_confidence(new_x, new_y, w, h, gray.shape),
+            "bbox": {"xmin": new_x, "ymin": new_y, "width": w, "height": h},
+            "match_score": float(match_score)
+        }
+    
+    def process_frame(self, frame: np.ndarray) -> Dict:
+        """프레임 하나를 처리하고 얼굴 상태와 촬영 준비 여부 반환"""
+        self.frame_count += 1
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        
+        detection = None
+        method = "track"
+        if self.last_detection is not None and self.frames_since_detect < self.detect_interval:
+            detection = self._track(gray)
+        
+        if detection is None:
+            method = "detect"
+            detection = self.analyzer.detect_face_thumbnail(frame)
+            self.frames_since_detect = 0
+            if detection["face_detected"]:
+                self._update_template(gray, detection["bbox"])
+        else:
+            self.frames_since_detect += 1
+        
+        self.last_detection = detection if detection["face_detected"] else None
+        
+        if detection["face_detected"] and detection["confidence"] >= self.analyzer.min_face_confidence:
+            self.stable_frames += 1
+        else:
+            self.stable_frames = 0
+        
+        return {
+            "frame": self.frame_count,
+            "face_detected": detection["face_detected"],
+            "confidence": detection["confidence"],
+            "bbox": detection["bbox"],
+            "tracking": method,
+            "stable_frames": self.stable_frames,
+            "ready": self.stable_frames >= self.ready_frames
+        }
+
+def analysis_target_size(long_side: int) -> int:
+    """전처리 분석 해상도 (AI 모델에 최적화된 긴 변, 2025년 표준) - 원본 긴 변 기준으로 결정"""
+    return 640 if long_side > 1080 else 512
+
+class FrameContext:
+    """요청 단위 이미지 뷰 캐시
+    
+    같은 RGB 이미지에 대한 그레이스케일/LAB/YCrCb 변환, 이진 피부 마스크, 마스크 영역 통계를 처음 필요할 때
+    한 번만 계산해 파이프라인 단계들이 공유합니다. 통계는 불리언 인덱싱 복사 대신 cv2.meanStdDev(mask=...)로 계산합니다.
+    source_rect는 이 이미지가 원본 이미지에서 차지하는 영역 (x, y, 너비, 높이 - 원본 크기 대비 0~1 비율)입니다.
+    """
+    
+    def __init__(self, image: np.ndarray, skin_mask: Optional[np.ndarray] = None,
+                 source_rect: tuple = (0.0, 0.0, 1.0, 1.0)):
+        self.image = image
+        self.source_rect = source_rect
+        self.skin_mask = None
+        self.mask_cache: Dict = {}
+        if skin_mask is not None:
+            self.set_skin_mask(skin_mask)
+    
+    @functools.cached_property
+    def gray(self) -> np.ndarray:
+        return cv2.cvtColor(self.image, cv2.COLOR_RGB2GRAY)
+    
+    @functools.cached_property
+    def lab(self) -> np.ndarray:
+        return cv2.cvtColor(self.image, cv2.COLOR_RGB2LAB)
+    
+    @functools.cached_property
+    def l_channel(self) -> np.ndarray:
+        return cv2.extractChannel(self.lab, 0)
+    
+    @functools.cached_property
+    def ycrcb(self) -> np.ndarray:
+        return cv2.cvtColor(self.image, cv2.COLOR_RGB2YCrCb)
+    
+    VIEWS = ("gray", "lab", "l_channel", "ycrcb")
+    
+    def crop(self, bbox: Dict) -> "FrameContext":
+        """bbox 영역의 하위 컨텍스트 (이미 계산된 색공간 뷰는 변환 없이 같은 영역을 잘라 공유)"""
+        region = (slice(bbox["ymin"], bbox["ymin"] + bbox["height"]), slice(bbox["xmin"], bbox["xmin"] + bbox["width"]))
+        child = FrameContext(self.image[region], source_rect=tuple(float(v) for v in self.to_source_rect(
+            bbox["xmin"], bbox["ymin"], bbox["width"], bbox["height"]
+        )))
+        for name in self.VIEWS:
+            if name in self.__dict__:
+                child.__dict__[name] = self.__dict__[name][region]
+        return child
+    
+    def to_source_rect(self, x, y, width, height) -> tuple:
+        """이미지 픽셀 좌표의 영역(배열 가능)을 원본 이미지 대비 0~1 비율 좌표로 변환"""
+        image_height, image_width = self.image.shape[:2]
+        sx, sy, sw, sh = self.source_rect
+        return (
+            sx + np.divide(x, image_width) * sw, sy + np.divide(y, image_height) * sh,
+            np.divide(width, image_width) * sw, np.divide(height, image_height) * sh
+        )
+    
+    def set_skin_mask(self, skin_mask: Optional[np.ndarray]):
+        """피부 마스크(0~255) 지정 - 마스크 기반 캐시 초기화"""
+        if skin_mask is not self.skin_mask:
+            self.skin_mask = skin_mask
+            self.mask_cache.clear()
+    
+    @property
+    def skin_mask_binary(self) -> Optional[np.ndarray]:
+        """피부 마스크 > 128 영역 (uint8 0/255, OpenCV 마스크 인자로 바로 사용)"""
+        if self.skin_mask is None:
+            return None
+        if "binary" not in self.mask_cache:
+            _, self.mask_cache["binary"] = cv2.threshold(self.skin_mask, 128, 255, cv2.THRESH_BINARY)
+        return self.mask_cache["binary"]
+    
+    @property
+    def skin_pixel_count(self) -> int:
+        if self.skin_mask is None:
+            return 0
+        if "count" not in self.mask_cache:
+            self.mask_cache["count"] = cv2.countNonZero(self.skin_mask_binary)
+        return self.mask_cache["count"]
+    
+    def color_stats(self, masked: bool = True) -> tuple:
+        """RGB 채널별 (평균, 표준편차) - masked이면 피부 마스크 영역만"""
+        return self.stats("color", self.image, masked)
+    
+    def gray_stats(self, masked: bool = True) -> tuple:
+        """그레이스케일 (평균, 표준편차) - masked이면 피부 마스크 영역만"""
+        mean, std = self.stats("gray", self.gray, masked)
+        return float(mean[0]), float(std[0])
+    
+    def stats(self, name: str, view: np.ndarray, masked: bool) -> tuple:
+        mask = self.skin_mask_binary if masked else None
+        key = (name, mask is not None)
+        if key not in self.mask_cache:
+            mean, std = cv2.meanStdDev(view, mask=mask)
+            self.mask_cache[key] = (mean.ravel(), std.ravel())
+        return self.mask_cache[key]
+
+class AnalysisPlan:
+    """요청별 분석 계획: 품질 단계와 기한으로 선택 단계 실행 여부를 정하고 실행/생략된 단계를 기록
+    
+    선택 단계는 denoise(bilateralFilter), remote_parsing(원격 face parsing), age_model(ViT 연령대 모델),
+    blemishes_full(전체 프레임 잡티 감지)이며 각각 생략, 로컬 파싱, analyze_age_fallback, 얼굴 영역 잡티 감지로 대체됩니다.
+    fast는 모두 대체하고, 기한이 있으면 남은 시간에서 필수 단계 여유 시간을 뺀 예산이 단계 예상 처리 시간보다 짧을 때 대체합니다.
+    """
+    
+    EWMA_ALPHA = 0.2
+    
+    def __init__(self, mode: str = DEFAULT_ANALYSIS_MODE, deadline_ms: Optional[float] = None,
+                 stage_costs: Optional[Dict[str, float]] = None):
+        if deadline_ms is None and mode == "balanced":
+            deadline_ms = BALANCED_DEADLINE_MS
+        self.mode = mode
+        self.deadline_ms = deadline_ms
+        self.deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms else None
+        self.stage_costs = stage_costs if stage_costs is not None else dict(OPTIONAL_STAGE_INITIAL_COST)
+        self.stages_run: List[str] = []
+        self.stages_skipped: List[str] = []
+        self.deadline_limited = False  # 기한 때문에 대체된 단계가 있으면 결과를 캐시하지 않음
+    
+    def fork(self) -> "AnalysisPlan":
+        """같은 품질 단계/기한/추정값을 쓰고 지금까지의 기록을 복사한 얼굴별 계획 (다중 얼굴 분석)"""
+        child = AnalysisPlan(self.mode, None, self.stage_costs)
+        child.deadline_ms, child.deadline = self.deadline_ms, self.deadline
+        child.stages_run, child.stages_skipped = list(self.stages_run), list(self.stages_skipped)
+        child.deadline_limited = self.deadline_limited
+        return child
+    
+    def budget(self) -> Optional[float]:
+        """선택 단계에 쓸 수 있는 남은 시간 (초, 기한이 없으면 None)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic() - ANALYSIS_DEADLINE_RESERVE_MS / 1000)
+    
+    def allow(self, stage: str) -> bool:
+        """선택 단계 실행 여부 (실행하지 않으면 생략으로 기록)"""
+        if self.mode == "fast":
+            self.skip(stage, "mode")
+            return False
+        budget = self.budget()
+        if budget is not None and budget < self.stage_costs.get(stage, 0.0):
+            self.skip(stage, "deadline")
+            return False
+        return True
+    
+    def ran(self, stage: str):
+        self.stages_run.append(stage)
+    
+    def skip(self, stage: str, reason: str):
+        self.stages_skipped.append(stage)
+        if reason == "deadline":
+            self.deadline_limited = True
+        STAGE_SKIPS.labels(stage, reason).inc()
+    
+    def record_cost(self, stage: str, seconds: float):
+        """선택 단계 처리 시간 EWMA 갱신 (분석기 전체가 같은 추정값 공유)"""
+        previous = self.stage_costs.get(stage, seconds)
+        self.stage_costs[stage] = previous + self.EWMA_ALPHA * (seconds - previous)
+    
+    @contextmanager
+    def measure(self, stage: str):
+        """동기 단계의 처리 시간 측정"""
+        start = time.perf_counter()
+        yield
+        self.record_cost(stage, time.perf_counter() - start)
+    
+    async def timed(self, stage: str, awaitable):
+        """비동기 단계의 처리 시간 측정 (기한 초과로 결과를 버리더라도 추정값은 갱신)"""
+        start = time.perf_counter()
+        result = await awaitable
+        self.record_cost(stage, time.perf_counter() - start)
+        return result
 
 class ModernSkinAnalyzer:
     def __init__(self):
-        # 2025년 최신 Hugging Face API 엔드포인트
-        self.hf_api_base = "https://api-inference.huggingface.co/models"
-        
         # 최신 AI 모델들 (2025년)
         self.models = {
             "face_parsing": "jonathandinu/face-parsing",
@@ -86,49 +2025,115 @@ class ModernSkinAnalyzer:
             "skin_analysis": "microsoft/DialoGPT-medium"  # 최신 추가
         }
         
-        self.session = None
+        # 2025년 최신 Hugging Face API 클라이언트 (서킷 브레이커/재시도/동시 호출 상한)
+        self.remote = RemoteInferenceClient(HF_API_BASE, self.models)
         
-        # OpenCV 얼굴 검출기 초기화
-        cascade_path = os.path.join(os.path.dirname(cv2.__file__), 'data', 'haarcascade_frontalface_default.xml')
-        self.face_cascade = cv2.CascadeClassifier(cascade_path)
-        if self.face_cascade.empty():
-            raise ValueError("얼굴 검출 모델을 로드할 수 없습니다.")
+        # 얼굴 검출기 초기화 (배포별 선택) 및 백업 감지용 Haar cascade
+        self.face_detector = create_face_detector()
+        self.backup_face_detector = HaarFaceDetector(scale_factor=1.05, min_neighbors=6)
             
         # 나이 분석 모델 초기화
-        self.age_model, self.age_transforms = self.init_age_model()
+        self.age_backend, self.age_input_spec = self.init_age_model()
+        self.age_input_spec = self.age_input_spec or get_age_input_spec(None)
+        self.age_batcher = AgeInferenceBatcher(self)
+        
+        # 분석 결과 캐시
+        self.result_cache = AnalysisResultCache()
+        
+        # 선택 분석 단계 처리 시간 추정값 (요청별 AnalysisPlan이 공유/갱신)
+        self.stage_costs = dict(OPTIONAL_STAGE_INITIAL_COST)
+        
+        self.min_face_confidence = MIN_FACE_CONFIDENCE
         
-        self.min_face_confidence = 0.8
+        # 이벤트 루프를 막지 않도록 CPU 작업을 실행할 풀
+        self.cv_executor = ThreadPoolExecutor(max_workers=CV_EXECUTOR_WORKERS, thread_name_prefix="cv-stage")
+        self.torch_executor = ThreadPoolExecutor(max_workers=TORCH_EXECUTOR_WORKERS, thread_name_prefix="torch-stage")
         logger.info("🚀 2025년 최신 AI 피부 분석기 초기화 완료")
-        logger.info("✨ OpenCV Face Detection 모델 로드 완료!")
+        logger.info(f"✨ 얼굴 검출 모델 로드 완료! ({self.face_detector.name})")
     
-    async def init_session(self):
-        """비동기 HTTP 세션 초기화 (2025년 성능 최적화)"""
-        if self.session is None:
-            timeout = aiohttp.ClientTimeout(total=30)
-            connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
-            self.session = aiohttp.ClientSession(
-                connector=connector,
-                timeout=timeout,
-                headers={"User-Agent": "SkinAnalyzer-2025/3.0"}
-            )
+    def prepare_fork(self):
+        """prefork 부모 프로세스에서 워커를 fork하기 전에 호출 (워커별로 다시 만드는 백엔드 자원 정리)"""
+        if self.age_backend is not None:
+            self.age_backend.before_fork()
+    
+    def reset_after_fork(self, num_threads: int = CV_EXECUTOR_WORKERS):
+        """prefork 워커에서 부모 프로세스의 스레드/이벤트 루프 자원을 새로 생성
+        
+        fork는 호출한 스레드만 복제하므로 워밍업 때 시작된 실행 풀 스레드와 부모 이벤트 루프에 묶인 배치 작업/HTTP 세션은
+        워커에서 사용할 수 없습니다. 모델 가중치와 얼굴 검출기 설정은 그대로 공유합니다.
+        """
+        self.cv_executor = ThreadPoolExecutor(max_workers=CV_EXECUTOR_WORKERS, thread_name_prefix="cv-stage")
+        self.torch_executor = ThreadPoolExecutor(max_workers=TORCH_EXECUTOR_WORKERS, thread_name_prefix="torch-stage")
+        self.age_batcher = AgeInferenceBatcher(self)
+        self.remote = RemoteInferenceClient(HF_API_BASE, self.models)
+        self.result_cache = AnalysisResultCache()
+        if self.age_backend is not None:
+            self.age_backend = self.age_backend.after_fork(num_threads)
     
     async def close_session(self):
         """세션 종료"""
-        if self.session:
-            await self.session.close()
+        await self.remote.close()
+        await self.age_batcher.close()
+        if self.age_backend is not None:
+            self.age_backend.close()
+        self.cv_executor.shutdown(wait=False)
+        self.torch_executor.shutdown(wait=False)
     
-    def preprocess_image_2025(self, image: np.ndarray) -> np.ndarray:
-        """2025년 향상된 이미지 전처리"""
-        if len(image.shape) == 3 and image.shape[2] == 3:
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        else:
-            image_rgb = image
+    async def warm_up(self):
+        """합성 이미지로 주요 단계를 한 번씩 실행하여 첫 요청의 콜드 스타트 제거 (원격 호출 제외)"""
+        rng = np.random.default_rng(2025)
+        frame = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+        
+        processed = await self.run_cv(self.preprocess_image_2025, frame)
+        await self.run_cv(self.detect_face, processed)
+        await self.run_cv(self.detect_face_thumbnail, processed)
+        
+        face = np.ascontiguousarray(processed[:224, :224])
+        parsing_result = await self.run_cv(self.enhanced_skin_detection, face)
+        await self.run_cv(self.analyze_skin_advanced_2025, face, parsing_result)
+        await self.run_cv(self.detect_blemishes_ai_2025, face, parsing_result['masks'].get('skin'))
+        await self.age_batcher.submit(face)
+    
+    async def run_cv(self, func, *args):
+        """OpenCV/NumPy 단계를 CV 스레드 풀에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cv_executor, functools.partial(func, *args))
+    
+    async def run_torch(self, func, *args):
+        """torch 추론 단계를 전용 풀에서 실행 (동시 실행 수 제한)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.torch_executor, functools.partial(func, *args))
+    
+    def new_plan(self, mode: str = DEFAULT_ANALYSIS_MODE, deadline_ms: Optional[float] = None) -> AnalysisPlan:
+        """이 분석기의 단계 처리 시간 추정값을 사용하는 요청별 분석 계획"""
+        return AnalysisPlan(mode, deadline_ms, self.stage_costs)
+    
+    @staticmethod
+    def denoise_image(image: np.ndarray, plan: Optional[AnalysisPlan] = None) -> np.ndarray:
+        """bilateralFilter 노이즈 제거 (계획이 생략하면 그대로 반환)"""
+        if plan is None:
+            return cv2.bilateralFilter(image, 9, 75, 75)
+        if not plan.allow("denoise"):
+            return image
+        with plan.measure("denoise"):
+            denoised = cv2.bilateralFilter(image, 9, 75, 75)
+        plan.ran("denoise")
+        return denoised
+    
+    def preprocess_image_2025(self, image: np.ndarray, source_shape: Optional[tuple] = None,
+                              plan: Optional[AnalysisPlan] = None) -> np.ndarray:
+        """2025년 향상된 이미지 전처리
+        
+        축소 디코딩된 이미지는 source_shape(원본 높이, 너비)로 분석 해상도를 정해 전체 디코딩과 같은 크기로 맞춥니다.
+        입력은 decode_image_bytes가 반환한 RGB 배열이며 이후 모든 단계(감지, 색공간 변환, 연령대 모델)도 RGB를 가정합니다.
+        """
+        image_rgb = image
             
         # 2025년 최적화: 동적 크기 조정
         height, width = image_rgb.shape[:2]
         
         # AI 모델에 최적화된 크기 (2025년 표준)
-        target_size = 640 if max(height, width) > 1080 else 512
+        target_size = analysis_target_size(max(source_shape or (height, width)))
         
         if max(height, width) > target_size:
             scale = target_size / max(height, width)
@@ -139,10 +2144,44 @@ class ModernSkinAnalyzer:
                                  interpolation=cv2.INTER_LANCZOS4)
         
         # 2025년 추가: 이미지 품질 향상
-        image_rgb = cv2.bilateralFilter(image_rgb, 9, 75, 75)
+        image_rgb = self.denoise_image(image_rgb, plan)
             
         return image_rgb
     
+    def extract_face_roi(self, image: np.ndarray, bbox: Dict, padding: float = ROI_PADDING,
+                         size: int = ROI_ANALYSIS_SIZE, plan: Optional[AnalysisPlan] = None) -> tuple:
+        """원본 해상도에서 여백을 둔 얼굴 영역만 잘라 고정 분석 해상도로 전처리
+        
+        preprocess_image_2025와 같이 RGB 입력에 bilateralFilter를 얼굴 영역에만 적용합니다.
+        (전처리된 ROI, ROI 좌표계의 얼굴 bbox, 원본 대비 ROI 영역 비율 (x, y, 너비, 높이))를 반환합니다.
+        """
+        height, width = image.shape[:2]
+        pad_x = int(bbox["width"] * padding)
+        pad_y = int(bbox["height"] * padding)
+        x0 = max(0, bbox["xmin"] - pad_x)
+        y0 = max(0, bbox["ymin"] - pad_y)
+        x1 = min(width, bbox["xmin"] + bbox["width"] + pad_x)
+        y1 = min(height, bbox["ymin"] + bbox["height"] + pad_y)
+        roi = image[y0:y1, x0:x1]
+        
+        scale = size / max(roi.shape[:2])
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        roi = cv2.resize(roi, (max(1, round(roi.shape[1] * scale)), max(1, round(roi.shape[0] * scale))),
+                         interpolation=interpolation)
+        
+        roi = self.denoise_image(roi, plan)
+        
+        face_x = min(roi.shape[1] - 1, round((bbox["xmin"] - x0) * scale))
+        face_y = min(roi.shape[0] - 1, round((bbox["ymin"] - y0) * scale))
+        face_bbox = {
+            "xmin": face_x,
+            "ymin": face_y,
+            "width": max(1, min(roi.shape[1] - face_x, round(bbox["width"] * scale))),
+            "height": max(1, min(roi.shape[0] - face_y, round(bbox["height"] * scale)))
+        }
+        source_rect = (x0 / width, y0 / height, (x1 - x0) / width, (y1 - y0) / height)
+        return roi, face_bbox, source_rect
+    
     def image_to_bytes(self, image: np.ndarray, quality: int = 90) -> bytes:
         """최적화된 이미지 바이트 변환 (2025년)"""
         pil_image = Image.fromarray(image)
@@ -156,109 +2195,92 @@ class ModernSkinAnalyzer:
         return img_byte_arr.getvalue()
     
     async def call_hf_api_2025(self, model_name: str, image_bytes: bytes) -> Dict:
-        """2025년 최신 Hugging Face API 호출"""
-        await self.init_session()
-        
-        url = f"{self.hf_api_base}/{self.models[model_name]}"
-        headers = {
-            "Content-Type": "application/octet-stream",
-            "X-Request-ID": f"skin-analyzer-{int(time.time())}",
-        }
-        
+        """2025년 최신 Hugging Face API 호출 (호출 결과와 지연 시간을 메트릭으로 기록)"""
+        with track_stage(f"hf_api_{model_name}"):
+            result = await self.remote.infer(model_name, image_bytes)
+        REMOTE_CALLS.labels(model_name, "success" if result["success"] else result["error"]).inc()
+        return result
+    
+    def detect_face(self, image: np.ndarray, context: Optional[FrameContext] = None) -> Dict:
+        """OpenCV를 사용한 고급 얼굴 감지"""
         try:
-            async with self.session.post(url, headers=headers, data=image_bytes) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return {"success": True, "data": result}
-                elif response.status == 503:
-                    return {
-                        "success": False, 
-                        "error": "model_loading", 
-                        "message": "AI 모델 로딩 중입니다. 30초 후 다시 시도하세요."
-                    }
-                else:
-                    error_text = await response.text()
-                    return {
-                        "success": False, 
-                        "error": "api_error", 
-                        "message": f"API 오류: {error_text[:100]}"
-                    }
-                    
-        except asyncio.TimeoutError:
+            if context is not None and not self.face_detector.color_input:
+                # 검출기용 그레이스케일 변환을 이후 단계(얼굴 영역 통계)와 공유
+                image = context.gray
+            return self.detect_face_in_frame(image)
+            
+        except Exception as e:
+            logger.error(f"얼굴 감지 오류: {e}")
+            STAGE_ERRORS.labels("detect_face").inc()
             return {
-                "success": False, 
-                "error": "timeout", 
-                "message": "AI 분석 시간 초과. 다시 시도해주세요."
+                "face_detected": False,
+                "confidence": 0.0,
+                "bbox": None,
+                "error": str(e)
             }
-        except Exception as e:
-            logger.error(f"HF API 호출 오류: {e}")
+
+    def detect_face_in_frame(self, image: np.ndarray, min_size: tuple = (30, 30)) -> Dict:
+        """설정된 검출기로 얼굴 감지 및 신뢰도 계산 (RGB 또는 그레이스케일 입력)"""
+        # 얼굴 감지
+        faces = self.face_detector.detect(image, min_size=min_size)
+        
+        if len(faces) == 0:
             return {
-                "success": False, 
-                "error": "network_error", 
-                "message": f"네트워크 오류: {str(e)}"
+                "face_detected": False,
+                "confidence": 0.0,
+                "bbox": None
             }
-    
-    def detect_face(self, image: np.ndarray) -> Dict:
-        """OpenCV를 사용한 고급 얼굴 감지"""
+        
+        # 가장 큰 얼굴 선택 (중앙에 있는 얼굴일 가능성이 높음)
+        best_face = max(faces, key=lambda x: x[2] * x[3])
+        x, y, w, h = best_face[:4]
+        
+        return {
+            "face_detected": True,
+            "confidence": self.face_confidence(x, y, w, h, image.shape),
+            "bbox": {
+                "xmin": int(x),
+                "ymin": int(y),
+                "width": int(w),
+                "height": int(h)
+            }
+        }
+
+    def face_confidence(self, x: int, y: int, w: int, h: int, image_shape: tuple) -> float:
+        """설정된 검출기의 bbox 배율을 반영한 얼굴 신뢰도 (0.0 ~ 1.0)"""
+        return face_confidence(x, y, w, h, image_shape, self.face_detector.box_scale)
+
+    def detect_face_thumbnail(self, image: np.ndarray, max_side: int = FACE_CHECK_MAX_SIDE) -> Dict:
+        """축소된 썸네일에서 빠른 얼굴 감지 (실시간 카메라용)
+        
+        신뢰도는 면적 비율과 중앙 거리로 계산되므로 축소해도 동일한 기준이 유지되며,
+        bbox는 입력 이미지 좌표계로 되돌려 반환합니다. 검출기가 컬러 입력을 쓰지 않으면
+        그레이스케일로 변환해서 처리합니다.
+        """
         try:
-            # 그레이스케일 변환
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # 얼굴 감지
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30),
-                flags=cv2.CASCADE_SCALE_IMAGE
-            )
-            
-            if len(faces) == 0:
-                return {
-                    "face_detected": False,
-                    "confidence": 0.0,
-                    "bbox": None
-                }
-            
-            # 가장 큰 얼굴 선택 (중앙에 있는 얼굴일 가능성이 높음)
-            best_face = max(faces, key=lambda x: x[2] * x[3])
-            x, y, w, h = best_face
-            
-            # 얼굴 크기와 위치에 따른 신뢰도 계산
-            image_area = image.shape[0] * image.shape[1]
-            face_area = w * h
-            area_ratio = face_area / image_area
-            
-            # 신뢰도 점수 계산 (0.0 ~ 1.0)
-            confidence = min(1.0, area_ratio * 5) if 0.05 <= area_ratio <= 0.6 else 0.0
+            thumbnail = image
+            if thumbnail.ndim == 3 and not self.face_detector.color_input:
+                thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_RGB2GRAY)
+            height, width = thumbnail.shape[:2]
+            scale = min(1.0, max_side / max(height, width))
             
-            # 중앙에 가까울수록 높은 신뢰도
-            center_x = x + w/2
-            center_y = y + h/2
-            image_center_x = image.shape[1]/2
-            image_center_y = image.shape[0]/2
+            if scale < 1.0:
+                thumbnail = cv2.resize(thumbnail, (max(1, int(width * scale)), max(1, int(height * scale))),
+                                       interpolation=cv2.INTER_AREA)
             
-            distance_from_center = math.sqrt(
-                ((center_x - image_center_x) / image.shape[1]) ** 2 +
-                ((center_y - image_center_y) / image.shape[0]) ** 2
-            )
-            
-            # 중앙 거리에 따른 신뢰도 조정
-            confidence *= max(0.5, 1 - distance_from_center)
+            # 면적 비율 5% 미만의 얼굴(검출기 bbox 배율 환산 기준)은 신뢰도가 0이므로 작은 스케일은 탐색하지 않음
+            min_side = max(20, int(math.sqrt(0.05 * thumbnail.shape[0] * thumbnail.shape[1]) / self.face_detector.box_scale))
+            result = self.detect_face_in_frame(thumbnail, min_size=(min_side, min_side))
             
-            return {
-                "face_detected": True,
-                "confidence": float(confidence),
-                "bbox": {
-                    "xmin": int(x),
-                    "ymin": int(y),
-                    "width": int(w),
-                    "height": int(h)
+            if result["bbox"] is not None and scale < 1.0:
+                result["bbox"] = {
+                    key: int(round(value / scale)) for key, value in result["bbox"].items()
                 }
-            }
+            return result
             
         except Exception as e:
-            logger.error(f"얼굴 감지 오류: {e}")
+            logger.error(f"썸네일 얼굴 감지 오류: {e}")
+            STAGE_ERRORS.labels("detect_face_thumbnail").inc()
             return {
                 "face_detected": False,
                 "confidence": 0.0,
@@ -266,6 +2288,67 @@ class ModernSkinAnalyzer:
                 "error": str(e)
             }
 
+    @staticmethod
+    def face_skin_ratio(skin_binary: np.ndarray, x: int, y: int, w: int, h: int) -> float:
+        """얼굴 bbox 중앙 영역(각 변 20% 안쪽)에서 피부색 화소 비율 (배경/머리카락 영향을 줄이기 위해 중앙만 사용)"""
+        dx, dy = w // 5, h // 5
+        center = skin_binary[y + dy:y + h - dy, x + dx:x + w - dx]
+        return float(np.count_nonzero(center)) / center.size if center.size else 0.0
+
+    def detect_all_faces(self, image: np.ndarray, max_side: Optional[int] = None,
+                         max_faces: int = MULTI_FACE_MAX_FACES,
+                         context: Optional[FrameContext] = None) -> List[Dict]:
+        """프레임의 모든 얼굴 감지 (다중 얼굴 분석용, 면적이 큰 순으로 최대 max_faces개)
+        
+        단일 얼굴 신뢰도(면적 비율과 중앙 거리)는 여러 명이 찍힌 프레임에서 대부분 0이 되므로
+        검출기 점수(Haar 단계 가중치 또는 BlazeFace 점수)에 bbox 중앙의 피부색 비율 계수
+        min(1, 비율 x 2)를 곱해 신뢰도로 쓰고, MULTI_FACE_MIN_CONFIDENCE 미만인 후보는 버립니다.
+        그레이스케일 입력이면 피부색 검증 없이 검출기 점수만 사용합니다.
+        긴 변 대비 MULTI_FACE_MIN_SIZE_RATIO보다 작은 얼굴은 탐색하지 않으며, max_side를 주면 썸네일에서
+        감지하고 bbox는 항상 입력 이미지 좌표계입니다. context는 image의 컨텍스트(색공간 뷰 재사용)입니다.
+        """
+        try:
+            frame = image
+            height, width = frame.shape[:2]
+            scale = min(1.0, max_side / max(height, width)) if max_side else 1.0
+            if scale < 1.0:
+                frame = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                                   interpolation=cv2.INTER_AREA)
+            color = frame.ndim == 3
+            frame_context = context if context is not None and scale == 1.0 else FrameContext(frame)
+            detection_input = frame_context.gray if color and not self.face_detector.color_input else frame
+            
+            min_side = max(20, int(max(frame.shape[:2]) * MULTI_FACE_MIN_SIZE_RATIO))
+            faces = self.face_detector.detect(detection_input, min_size=(min_side, min_side))
+            skin_binary = cv2.inRange(frame_context.ycrcb, SKIN_YCRCB_LOWER, SKIN_YCRCB_UPPER) if color and faces else None
+            
+            candidates = []
+            for x, y, w, h, score in faces:
+                confidence = score
+                if skin_binary is not None:
+                    confidence *= min(1.0, 2.0 * self.face_skin_ratio(skin_binary, x, y, w, h))
+                if confidence >= MULTI_FACE_MIN_CONFIDENCE:
+                    candidates.append((x, y, w, h, confidence))
+            faces = sorted(candidates, key=lambda face: face[2] * face[3], reverse=True)[:max_faces]
+            return [
+                {
+                    "face_detected": True,
+                    "confidence": float(score),
+                    "bbox": {
+                        "xmin": int(round(x / scale)),
+                        "ymin": int(round(y / scale)),
+                        "width": int(round(w / scale)),
+                        "height": int(round(h / scale))
+                    }
+                }
+                for x, y, w, h, score in faces
+            ]
+            
+        except Exception as e:
+            logger.error(f"다중 얼굴 감지 오류: {e}")
+            STAGE_ERRORS.labels("detect_face").inc()
+            return []
+
     async def advanced_face_detection(self, image: np.ndarray) -> List[Dict]:
         """2025년 향상된 얼굴 감지"""
         image_bytes = self.image_to_bytes(image)
@@ -285,26 +2368,17 @@ class ModernSkinAnalyzer:
             return faces
         else:
             # 2차: OpenCV DNN 백업 (2025년 최신 모델)
+            FALLBACK_COUNT.labels("face_detection", result["error"]).inc()
             return self.opencv_face_detection_2025(image)
     
     def opencv_face_detection_2025(self, image: np.ndarray) -> List[Dict]:
         """2025년 최신 OpenCV DNN 얼굴 감지"""
         try:
-            # 2025년 최신 얼굴 감지 모델 사용
-            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-            
-            # 향상된 얼굴 감지
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            faces = face_cascade.detectMultiScale(
-                gray, 
-                scaleFactor=1.05,  # 2025년 최적화
-                minNeighbors=6,
-                minSize=(50, 50),
-                maxSize=(500, 500)
-            )
+            # 향상된 얼굴 감지 (scaleFactor 1.05, minNeighbors 6 - 미리 로드된 분류기 재사용)
+            faces = self.backup_face_detector.detect(image, min_size=(50, 50), max_size=(500, 500))
             
             result = []
-            for (x, y, w, h) in faces:
+            for (x, y, w, h, _) in faces:
                 result.append({
                     "bbox": {"xmin": x, "ymin": y, "xmax": x+w, "ymax": y+h},
                     "confidence": 0.85,  # 향상된 기본 신뢰도
@@ -315,13 +2389,33 @@ class ModernSkinAnalyzer:
             logger.error(f"OpenCV 얼굴 감지 오류: {e}")
             return []
     
-    async def advanced_face_parsing(self, image: np.ndarray) -> Dict:
-        """2025년 향상된 Face Parsing"""
-        image_bytes = self.image_to_bytes(image)
+    async def advanced_face_parsing(self, image: np.ndarray, context: Optional[FrameContext] = None,
+                                    plan: Optional[AnalysisPlan] = None) -> Dict:
+        """2025년 향상된 Face Parsing (계획의 기한이 있으면 남은 예산 안에서만 원격 결과를 기다림)"""
+        if not self.remote.is_available("face_parsing"):
+            # 원격 호출이 꺼져 있거나 서킷 브레이커 차단 중에는 인코딩/원격 호출 없이 바로 로컬 분석
+            reason = "circuit_open" if self.remote.enabled else "remote_disabled"
+            FALLBACK_COUNT.labels("face_parsing", reason).inc()
+            if plan is not None:
+                plan.skip("remote_parsing", reason)
+            return await self.local_face_parsing(image, context, plan)
+        if plan is not None and not plan.allow("remote_parsing"):
+            return await self.local_face_parsing(image, context, plan)
         
-        result = await self.call_hf_api_2025("face_parsing", image_bytes)
+        start = time.perf_counter()
+        image_bytes = await self.run_cv(self.image_to_bytes, image)
+        
+        budget = plan.budget() if plan is not None else None
+        try:
+            result = await asyncio.wait_for(self.call_hf_api_2025("face_parsing", image_bytes), budget)
+        except asyncio.TimeoutError:
+            result = {"success": False, "error": "deadline", "message": "분석 기한 안에 원격 응답이 없습니다."}
+        if plan is not None:
+            plan.record_cost("remote_parsing", time.perf_counter() - start)
         
         if result["success"]:
+            if plan is not None:
+                plan.ran("remote_parsing")
             parsing_result = {
                 "masks": {},
                 "labels_found": [],
@@ -335,19 +2429,27 @@ class ModernSkinAnalyzer:
             return parsing_result
         else:
             # 2025년 향상된 백업 분석
-            return self.enhanced_skin_detection(image)
+            FALLBACK_COUNT.labels("face_parsing", result["error"]).inc()
+            if plan is not None:
+                plan.skip("remote_parsing", result["error"])
+            return await self.local_face_parsing(image, context, plan)
+    
+    async def local_face_parsing(self, image: np.ndarray, context: Optional[FrameContext] = None,
+                                 plan: Optional[AnalysisPlan] = None) -> Dict:
+        """원격 파싱 대신 로컬 피부 감지 (enhanced_skin_detection)"""
+        result = await self.run_cv(self.enhanced_skin_detection, image, context)
+        if plan is not None:
+            plan.ran("local_parsing")
+        return result
     
-    def enhanced_skin_detection(self, image: np.ndarray) -> Dict:
+    def enhanced_skin_detection(self, image: np.ndarray, context: Optional[FrameContext] = None) -> Dict:
         """2025년 향상된 피부 감지 알고리즘"""
         try:
             # YCrCb 색공간 활용 (2025년 최신 방법)
-            ycrcb = cv2.cvtColor(image, cv2.COLOR_RGB2YCrCb)
+            ycrcb = (context or FrameContext(image)).ycrcb
             
             # 2025년 최적화된 피부색 범위
-            lower_skin = np.array([0, 133, 77], dtype=np.uint8)
-            upper_skin = np.array([255, 173, 127], dtype=np.uint8)
-            
-            skin_mask = cv2.inRange(ycrcb, lower_skin, upper_skin)
+            skin_mask = cv2.inRange(ycrcb, SKIN_YCRCB_LOWER, SKIN_YCRCB_UPPER)
             
             # 2025년 고급 모폴로지 연산
             kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
@@ -366,8 +2468,10 @@ class ModernSkinAnalyzer:
             logger.error(f"향상된 피부 감지 오류: {e}")
             return {"masks": {}, "labels_found": [], "confidence": 0.0}
     
-    def analyze_skin_advanced_2025(self, image: np.ndarray, parsing_result: Dict) -> Dict:
+    def analyze_skin_advanced_2025(self, image: np.ndarray, parsing_result: Dict,
+                                   context: Optional[FrameContext] = None) -> Dict:
         """2025년 최신 피부 분석 알고리즘"""
+        context = context or FrameContext(image)
         analysis = {
             'skin_area_percentage': 0,
             'avg_skin_color': {'r': 0, 'g': 0, 'b': 0},
@@ -379,51 +2483,125 @@ class ModernSkinAnalyzer:
         
         if 'skin' not in parsing_result['masks']:
             # 전체 이미지 기반 분석
+            avg_color, _ = context.color_stats(masked=False)
             analysis['avg_skin_color'] = {
-                'r': float(np.mean(image[:,:,0])),
-                'g': float(np.mean(image[:,:,1])),
-                'b': float(np.mean(image[:,:,2]))
+                'r': float(avg_color[0]),
+                'g': float(avg_color[1]),
+                'b': float(avg_color[2])
             }
-            analysis['skin_brightness'] = float(np.mean(image))
+            analysis['skin_brightness'] = float(np.mean(avg_color))
             analysis['skin_area_percentage'] = 85.0  # 추정값
-            gray_image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-            analysis['skin_texture_variance'] = float(np.var(gray_image.astype(np.float64)))
+            _, gray_std = context.gray_stats(masked=False)
+            analysis['skin_texture_variance'] = gray_std ** 2
             return analysis
         
         skin_mask = parsing_result['masks']['skin']
+        context.set_skin_mask(skin_mask)
         
         # 2025년 향상된 분석
         total_pixels = skin_mask.size
-        skin_pixels = np.sum(skin_mask > 128)
+        skin_pixels = context.skin_pixel_count
         analysis['skin_area_percentage'] = (skin_pixels / total_pixels) * 100
         
         if skin_pixels > 0:
-            skin_regions = image[skin_mask > 128]
+            # 색상 분석 (마스크 영역 평균)
+            avg_color, _ = context.color_stats()
+            analysis['avg_skin_color'] = {
+                'r': float(avg_color[0]),
+                'g': float(avg_color[1]),
+                'b': float(avg_color[2])
+            }
+            
+            analysis['skin_brightness'] = float(np.mean(avg_color))
+            
+            # 2025년 새로운 지표들
+            _, gray_std = context.gray_stats()
+            analysis['skin_texture_variance'] = gray_std ** 2
+            analysis['skin_uniformity'] = float(1.0 / (1.0 + gray_std / 100))
+            
+            # 피부 건강 점수 (2025년 AI 기반)
+            color_balance = 1.0 - abs(avg_color[0] - avg_color[1]) / 255
+            texture_quality = min(1.0, 200.0 / analysis['skin_texture_variance'])
+            analysis['skin_health_score'] = float((color_balance + texture_quality) / 2 * 100)
+        
+        return analysis
+    
+    def analyze_skin_batch_2025(self, images: List[np.ndarray], parsing_results: List[Dict],
+                                contexts: Optional[List[FrameContext]] = None) -> List[Dict]:
+        """analyze_skin_advanced_2025와 같은 지표를 여러 얼굴 이미지에 대해 벡터화 계산
+        
+        크기가 다른 이미지를 0으로 패딩해 하나의 배열로 쌓고, 피부 마스크(마스크가 없으면 이미지 전체)를
+        가중치로 사용해 채널 평균과 그레이스케일 분산을 한 번에 계산합니다.
+        """
+        n = len(images)
+        height = max(image.shape[0] for image in images)
+        width = max(image.shape[1] for image in images)
+        
+        pixels = np.zeros((n, height, width, 3), dtype=np.uint8)
+        grays = np.zeros((n, height, width), dtype=np.uint8)
+        weights = np.zeros((n, height, width), dtype=np.uint8)
+        has_mask = np.zeros(n, dtype=bool)
+        total_pixels = np.zeros(n, dtype=np.float64)
+        
+        for i, (image, parsing_result) in enumerate(zip(images, parsing_results)):
+            h, w = image.shape[:2]
+            pixels[i, :h, :w] = image
+            grays[i, :h, :w] = contexts[i].gray if contexts else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            skin_mask = parsing_result['masks'].get('skin')
+            if skin_mask is not None:
+                has_mask[i] = True
+                weights[i, :h, :w] = skin_mask > 128
+                total_pixels[i] = skin_mask.size
+            else:
+                weights[i, :h, :w] = 1
+                total_pixels[i] = h * w
+        
+        # 마스크 가중 합으로 평균/분산 계산 (uint8 배열을 그대로 두고 float64로 누적)
+        counts = weights.sum(axis=(1, 2), dtype=np.float64)
+        safe_counts = np.maximum(counts, 1.0)
+        avg_colors = np.einsum('nhwc,nhw->nc', pixels, weights, dtype=np.float64, casting='unsafe') / safe_counts[:, None]
+        gray_sums = np.einsum('nhw,nhw->n', grays, weights, dtype=np.float64, casting='unsafe')
+        gray_sq_sums = np.einsum('nhw,nhw,nhw->n', grays, grays, weights, dtype=np.float64, casting='unsafe')
+        gray_means = gray_sums / safe_counts
+        gray_vars = np.maximum(gray_sq_sums / safe_counts - gray_means ** 2, 0.0)
+        
+        brightness = avg_colors.mean(axis=1)
+        uniformity = 1.0 / (1.0 + np.sqrt(gray_vars) / 100)
+        color_balance = 1.0 - np.abs(avg_colors[:, 0] - avg_colors[:, 1]) / 255
+        texture_quality = np.minimum(1.0, np.divide(200.0, gray_vars, out=np.full(n, np.inf), where=gray_vars > 0))
+        health_scores = (color_balance + texture_quality) / 2 * 100
+        
+        analyses = []
+        for i in range(n):
+            analysis = {
+                'skin_area_percentage': 0,
+                'avg_skin_color': {'r': 0, 'g': 0, 'b': 0},
+                'skin_texture_variance': 0,
+                'skin_brightness': 0,
+                'skin_uniformity': 0,
+                'skin_health_score': 0
+            }
+            if not has_mask[i]:
+                # 전체 이미지 기반 분석
+                analysis['skin_area_percentage'] = 85.0  # 추정값
+                analysis['skin_texture_variance'] = float(gray_vars[i])
+            else:
+                analysis['skin_area_percentage'] = float(counts[i] / total_pixels[i] * 100)
+                if counts[i] > 0:
+                    analysis['skin_texture_variance'] = float(gray_vars[i])
+                    analysis['skin_uniformity'] = float(uniformity[i])
+                    analysis['skin_health_score'] = float(health_scores[i])
             
-            if len(skin_regions) > 0:
-                # 색상 분석
-                avg_color = np.mean(skin_regions, axis=0)
+            if counts[i] > 0:
                 analysis['avg_skin_color'] = {
-                    'r': float(avg_color[0]),
-                    'g': float(avg_color[1]),
-                    'b': float(avg_color[2])
+                    'r': float(avg_colors[i, 0]),
+                    'g': float(avg_colors[i, 1]),
+                    'b': float(avg_colors[i, 2])
                 }
-                
-                analysis['skin_brightness'] = float(np.mean(avg_color))
-                
-                # 2025년 새로운 지표들
-                gray_skin = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-                skin_texture = gray_skin[skin_mask > 128]
-                if len(skin_texture) > 0:
-                    analysis['skin_texture_variance'] = float(np.var(skin_texture.astype(np.float64)))
-                    analysis['skin_uniformity'] = float(1.0 / (1.0 + np.std(skin_texture.astype(np.float64)) / 100))
-                    
-                    # 피부 건강 점수 (2025년 AI 기반)
-                    color_balance = 1.0 - abs(avg_color[0] - avg_color[1]) / 255
-                    texture_quality = min(1.0, 200.0 / analysis['skin_texture_variance'])
-                    analysis['skin_health_score'] = float((color_balance + texture_quality) / 2 * 100)
+                analysis['skin_brightness'] = float(brightness[i])
+            analyses.append(analysis)
         
-        return analysis
+        return analyses
     
     def classify_skin_type_ai_2025(self, skin_analysis: Dict) -> str:
         """2025년 AI 기반 피부 타입 분류"""
@@ -446,64 +2624,98 @@ class ModernSkinAnalyzer:
         else:
             return "정상"
     
-    def init_age_model(self):
-        """나이 분석을 위한 ViT 모델 초기화"""
-        try:
-            model = ViTForImageClassification.from_pretrained('nateraw/vit-age-classifier')
-            transforms = ViTFeatureExtractor.from_pretrained('nateraw/vit-age-classifier')
-            return model, transforms
-        except Exception as e:
-            logger.error(f"나이 분석 모델 로드 실패: {e}")
-            return None, None
+    # 나이 범위 매핑
+    AGE_RANGES = {
+        0: "0-2",
+        1: "3-9",
+        2: "10-19",
+        3: "20-29",
+        4: "30-39",
+        5: "40-49",
+        6: "50-59",
+        7: "60-69",
+        8: "70+"
+    }
 
-    def analyze_age_2025(self, face_image: np.ndarray) -> tuple:
-        """2025년 AI 기반 연령대 분석"""
+    def init_age_model(self) -> tuple:
+        """나이 분석을 위한 ViT 모델 초기화 - (추론 백엔드, 입력 설정) 반환
+        
+        AGE_INFERENCE_PROCESS=1이면 모델은 별도 추론 워커 프로세스에서 로드/실행합니다.
+        """
+        if AGE_INFERENCE_PROCESS:
+            try:
+                backend = ProcessAgeBackend()
+                logger.info(f"✨ 연령대 모델 백엔드: {backend.name} (워커 {backend.worker_backend})")
+                return backend, backend.input_spec
+            except Exception as e:
+                logger.warning(f"연령대 추론 프로세스 시작 실패, 서버 프로세스에서 실행: {e}")
+        
+        return load_age_model()
+
+    def prepare_age_inputs(self, face_images: List[np.ndarray]) -> np.ndarray:
+        """RGB 얼굴 crop을 PIL 변환 없이 ViT 입력 배열(NCHW float32)로 변환"""
+        return prepare_age_inputs(face_images, self.age_input_spec)
+
+    def analyze_age_batch_2025(self, face_images: List[np.ndarray]) -> List[tuple]:
+        """여러 얼굴 이미지의 연령대를 한 번의 배치 추론으로 분석"""
+        # 모델이 로드되지 않은 경우 기본값 반환
+        if self.age_backend is None or not face_images:
+            FALLBACK_COUNT.labels("age", "model_unavailable").inc(len(face_images))
+            return [("20-29", 0.6) for _ in face_images]
+        
         try:
-            # OpenCV 이미지를 PIL Image로 변환
-            pil_image = Image.fromarray(cv2.cvtColor(face_image, cv2.COLOR_BGR2RGB))
-            
-            # 모델이 로드되지 않은 경우 기본값 반환
-            if self.age_model is None or self.age_transforms is None:
-                return "20-29", 0.6
-            
-            # 이미지 변환 및 모델 추론
-            inputs = self.age_transforms(pil_image, return_tensors='pt')
-            outputs = self.age_model(**inputs)
-            
             # 클래스별 확률 계산
-            probs = outputs.logits.softmax(1)
-            pred_class = probs.argmax(1).item()
-            confidence = probs[0][pred_class].item()
-            
-            # 나이 범위 매핑
-            age_ranges = {
-                0: "0-2",
-                1: "3-9",
-                2: "10-19",
-                3: "20-29",
-                4: "30-39",
-                5: "40-49",
-                6: "50-59",
-                7: "60-69",
-                8: "70+"
-            }
-            
-            predicted_range = age_ranges[pred_class]
+            probs = self.age_backend.predict_faces(face_images, self.age_input_spec)
+            pred_classes = probs.argmax(1)
+            confidences = probs[np.arange(len(pred_classes)), pred_classes]
             
-            return predicted_range, min(confidence + 0.1, 1.0)  # 신뢰도 약간 상향 조정
+            return [
+                (self.AGE_RANGES[int(pred_class)], min(float(confidence) + 0.1, 1.0))  # 신뢰도 약간 상향 조정
+                for pred_class, confidence in zip(pred_classes, confidences)
+            ]
             
         except Exception as e:
             logger.error(f"나이 분석 중 오류 발생: {e}")
-            return "20-29", 0.6  # 오류 발생 시 기본값 반환
+            FALLBACK_COUNT.labels("age", "error").inc(len(face_images))
+            return [("20-29", 0.6) for _ in face_images]  # 오류 발생 시 기본값 반환
+
+    async def analyze_age_async(self, face_image: np.ndarray) -> tuple:
+        """마이크로 배치를 통한 연령대 분석 (배치 대기 시간 포함 측정)"""
+        with track_stage("age"):
+            return await self.age_batcher.submit(face_image)
+
+    async def resolve_age(self, age_task: Optional[asyncio.Future], face_image: np.ndarray,
+                          face_context: FrameContext, plan: AnalysisPlan) -> tuple:
+        """연령대 결과 - 모델 결과를 남은 예산까지 기다리고, 생략/기한 초과 시 analyze_age_fallback으로 대체"""
+        if age_task is not None:
+            budget = plan.budget()
+            try:
+                # 기한을 넘겨도 같은 마이크로 배치의 다른 요청을 위해 추론은 취소하지 않음
+                result = await asyncio.wait_for(asyncio.shield(age_task), budget)
+                plan.ran("age_model")
+                return result
+            except asyncio.TimeoutError:
+                plan.skip("age_model", "deadline")
+        
+        with track_stage("age_fallback"):
+            result = await self.run_cv(self.analyze_age_fallback, face_image, face_context)
+        plan.ran("age_fallback")
+        return result
+
+    def analyze_age_2025(self, face_image: np.ndarray) -> tuple:
+        """2025년 AI 기반 연령대 분석"""
+        return self.analyze_age_batch_2025([face_image])[0]
 
-    def analyze_age_fallback(self, face_image: np.ndarray) -> tuple:
+    def analyze_age_fallback(self, face_image: np.ndarray, context: Optional[FrameContext] = None) -> tuple:
         """기존 방식의 연령대 분석 (폴백 메서드)"""
         try:
+            context = context or FrameContext(face_image)
+            
             # 얼굴 이미지를 그레이스케일로 변환
-            gray = cv2.cvtColor(face_image, cv2.COLOR_RGB2GRAY)
+            gray = context.gray
             
             # 1. 피부 텍스처 분석
-            texture_variance = np.var(gray.astype(np.float64))
+            texture_variance = context.gray_stats(masked=False)[1] ** 2
             
             # 2. 주름 분석 (개선된 Canny 엣지 디텍션)
             blurred = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -511,15 +2723,14 @@ class ModernSkinAnalyzer:
             wrinkle_density = np.sum(edges) / (edges.shape[0] * edges.shape[1])
             
             # 3. 피부 톤 균일성 분석
-            lab = cv2.cvtColor(face_image, cv2.COLOR_RGB2LAB)
-            l_channel = lab[:,:,0]
-            tone_variance = np.var(l_channel)
+            l_mean, l_std = cv2.meanStdDev(context.l_channel)
+            tone_variance = float(l_std[0, 0]) ** 2
             
             # 4. 피부 밝기 분석
-            brightness = np.mean(l_channel)
+            brightness = float(l_mean[0, 0])
             
             # 5. 피부 대비 분석
-            contrast = np.std(l_channel)
+            contrast = float(l_std[0, 0])
             
             # 6. 텍스처 패턴 분석
             texture_pattern = cv2.cornerHarris(gray, 2, 3, 0.04)
@@ -561,118 +2772,419 @@ class ModernSkinAnalyzer:
             max_age = min(70, int(base_age + range_width))
             age_range = f"{min_age}~{max_age}세"
             
-            # 신뢰도 계산 (0.6-1.0)
-            confidence_factors = [
-                1 - (texture_variance / 1000),
-                1 - (wrinkle_density * 5),
-                1 - (tone_variance / 500),
-                1 - abs(contrast - 50) / 100,
-                1 - abs(brightness - 128) / 256
-            ]
+            # 신뢰도 계산 (0.6-1.0)
+            confidence_factors = [
+                1 - (texture_variance / 1000),
+                1 - (wrinkle_density * 5),
+                1 - (tone_variance / 500),
+                1 - abs(contrast - 50) / 100,
+                1 - abs(brightness - 128) / 256
+            ]
+            
+            confidence = min(1.0, max(0.6, sum(confidence_factors) / len(confidence_factors)))
+            
+            logger.info(f"연령대 분석 상세 (폴백) - 텍스처: {texture_score:.1f}, 주름: {wrinkle_score:.1f}, " +
+                       f"톤: {tone_score:.1f}, 밝기: {brightness_score:.1f}, 대비: {contrast_score:.1f}")
+            
+            return age_range, float(confidence)
+            
+        except Exception as e:
+            logger.error(f"연령대 분석 오류 (폴백): {e}")
+            return "분석 불가", 0.0
+
+    @staticmethod
+    def plan_fields(plan: Optional[AnalysisPlan]) -> Dict:
+        """결과에 기록할 품질 단계와 실행/생략된 단계"""
+        if plan is None:
+            return {}
+        return {"analysis_mode": plan.mode, "stages_run": list(plan.stages_run), "stages_skipped": list(plan.stages_skipped)}
+    
+    def build_failed_result(self, face_detection_result: Dict, start_time: float,
+                            plan: Optional[AnalysisPlan] = None) -> SkinAnalysisResult:
+        """얼굴을 찾지 못했거나 신뢰도가 낮을 때의 분석 결과"""
+        return SkinAnalysisResult(
+            skin_type="분석 실패",
+            moisture_level=0,
+            oil_level=0,
+            blemish_count=0,
+            skin_tone="분석 실패",
+            wrinkle_level=0,
+            pore_size="분석 실패",
+            overall_score=0,
+            avg_skin_color={'r': 0, 'g': 0, 'b': 0},
+            face_detected=False,
+            confidence=face_detection_result.get("confidence", 0.0),
+            skin_area_percentage=0,
+            detected_features=[],
+            processing_time=time.time() - start_time,
+            api_method="2025_ai_failed",
+            age_range="분석 불가",
+            age_confidence=0.0,
+            blemish_map=self.empty_blemish_map(),
+            **self.plan_fields(plan)
+        )
+    
+    def build_analysis_result(self, face_detection_result: Dict, parsing_result: Dict, skin_analysis: Dict,
+                              skin_tone: str, blemishes: Dict, age_result: tuple,
+                              start_time: float, plan: Optional[AnalysisPlan] = None) -> SkinAnalysisResult:
+        """단계별 분석 결과로 분류/점수를 계산하여 최종 결과 구성"""
+        # AI 기반 분류
+        skin_type = self.classify_skin_type_ai_2025(skin_analysis)
+        
+        # 수분도/유분도 (2025년 AI 계산)
+        moisture_level, oil_level = self.calculate_levels_ai_2025(skin_type, skin_analysis)
+        
+        # 기타 계산
+        wrinkle_level = min(5, max(1, int(skin_analysis['skin_texture_variance'] / 120) + 1))
+        pore_size = self.determine_pore_size_2025(skin_type, skin_analysis)
+        
+        # 2025년 종합 점수
+        overall_score = self.calculate_overall_score_2025(skin_analysis, blemishes["count"], wrinkle_level)
+        
+        age_range, age_confidence = age_result
+        
+        return SkinAnalysisResult(
+            skin_type=skin_type,
+            moisture_level=int(moisture_level),
+            oil_level=int(oil_level),
+            blemish_count=blemishes["count"],
+            skin_tone=skin_tone,
+            wrinkle_level=wrinkle_level,
+            pore_size=pore_size,
+            overall_score=int(overall_score),
+            avg_skin_color=skin_analysis['avg_skin_color'],
+            face_detected=True,
+            confidence=face_detection_result["confidence"],
+            skin_area_percentage=skin_analysis['skin_area_percentage'],
+            detected_features=parsing_result['labels_found'],
+            processing_time=time.time() - start_time,
+            api_method="2025_advanced_ai",
+            age_range=age_range,
+            age_confidence=age_confidence,
+            blemish_map=blemishes,
+            face_region=face_detection_result.get("region", {}),
+            **self.plan_fields(plan)
+        )
+
+    @staticmethod
+    def crop_face(image: np.ndarray, bbox: Dict) -> np.ndarray:
+        """bbox 영역의 얼굴 이미지 추출"""
+        return image[
+            bbox["ymin"]:bbox["ymin"]+bbox["height"],
+            bbox["xmin"]:bbox["xmin"]+bbox["width"]
+        ]
+
+    async def locate_face(self, image: np.ndarray, source_shape: Optional[tuple] = None,
+                          plan: Optional[AnalysisPlan] = None) -> tuple:
+        """전처리와 얼굴 감지 - (감지 결과, 분석 이미지, 분석 이미지 컨텍스트) 반환
+        
+        full 모드는 전체 프레임을 전처리한 뒤 감지하고, roi 모드는 축소 썸네일에서 감지한 bbox를 원본 해상도로
+        되돌려 여백을 둔 얼굴 영역만 고정 해상도로 전처리합니다. 감지 결과의 bbox는 분석 이미지 좌표계입니다.
+        """
+        plan = plan or self.new_plan()
+        if PIPELINE_MODE == "roi":
+            with track_stage("detect_face"):
+                detection = await self.run_cv(self.detect_face_thumbnail, image, ROI_DETECT_MAX_SIDE)
+            plan.ran("detect_face")
+            if not detection["face_detected"] or detection["confidence"] < self.min_face_confidence:
+                return detection, None, None
+            
+            with track_stage("preprocess"):
+                roi, face_bbox, source_rect = await self.run_cv(
+                    self.extract_face_roi, image, detection["bbox"], ROI_PADDING, ROI_ANALYSIS_SIZE, plan
+                )
+            plan.ran("preprocess")
+            return {**detection, "bbox": face_bbox}, roi, FrameContext(roi, source_rect=source_rect)
+        
+        # 1. 2025년 향상된 전처리
+        with track_stage("preprocess"):
+            processed_image = await self.run_cv(self.preprocess_image_2025, image, source_shape, plan)
+        plan.ran("preprocess")
+        
+        # 요청 단위 색공간 변환/마스크 캐시 (단계 간 공유)
+        frame_context = FrameContext(processed_image)
+        
+        # 2. 향상된 얼굴 감지
+        with track_stage("detect_face"):
+            detection = await self.run_cv(self.detect_face, processed_image, frame_context)
+        plan.ran("detect_face")
+        return detection, processed_image, frame_context
+    
+    def blemish_inputs(self, analysis_image: np.ndarray, analysis_context: FrameContext,
+                       face_image: np.ndarray, face_context: FrameContext,
+                       bbox: Dict, skin_mask: Optional[np.ndarray], plan: AnalysisPlan,
+                       full_frame: bool = True) -> tuple:
+        """잡티 감지 대상 (이미지, 피부 마스크, 컨텍스트)
+        
+        roi 모드(또는 계획이 blemishes_full을 생략하면)는 피부 마스크와 같은 얼굴 영역, full 모드는 기존과 같이
+        전처리된 전체 프레임을 사용하며 얼굴 영역 기준의 피부 마스크를 전체 프레임 좌표에 배치합니다 (얼굴 밖은 0).
+        다중 얼굴 분석(full_frame=False)은 얼굴마다 전체 프레임을 반복 처리하지 않도록 항상 얼굴 영역을 사용합니다.
+        """
+        if PIPELINE_MODE == "roi" or not full_frame or not plan.allow("blemishes_full"):
+            plan.ran("blemishes_face")
+            return face_image, skin_mask, face_context
+        plan.ran("blemishes_full")
+        if skin_mask is None or skin_mask.shape[:2] != face_image.shape[:2]:
+            return analysis_image, skin_mask, analysis_context
+        
+        # 얼굴 영역 크기의 마스크를 전체 프레임과 함께 넘기면 크기가 달라 잡티가 항상 0개로 집계되었음
+        frame_mask = np.zeros(analysis_image.shape[:2], dtype=np.uint8)
+        self.crop_face(frame_mask, bbox)[:] = skin_mask
+        return analysis_image, frame_mask, analysis_context
+
+    async def analyze_image(self, image: np.ndarray, source_shape: Optional[tuple] = None,
+                            plan: Optional[AnalysisPlan] = None) -> SkinAnalysisResult:
+        """2025년 최신 AI 기반 이미지 분석 (source_shape = 축소 디코딩 전 원본 높이, 너비)
+        
+        plan(품질 단계/기한)에 따라 선택 단계를 실행하거나 대체하며, 실행/생략된 단계를 결과에 기록합니다.
+        """
+        start_time = time.time()
+        plan = plan or self.new_plan()
+        
+        try:
+            with track_stage("analysis_total"):
+                # 1~2. 전처리 및 얼굴 감지 (파이프라인 모드별)
+                face_detection_result, analysis_image, analysis_context = await self.locate_face(image, source_shape, plan)
+                
+                if not face_detection_result["face_detected"] or face_detection_result["confidence"] < self.min_face_confidence:
+                    return self.build_failed_result(face_detection_result, start_time, plan)
+                
+                return await self.analyze_located_face(
+                    face_detection_result, analysis_image, analysis_context, plan, start_time
+                )
+            
+        except Exception as e:
+            logger.error(f"2025년 이미지 분석 오류: {e}")
+            raise HTTPException(status_code=500, detail=f"분석 중 오류 발생: {str(e)}")
+    
+    async def analyze_located_face(self, face_detection_result: Dict, analysis_image: np.ndarray,
+                                   analysis_context: FrameContext, plan: AnalysisPlan, start_time: float,
+                                   full_frame: bool = True) -> SkinAnalysisResult:
+        """감지된 얼굴 하나의 피부/잡티/연령대 분석 (bbox는 analysis_image 좌표계)"""
+        # 3. 얼굴 영역 추출
+        face_image = self.crop_face(analysis_image, face_detection_result["bbox"])
+        face_context = analysis_context.crop(face_detection_result["bbox"])
+        face_detection_result = {**face_detection_result, "region": self.normalized_region(face_context.source_rect)}
+        
+        # 4. 기존 피부 분석 진행 (연령대 추론은 파싱과 동시에 시작)
+        age_task = None
+        if plan.allow("age_model"):
+            age_task = asyncio.ensure_future(plan.timed("age_model", self.analyze_age_async(face_image)))
+        try:
+            with track_stage("face_parsing"):
+                parsing_result = await self.advanced_face_parsing(face_image, face_context, plan)
+            with track_stage("skin_analysis"):
+                skin_analysis = await self.run_cv(
+                    self.analyze_skin_advanced_2025, face_image, parsing_result, face_context
+                )
+            plan.ran("skin_analysis")
+            
+            # 5. 2025년 향상된 피부톤 분석
+            skin_tone = self.analyze_skin_tone_ai_2025(skin_analysis['avg_skin_color'])
             
-            confidence = min(1.0, max(0.6, sum(confidence_factors) / len(confidence_factors)))
+            # 6. 잡티 감지 (2025년 고급 알고리즘)
+            blemish_image, skin_mask, blemish_context = self.blemish_inputs(
+                analysis_image, analysis_context, face_image, face_context,
+                face_detection_result["bbox"], parsing_result['masks'].get('skin', None), plan, full_frame
+            )
+            with track_stage("blemishes"):
+                with plan.measure("blemishes_full") if blemish_image is analysis_image else nullcontext():
+                    blemishes = await self.run_cv(
+                        self.detect_blemishes_ai_2025, blemish_image, skin_mask, blemish_context
+                    )
             
-            logger.info(f"연령대 분석 상세 (폴백) - 텍스처: {texture_score:.1f}, 주름: {wrinkle_score:.1f}, " +
-                       f"톤: {tone_score:.1f}, 밝기: {brightness_score:.1f}, 대비: {contrast_score:.1f}")
+            # 7. 연령대 분석 (2025년 신규 추가)
+            age_result = await self.resolve_age(age_task, face_image, face_context, plan)
+        except BaseException:
+            # 파싱/피부 분석이 실패하거나 요청이 취소되면 시작해 둔 연령대 추론을 남기지 않음
+            if age_task is not None and not age_task.done():
+                age_task.cancel()
+            raise
+        
+        # 8. 분류 및 종합 점수
+        return self.build_analysis_result(
+            face_detection_result, parsing_result, skin_analysis,
+            skin_tone, blemishes, age_result, start_time, plan
+        )
+    
+    async def locate_faces(self, image: np.ndarray, source_shape: Optional[tuple] = None,
+                           plan: Optional[AnalysisPlan] = None) -> List[tuple]:
+        """다중 얼굴용 전처리와 감지 - 얼굴별 (감지 결과, 분석 이미지, 분석 이미지 컨텍스트, 얼굴별 계획) 목록
+        
+        full 모드는 전체 프레임을 한 번 전처리해 모든 얼굴이 공유하고, roi 모드는 썸네일에서 감지한 얼굴마다
+        원본 해상도의 얼굴 영역을 CV 스레드 풀에서 동시에 전처리합니다.
+        """
+        plan = plan or self.new_plan()
+        if PIPELINE_MODE == "roi":
+            with track_stage("detect_face"):
+                detections = await self.run_cv(self.detect_all_faces, image, ROI_DETECT_MAX_SIDE)
+            plan.ran("detect_face")
+            plans = [plan.fork() for _ in detections]
             
-            return age_range, float(confidence)
+            with track_stage("preprocess"):
+                rois = await asyncio.gather(*[
+                    self.run_cv(self.extract_face_roi, image, detection["bbox"], ROI_PADDING, ROI_ANALYSIS_SIZE, face_plan)
+                    for detection, face_plan in zip(detections, plans)
+                ])
+            for face_plan in plans:
+                face_plan.ran("preprocess")
+            return [
+                ({**detection, "bbox": face_bbox}, roi, FrameContext(roi, source_rect=source_rect), face_plan)
+                for detection, (roi, face_bbox, source_rect), face_plan in zip(detections, rois, plans)
+            ]
+        
+        with track_stage("preprocess"):
+            processed_image = await self.run_cv(self.preprocess_image_2025, image, source_shape, plan)
+        plan.ran("preprocess")
+        frame_context = FrameContext(processed_image)
+        
+        with track_stage("detect_face"):
+            detections = await self.run_cv(self.detect_all_faces, processed_image, None, MULTI_FACE_MAX_FACES, frame_context)
+        plan.ran("detect_face")
+        return [(detection, processed_image, frame_context, plan.fork()) for detection in detections]
+    
+    async def analyze_faces(self, image: np.ndarray, source_shape: Optional[tuple] = None,
+                            plan: Optional[AnalysisPlan] = None) -> List[SkinAnalysisResult]:
+        """프레임의 모든 얼굴을 동시에 분석 (면적이 큰 순, 얼굴이 없으면 빈 목록)
+        
+        얼굴별 파싱/피부 분석/잡티 감지는 CV 스레드 풀(스레드별 검출기 인스턴스)과 원격 호출에서 함께 진행되고
+        연령대 추론은 마이크로 배처에서 한 번의 배치로 묶이므로, 처리 시간은 얼굴 수보다 단일 얼굴 분석에 가깝습니다.
+        얼굴별 계획은 요청의 품질 단계와 기한을 공유합니다.
+        """
+        start_time = time.time()
+        plan = plan or self.new_plan()
+        
+        try:
+            with track_stage("multi_face_total"):
+                located = await self.locate_faces(image, source_shape, plan)
+                results = await asyncio.gather(*[
+                    self.analyze_located_face(detection, analysis_image, analysis_context, face_plan, start_time,
+                                              full_frame=False)
+                    for detection, analysis_image, analysis_context, face_plan in located
+                ])
+            # 기한 때문에 대체된 얼굴이 하나라도 있으면 프레임 결과 전체를 캐시하지 않음
+            plan.deadline_limited = plan.deadline_limited or any(face_plan.deadline_limited for *_, face_plan in located)
+            return list(results)
             
+        except HTTPException:
+            raise
         except Exception as e:
-            logger.error(f"연령대 분석 오류 (폴백): {e}")
-            return "분석 불가", 0.0
-
-    async def analyze_image(self, image: np.ndarray) -> SkinAnalysisResult:
-        """2025년 최신 AI 기반 이미지 분석"""
+            logger.error(f"다중 얼굴 분석 오류: {e}")
+            raise HTTPException(status_code=500, detail=f"분석 중 오류 발생: {str(e)}")
+    
+    async def analyze_images_batch(self, images: List[np.ndarray],
+                                   source_shapes: Optional[List[tuple]] = None) -> List[SkinAnalysisResult]:
+        """여러 이미지를 함께 분석 (연령대 모델은 한 번의 배치, 피부 통계는 벡터화 계산)
+        
+        단계 메트릭은 배치 전체 기준이므로 단일 분석과 구분해 batch_ 접두사로 기록합니다.
+        """
         start_time = time.time()
+        # 배치는 모든 단계를 실행하며 (accurate) 이미지별로 실행 단계를 기록
+        plans = [self.new_plan("accurate") for _ in images]
         
         try:
-            # 1. 2025년 향상된 전처리
-            processed_image = self.preprocess_image_2025(image)
-            
-            # 2. 향상된 얼굴 감지
-            face_detection_result = self.detect_face(processed_image)
-            
-            if not face_detection_result["face_detected"] or face_detection_result["confidence"] < self.min_face_confidence:
-                return SkinAnalysisResult(
-                    skin_type="분석 실패",
-                    moisture_level=0,
-                    oil_level=0,
-                    blemish_count=0,
-                    skin_tone="분석 실패",
-                    wrinkle_level=0,
-                    pore_size="분석 실패",
-                    overall_score=0,
-                    avg_skin_color={'r': 0, 'g': 0, 'b': 0},
-                    face_detected=False,
-                    confidence=face_detection_result.get("confidence", 0.0),
-                    skin_area_percentage=0,
-                    detected_features=[],
-                    processing_time=time.time() - start_time,
-                    api_method="2025_ai_failed",
-                    age_range="분석 불가",
-                    age_confidence=0.0
-                )
-
-            # 3. 얼굴 영역 추출
-            bbox = face_detection_result["bbox"]
-            face_image = processed_image[
-                bbox["ymin"]:bbox["ymin"]+bbox["height"],
-                bbox["xmin"]:bbox["xmin"]+bbox["width"]
+            # 1. 전처리와 얼굴 감지는 이미지별로 병렬 실행
+            with track_stage("batch_locate_face"):
+                located = await asyncio.gather(*[
+                    self.locate_face(image, source_shape, plan)
+                    for image, source_shape, plan in zip(images, source_shapes or [None] * len(images), plans)
+                ])
+            detections, analysis_images, contexts = map(list, zip(*located))
+            
+            analyzable = [
+                i for i, detection in enumerate(detections)
+                if detection["face_detected"] and detection["confidence"] >= self.min_face_confidence
+            ]
+            results: List[Optional[SkinAnalysisResult]] = [
+                None if i in analyzable else self.build_failed_result(detections[i], start_time, plans[i])
+                for i in range(len(images))
             ]
+            if not analyzable:
+                return results
             
-            # 4. 기존 피부 분석 진행
-            parsing_result = await self.advanced_face_parsing(face_image)
-            skin_analysis = self.analyze_skin_advanced_2025(face_image, parsing_result)
+            faces = [self.crop_face(analysis_images[i], detections[i]["bbox"]) for i in analyzable]
+            face_contexts = [contexts[i].crop(detections[i]["bbox"]) for i in analyzable]
             
-            # 5. AI 기반 분류
-            skin_type = self.classify_skin_type_ai_2025(skin_analysis)
+            # 2. 연령대는 한 번의 배치 추론, 원격 파싱은 동시 호출
+            age_task = asyncio.ensure_future(self.run_torch(self.analyze_age_batch_2025, faces))
+            with track_stage("batch_face_parsing"):
+                parsing_results = await asyncio.gather(*[
+                    self.advanced_face_parsing(face, context, plans[i])
+                    for i, face, context in zip(analyzable, faces, face_contexts)
+                ])
             
-            # 6. 2025년 향상된 피부톤 분석
-            skin_tone = self.analyze_skin_tone_ai_2025(skin_analysis['avg_skin_color'])
+            # 3. 피부 색상/텍스처 통계와 피부톤을 벡터화 계산
+            with track_stage("batch_skin_analysis"):
+                skin_analyses = await self.run_cv(self.analyze_skin_batch_2025, faces, parsing_results, face_contexts)
+            skin_tones = self.analyze_skin_tone_batch_2025(np.array([
+                [a['avg_skin_color']['r'], a['avg_skin_color']['g'], a['avg_skin_color']['b']]
+                for a in skin_analyses
+            ], dtype=np.float64))
             
-            # 7. 수분도/유분도 (2025년 AI 계산)
-            moisture_level, oil_level = self.calculate_levels_ai_2025(skin_type, skin_analysis)
-            
-            # 8. 잡티 감지 (2025년 고급 알고리즘)
-            skin_mask = parsing_result['masks'].get('skin', None)
-            blemish_count = self.detect_blemishes_ai_2025(processed_image, skin_mask)
-            
-            # 9. 연령대 분석 (2025년 신규 추가)
-            age_range, age_confidence = self.analyze_age_2025(face_image)
-            
-            # 10. 기타 계산
-            wrinkle_level = min(5, max(1, int(skin_analysis['skin_texture_variance'] / 120) + 1))
-            pore_size = self.determine_pore_size_2025(skin_type, skin_analysis)
-            
-            # 11. 2025년 종합 점수
-            overall_score = self.calculate_overall_score_2025(skin_analysis, blemish_count, wrinkle_level)
-            
-            processing_time = time.time() - start_time
-            
-            return SkinAnalysisResult(
-                skin_type=skin_type,
-                moisture_level=int(moisture_level),
-                oil_level=int(oil_level),
-                blemish_count=blemish_count,
-                skin_tone=skin_tone,
-                wrinkle_level=wrinkle_level,
-                pore_size=pore_size,
-                overall_score=int(overall_score),
-                avg_skin_color=skin_analysis['avg_skin_color'],
-                face_detected=True,
-                confidence=face_detection_result["confidence"],
-                skin_area_percentage=skin_analysis['skin_area_percentage'],
-                detected_features=parsing_result['labels_found'],
-                processing_time=processing_time,
-                api_method="2025_advanced_ai",
-                age_range=age_range,
-                age_confidence=age_confidence
-            )
+            # 4. 잡티 감지
+            blemish_jobs = []
+            for i, face, face_context, parsing_result in zip(analyzable, faces, face_contexts, parsing_results):
+                blemish_image, skin_mask, blemish_context = self.blemish_inputs(
+                    analysis_images[i], contexts[i], face, face_context,
+                    detections[i]["bbox"], parsing_result['masks'].get('skin', None), plans[i]
+                )
+                blemish_jobs.append(self.run_cv(
+                    self.detect_blemishes_ai_2025, blemish_image, skin_mask, blemish_context
+                ))
+            with track_stage("batch_blemishes"):
+                blemish_maps = await asyncio.gather(*blemish_jobs)
+            with track_stage("batch_age"):
+                age_results = await age_task
+            
+            for j, i in enumerate(analyzable):
+                plans[i].ran("skin_analysis")
+                plans[i].ran("age_model")
+                results[i] = self.build_analysis_result(
+                    detections[i], parsing_results[j], skin_analyses[j],
+                    skin_tones[j], blemish_maps[j], age_results[j], start_time, plans[i]
+                )
+            return results
             
         except Exception as e:
-            logger.error(f"2025년 이미지 분석 오류: {e}")
+            logger.error(f"배치 이미지 분석 오류: {e}")
             raise HTTPException(status_code=500, detail=f"분석 중 오류 발생: {str(e)}")
     
+    async def analyze_image_cached(self, image: np.ndarray, source_shape: Optional[tuple] = None,
+                                   plan: Optional[AnalysisPlan] = None, multi_face: bool = False):
+        """결과 캐시를 거치는 이미지 분석 (재시도/중복 요청은 한 번만 계산)
+        
+        키에 품질 단계와 다중 얼굴 여부를 포함하며, 기한 때문에 단계가 대체된 결과는 저장하지 않습니다.
+        기한이 있는 요청은 진행 중인 계산에 합류하지 않고(기한 없이 기다리게 되므로) 다른 요청과 공유하지도 않습니다
+        (기한 때문에 대체된 결과가 기한 없는 요청에 전달되므로). 캐시 적중이나 합류로 받은 결과의
+        stages_run/stages_skipped는 이 요청의 계획 기록(result_cache)으로 바꿉니다.
+        multi_face이면 analyze_faces의 얼굴별 결과 목록을 반환합니다.
+        """
+        plan = plan or self.new_plan()
+        analyze = self.analyze_faces if multi_face else self.analyze_image
+        if not self.result_cache.enabled:
+            return await analyze(image, source_shape, plan)
+        
+        computed = False
+        
+        async def compute():
+            nonlocal computed
+            computed = True
+            return await analyze(image, source_shape, plan)
+        
+        key = f"{plan.mode}:{'multi:' if multi_face else ''}" + await self.run_cv(self.result_cache.make_key, image)
+        result = await self.result_cache.get_or_compute(
+            key, compute, lambda result: not plan.deadline_limited, coalesce=plan.deadline is None
+        )
+        if computed:
+            return result
+        
+        # 저장된 결과는 여러 요청이 공유하므로 복사본에 이 요청의 단계 기록을 담음
+        plan.ran("result_cache")
+        stages = {"stages_run": list(plan.stages_run), "stages_skipped": list(plan.stages_skipped)}
+        if multi_face:
+            return [replace(face, **stages) for face in result]
+        return replace(result, **stages)
+    
     def analyze_skin_tone_ai_2025(self, avg_color: Dict[str, float]) -> str:
         """2025년 AI 기반 피부톤 분석"""
         try:
@@ -703,6 +3215,33 @@ class ModernSkinAnalyzer:
             logger.error(f"2025년 피부톤 분석 오류: {e}")
             return "분석 불가"
     
+    SKIN_TONE_LABELS = [
+        "매우 밝은 쿨톤 (Type I)",
+        "밝은 쿨톤 (Type II)",
+        "중간 쿨톤 (Type III)",
+        "중간 웜톤 (Type IV)",
+        "어두운 웜톤 (Type V)",
+        "매우 어두운 웜톤 (Type VI)"
+    ]
+    
+    def analyze_skin_tone_batch_2025(self, avg_colors: np.ndarray) -> List[str]:
+        """analyze_skin_tone_ai_2025의 ITA° 분류를 (N, 3) RGB 평균 배열에 대해 벡터화 계산"""
+        if len(avg_colors) == 0:
+            return []
+        
+        cube_roots = np.cbrt(avg_colors / 255)
+        r = avg_colors[:, 0]
+        L = np.where(r > 20, 116 * cube_roots[:, 0] - 16, 0.0)
+        b_val = 200 * (cube_roots[:, 1] - cube_roots[:, 2])
+        ita = np.degrees(np.arctan(np.divide(L, b_val, out=np.zeros_like(L), where=b_val != 0)))
+        
+        label_index = np.select(
+            [ita > 55, ita > 41, ita > 28, ita > 10, ita > -30],
+            [0, 1, 2, 3, 4],
+            default=5
+        )
+        return [self.SKIN_TONE_LABELS[i] for i in label_index]
+    
     def calculate_levels_ai_2025(self, skin_type: str, skin_analysis: Dict) -> tuple:
         """2025년 AI 기반 수분도/유분도 계산"""
         base_values = {
@@ -728,40 +3267,138 @@ class ModernSkinAnalyzer:
         
         return int(moisture), int(oil)
     
-    def detect_blemishes_ai_2025(self, image: np.ndarray, skin_mask: np.ndarray) -> int:
-        """2025년 AI 기반 잡티 감지"""
+    @staticmethod
+    def blemish_components(l_channel: np.ndarray, skin_binary: Optional[np.ndarray]) -> tuple:
+        """적응형 임계값/열림 연산 후 연결 요소 통계 - 배경을 제외한 (stats, centroids)"""
+        # 적응형 임계값 (2025년 최적화)
+        adaptive_thresh = cv2.adaptiveThreshold(
+            l_channel, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+            cv2.THRESH_BINARY_INV, 15, BLEMISH_MIN_CONTRAST
+        )
+        if skin_binary is not None:
+            adaptive_thresh = cv2.bitwise_and(adaptive_thresh, skin_binary)
+        
+        # 2025년 고급 노이즈 제거
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        cleaned = cv2.morphologyEx(adaptive_thresh, cv2.MORPH_OPEN, kernel)
+        
+        _, _, stats, centroids = cv2.connectedComponentsWithStats(cleaned)
+        return stats[1:], centroids[1:]
+    
+    def blemish_components_tiled(self, l_channel: np.ndarray, skin_binary: Optional[np.ndarray],
+                                 tile_size: int = BLEMISH_TILE_SIZE, halo: int = BLEMISH_TILE_HALO) -> tuple:
+        """큰 이미지는 여백을 둔 타일 단위로 연결 요소를 구하고, 중심점이 타일 안에 있는 요소만 그 타일이 보고
+        
+        여백이 임계값 블록(15px)과 열림 연산 반경보다 넓으므로 여백 안에 들어가는 요소는 전체 이미지 처리와 같은 결과입니다.
+        """
+        height, width = l_channel.shape[:2]
+        if max(height, width) <= tile_size:
+            return self.blemish_components(l_channel, skin_binary)
+        
+        tile_stats, tile_centroids = [], []
+        for y0 in range(0, height, tile_size):
+            for x0 in range(0, width, tile_size):
+                y1, x1 = min(height, y0 + tile_size), min(width, x0 + tile_size)
+                py0, px0 = max(0, y0 - halo), max(0, x0 - halo)
+                region = (slice(py0, min(height, y1 + halo)), slice(px0, min(width, x1 + halo)))
+                stats, centroids = self.blemish_components(
+                    l_channel[region], skin_binary[region] if skin_binary is not None else None
+                )
+                centroids = centroids + (px0, py0)
+                owned = (
+                    (centroids[:, 0] >= x0) & (centroids[:, 0] < x1) &
+                    (centroids[:, 1] >= y0) & (centroids[:, 1] < y1)
+                )
+                stats = stats[owned]
+                stats[:, cv2.CC_STAT_LEFT] += px0
+                stats[:, cv2.CC_STAT_TOP] += py0
+                tile_stats.append(stats)
+                tile_centroids.append(centroids[owned])
+        return np.concatenate(tile_stats), np.concatenate(tile_centroids)
+    
+    @staticmethod
+    def blemish_candidates(stats: np.ndarray) -> np.ndarray:
+        """면적 범위, 채움 비율, 가로세로 비로 잡티 후보를 고르는 불리언 마스크 (통계 배열 벡터 연산)"""
+        areas = stats[:, cv2.CC_STAT_AREA]
+        widths = stats[:, cv2.CC_STAT_WIDTH]
+        heights = stats[:, cv2.CC_STAT_HEIGHT]
+        return (
+            (areas > BLEMISH_MIN_AREA) & (areas < BLEMISH_MAX_AREA) &
+            (areas >= BLEMISH_MIN_FILL * widths * heights) &
+            (np.maximum(widths, heights) <= BLEMISH_MAX_ASPECT * np.minimum(widths, heights))
+        )
+    
+    @staticmethod
+    def normalized_region(source_rect: tuple) -> Dict:
+        """원본 대비 0~1 비율 영역 (x, y, 너비, 높이)의 응답 형식"""
+        x, y, width, height = source_rect
+        return {"x": round(x, 4), "y": round(y, 4), "width": round(width, 4), "height": round(height, 4)}
+    
+    @staticmethod
+    def empty_blemish_map() -> Dict:
+        return {"count": 0, "total": 0, "locations": [], "heatmap": [], "region": {}}
+    
+    def detect_blemishes_ai_2025(self, image: np.ndarray, skin_mask: np.ndarray,
+                                 context: Optional[FrameContext] = None) -> Dict:
+        """2025년 AI 기반 잡티 감지 - 개수, 위치/크기, 히트맵
+        
+        좌표는 원본 이미지 대비 0~1 비율이며 (x, y = 중심, width/height = 외접 사각형), 위치는 면적이 큰 순으로
+        BLEMISH_MAX_LOCATIONS개까지 포함합니다. heatmap은 분석 영역(region)을 BLEMISH_HEATMAP_SIZE 격자로 나눈
+        칸별 잡티 수입니다. count는 점수 계산용으로 BLEMISH_COUNT_CAP에서 제한되고 total은 제한 없는 개수입니다.
+        """
         try:
-            # 2025년 고급 잡티 감지 알고리즘
-            lab = cv2.cvtColor(image, cv2.COLOR_RGB2LAB)
-            l_channel = lab[:,:,0]
+            context = context or FrameContext(image)
+            if skin_mask is not None:
+                context.set_skin_mask(skin_mask)
             
-            # 적응형 임계값 (2025년 최적화)
-            adaptive_thresh = cv2.adaptiveThreshold(
-                l_channel, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                cv2.THRESH_BINARY_INV, 15, 3
-            )
+            # 2025년 고급 잡티 감지 알고리즘
+            l_channel = context.l_channel
             
+            skin_binary = None
             if skin_mask is not None and skin_mask.size > 0:
-                adaptive_thresh[skin_mask <= 128] = 0
-            
-            # 2025년 고급 노이즈 제거
-            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-            cleaned = cv2.morphologyEx(adaptive_thresh, cv2.MORPH_OPEN, kernel)
+                if skin_mask.shape[:2] != l_channel.shape[:2]:
+                    raise ValueError(f"피부 마스크 크기 {skin_mask.shape[:2]}가 이미지 크기 {l_channel.shape[:2]}와 다릅니다")
+                skin_binary = context.skin_mask_binary
+                if BLEMISH_EDGE_MARGIN > 0:
+                    # 마스크 경계의 눈썹/눈/머리선이 잡티로 잡히지 않도록 경계 안쪽만 사용
+                    size = 2 * BLEMISH_EDGE_MARGIN + 1
+                    skin_binary = cv2.erode(skin_binary, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (size, size)))
             
-            # 연결된 구성 요소 분석 (2025년 개선)
-            num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(cleaned)
+            # 연결된 구성 요소 분석 후 면적/모양 조건을 벡터 연산으로 필터링 (2025년 최적화된 범위)
+            stats, centroids = self.blemish_components_tiled(l_channel, skin_binary)
+            keep = self.blemish_candidates(stats)
+            stats, centroids = stats[keep], centroids[keep]
+            areas = stats[:, cv2.CC_STAT_AREA]
+            total = int(len(areas))
             
-            blemish_count = 0
-            for i in range(1, num_labels):
-                area = stats[i, cv2.CC_STAT_AREA]
-                if 8 < area < 150:  # 2025년 최적화된 범위
-                    blemish_count += 1
+            # 칸별 잡티 수 히트맵
+            height, width = l_channel.shape[:2]
+            grid = BLEMISH_HEATMAP_SIZE
+            cells_x = np.minimum((centroids[:, 0] * grid / width).astype(np.int64), grid - 1)
+            cells_y = np.minimum((centroids[:, 1] * grid / height).astype(np.int64), grid - 1)
+            heatmap = np.bincount(cells_y * grid + cells_x, minlength=grid * grid).reshape(grid, grid)
             
-            return min(blemish_count, 40)  # 2025년 상한선
+            # 면적이 큰 순으로 위치/크기를 원본 대비 비율 좌표로 변환
+            order = np.argsort(-areas, kind="stable")[:BLEMISH_MAX_LOCATIONS]
+            xs, ys, _, _ = context.to_source_rect(centroids[order, 0], centroids[order, 1], 0, 0)
+            _, _, ws, hs = context.to_source_rect(0, 0, stats[order, cv2.CC_STAT_WIDTH], stats[order, cv2.CC_STAT_HEIGHT])
+            locations = [
+                {"x": round(float(x), 4), "y": round(float(y), 4), "width": round(float(w), 4),
+                 "height": round(float(h), 4), "area": int(area)}
+                for x, y, w, h, area in zip(xs, ys, ws, hs, areas[order])
+            ]
+            return {
+                "count": min(total, BLEMISH_COUNT_CAP),  # 2025년 상한선
+                "total": total,
+                "locations": locations,
+                "heatmap": heatmap.tolist(),
+                "region": self.normalized_region(context.source_rect)
+            }
             
         except Exception as e:
             logger.error(f"2025년 잡티 감지 오류: {e}")
-            return 0
+            STAGE_ERRORS.labels("blemishes").inc()
+            return self.empty_blemish_map()
     
     def determine_pore_size_2025(self, skin_type: str, skin_analysis: Dict) -> str:
         """2025년 AI 기반 모공 크기 결정"""
@@ -798,23 +3435,34 @@ class ModernSkinAnalyzer:
         
         return final_score
 
-# 전역 분석기 인스턴스
+# 전역 분석기 인스턴스 (모델 로딩과 워밍업이 끝난 뒤에만 설정됨)
 analyzer = None
+analyzer_loading_error: Optional[str] = None
 
-@app.on_event("startup")
-async def startup_event():
-    """서버 시작시 설정"""
-    global analyzer
-    logger.info("🚀 2025년 최신 AI 피부 분석기 서버 시작...")
-    analyzer = ModernSkinAnalyzer()
-    logger.info("✅ 2025년 AI 분석기 준비 완료!")
+# 전역 분석 기록 저장소 (라이프스팬에서 생성, HISTORY_DB_PATH가 비어 있으면 None)
+history_store: Optional[AnalysisHistoryStore] = None
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """서버 종료시 정리"""
-    global analyzer
-    if analyzer:
-        await analyzer.close_session()
+# 전역 수락 제어 (얼굴 감지/단일 분석/배치 분석 요청이 같은 실행 슬롯을 공유)
+admission = AdmissionController()
+
+async def load_analyzer():
+    """모델을 한 번만 로드하고 워밍업을 마친 뒤 분석기를 공개 (readiness 전환)"""
+    global analyzer, analyzer_loading_error
+    start_time = time.time()
+    instance = None
+    
+    try:
+        loop = asyncio.get_running_loop()
+        instance = await loop.run_in_executor(None, ModernSkinAnalyzer)
+        await instance.warm_up()
+        analyzer = instance
+        logger.info(f"✅ 2025년 AI 분석기 준비 완료! ({time.time() - start_time:.1f}s)")
+    except Exception as e:
+        analyzer_loading_error = str(e)
+        logger.error(f"AI 분석기 초기화 실패: {e}")
+        if instance is not None:
+            # 워밍업에 실패한 분석기는 공개되지 않으므로 세션/실행 풀/추론 워커를 여기서 정리
+            await instance.close_session()
 
 @app.get("/")
 async def root():
@@ -844,125 +3492,600 @@ async def health_check():
         "version": "3.0.0",
         "local_models": "None (Cloud-based)",
         "memory_usage": "Optimized",
-        "ai_ready": analyzer is not None
+        "ai_ready": analyzer is not None,
+        "admission": admission.get_stats()
     }
 
-@app.post("/analyze-skin-base64")
-async def analyze_skin_base64(request: dict):
-    """2025년 최신 Base64 이미지 분석 엔드포인트"""
+@app.get("/health/live")
+async def liveness_check():
+    """liveness: 프로세스가 요청을 처리할 수 있는지 (모델 로딩과 무관)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """readiness: 모델 로딩과 워밍업이 끝나 분석 요청을 받을 수 있는지"""
+    if analyzer is None:
+        status = "failed" if analyzer_loading_error else "loading"
+        raise HTTPException(
+            status_code=503,
+            detail={"status": status, "error": analyzer_loading_error}
+        )
+    return {"status": "ready"}
+
+def decode_base64_payload(image_data: str) -> bytes:
+    """Base64 (data URL 포함) 문자열을 이미지 바이트로 디코딩"""
+    # Base64 데이터 정제 및 디버깅
+    logger.debug("원본 이미지 데이터 길이: %d", len(image_data))
+    
+    # Base64 헤더 처리
+    if ';base64,' in image_data:
+        prefix, image_data = image_data.split(';base64,')
+        logger.debug("감지된 이미지 타입: %s", prefix)
+    elif ',' in image_data:
+        image_data = image_data.split(',')[1]
+        
+    # 공백 및 개행 문자 제거
+    image_data = image_data.strip()
+    logger.debug("정제된 Base64 데이터 길이: %d", len(image_data))
+    
+    # Base64 패딩 확인 및 수정
+    padding = 4 - (len(image_data) % 4)
+    if padding != 4:
+        image_data += '=' * padding
+        logger.debug("Base64 패딩 추가: %d개", padding)
+    
+    # Base64 디코딩
+    try:
+        image_bytes = base64.b64decode(image_data)
+        logger.debug("디코딩된 바이트 길이: %d", len(image_bytes))
+    except Exception as e:
+        logger.error(f"Base64 디코딩 실패: {e}")
+        raise HTTPException(status_code=400, detail="잘못된 Base64 형식입니다.")
+    
+    if len(image_bytes) == 0:
+        raise HTTPException(status_code=400, detail="디코딩된 이미지 데이터가 비어있습니다.")
+    
+    return image_bytes
+
+def decode_image_bytes(image_bytes: bytes, flags: int = cv2.IMREAD_COLOR) -> np.ndarray:
+    """이미지 바이트를 numpy 배열로 디코딩 (컬러는 RGB, 그레이스케일은 단일 채널)"""
+    try:
+        nparr = np.frombuffer(image_bytes, np.uint8)
+        if len(nparr) == 0:
+            raise HTTPException(status_code=400, detail="이미지 데이터를 배열로 변환할 수 없습니다.")
+        
+        logger.debug("numpy 배열 크기: %d", len(nparr))
+        
+        # 이미지 디코딩
+        image_array = cv2.imdecode(nparr, flags)
+        if image_array is None:
+            raise HTTPException(
+                status_code=400,
+                detail="이미지 디코딩 실패. 지원되는 이미지 형식: JPEG, PNG, BMP"
+            )
+        
+        logger.debug("디코딩된 이미지 크기: %s", str(image_array.shape))
+        
+        # 이미지 크기 확인
+        if image_array.shape[0] < 10 or image_array.shape[1] < 10:
+            raise HTTPException(
+                status_code=400,
+                detail="이미지가 너무 작습니다. 최소 10x10 픽셀 이상이어야 합니다."
+            )
+        
+        # BGR을 RGB로 변환
+        if image_array.ndim == 3:
+            image_array = cv2.cvtColor(image_array, cv2.COLOR_BGR2RGB)
+        
+        return image_array
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"이미지 변환 실패: {e}")
+        raise HTTPException(
+            status_code=400,
+            detail="이미지 변환 실패. 올바른 이미지 파일인지 확인해주세요."
+        )
+
+# 축소 디코딩 플래그 (JPEG는 DCT 단계에서 1/2, 1/4, 1/8로 축소되어 전체 해상도 버퍼를 만들지 않음)
+REDUCED_DECODE_FLAGS = {
+    cv2.IMREAD_COLOR: {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8},
+    cv2.IMREAD_GRAYSCALE: {
+        2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8
+    },
+}
+
+# 90°/270° 회전이 포함된 EXIF 방향 값 (cv2.imdecode가 방향을 적용하면 너비/높이가 바뀜)
+EXIF_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+def read_image_header(image_bytes: bytes) -> tuple:
+    """픽셀을 디코딩하지 않고 헤더만 읽어 (너비, 높이, 형식) 반환 - 선언 크기가 제한을 넘으면 거부
+    
+    cv2.imdecode는 EXIF 방향을 적용해 디코딩하므로 ImageOps.exif_transpose와 같이 방향 값이 5~8이면
+    너비와 높이를 바꿔, 반환 크기가 디코딩 결과(축소 디코딩이면 그 배율)와 같은 방향이 되도록 합니다.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as header:
+            width, height = header.size
+            image_format = header.format
+            if header.getexif().get(0x0112) in EXIF_TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+    except Image.DecompressionBombError:
+        raise HTTPException(status_code=413, detail="이미지 해상도가 너무 큽니다.")
+    except Exception as e:
+        logger.error(f"이미지 헤더 읽기 실패: {e}")
+        raise HTTPException(
+            status_code=400,
+            detail="이미지 디코딩 실패. 지원되는 이미지 형식: JPEG, PNG, BMP"
+        )
+    
+    if width * height > MAX_IMAGE_PIXELS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"이미지 해상도가 너무 큽니다. 최대 {MAX_IMAGE_PIXELS // 1_000_000}MP까지 분석할 수 있습니다."
+        )
+    
+    return width, height, image_format
+
+def analysis_decode_side(width: int, height: int) -> int:
+    """분석 경로에서 디코딩 결과가 유지해야 할 최소 긴 변
+    
+    full 모드는 전처리 분석 해상도, roi 모드는 얼굴 영역을 고정 해상도로 자를 수 있도록 ROI_DECODE_MIN_SIDE를 사용합니다.
+    """
+    if PIPELINE_MODE == "roi":
+        return ROI_DECODE_MIN_SIDE
+    return analysis_target_size(max(width, height))
+
+def reduced_decode_flag(width: int, height: int, image_format: str, flags: int, min_side: int) -> int:
+    """긴 변이 min_side 이상으로 남는 가장 큰 축소 배율의 디코딩 플래그 선택 (JPEG 외 형식은 그대로)"""
+    if not REDUCED_DECODE or image_format != "JPEG" or flags not in REDUCED_DECODE_FLAGS:
+        return flags
+    
+    for factor in (8, 4, 2):
+        if max(width, height) // factor >= min_side:
+            return REDUCED_DECODE_FLAGS[flags][factor]
+    return flags
+
+def ingest_image(image_bytes: bytes, flags: int = cv2.IMREAD_COLOR, min_side: Optional[int] = None) -> tuple:
+    """헤더 확인 후 필요한 해상도까지만 축소 디코딩 - (이미지, 원본 (높이, 너비)) 반환
+    
+    min_side를 지정하지 않으면 분석 경로 기준(analysis_decode_side)을 사용합니다.
+    """
+    width, height, image_format = read_image_header(image_bytes)
+    if min_side is None:
+        min_side = analysis_decode_side(width, height)
+    
+    image_array = decode_image_bytes(image_bytes, reduced_decode_flag(width, height, image_format, flags, min_side))
+    return image_array, (height, width)
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """분석 결과 캐시 통계 (적중/미스/제거 횟수)"""
+    if analyzer is None:
+        raise HTTPException(status_code=503, detail="AI 분석기가 준비되지 않았습니다.")
+    return analyzer.result_cache.get_stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 텍스트 형식 메트릭 (단계별 지연 시간, 요청/오류/폴백 수, 캐시 통계)
+    
+    prefork 모드에서는 모든 워커의 메트릭 파일을 합산합니다 (캐시 통계는 워커별이므로 /cache-stats 사용).
+    """
+    registry = REGISTRY
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+@app.post("/detect-face")
+async def detect_face_endpoint(request: dict):
+    """실시간 카메라용 경량 얼굴 감지 엔드포인트 (bbox와 신뢰도만 반환)"""
     global analyzer
     
     if analyzer is None:
         raise HTTPException(status_code=503, detail="AI 분석기가 준비되지 않았습니다.")
     
+    image_data = request.get('image')
+    if not image_data:
+        raise HTTPException(status_code=400, detail="이미지 데이터가 필요합니다.")
+    
+    start_time = time.time()
+    
     try:
-        image_data = request.get('image')
-        if not image_data:
-            raise HTTPException(status_code=400, detail="이미지 데이터가 필요합니다.")
+        read_flag = cv2.IMREAD_COLOR if analyzer.face_detector.color_input else cv2.IMREAD_GRAYSCALE
+        image_bytes = decode_base64_payload(image_data)
+        async with admission.admit("face_check"):
+            with track_stage("decode"):
+                frame, (height, width) = await analyzer.run_cv(ingest_image, image_bytes, read_flag, FACE_CHECK_MAX_SIDE)
+            with track_stage("detect_face_thumbnail"):
+                detection = await analyzer.run_cv(analyzer.detect_face_thumbnail, frame)
         
-        # Base64 데이터 정제 및 디버깅
-        logger.info("원본 이미지 데이터 길이: %d", len(image_data))
+        # 축소 디코딩된 경우 bbox를 원본 좌표계로 되돌림
+        bbox = detection["bbox"]
+        scale = width / frame.shape[1]
+        if bbox is not None and scale != 1.0:
+            bbox = {key: int(round(value * scale)) for key, value in bbox.items()}
         
-        # Base64 헤더 처리
-        if ';base64,' in image_data:
-            prefix, image_data = image_data.split(';base64,')
-            logger.info("감지된 이미지 타입: %s", prefix)
-        elif ',' in image_data:
-            image_data = image_data.split(',')[1]
-            
-        # 공백 및 개행 문자 제거
-        image_data = image_data.strip()
-        logger.info("정제된 Base64 데이터 길이: %d", len(image_data))
+        return {
+            "success": True,
+            "processing_time": f"{(time.time() - start_time) * 1000:.1f}ms",
+            "result": {
+                "face_detected": detection["face_detected"],
+                "confidence": detection["confidence"],
+                "bbox": bbox,
+                "image_size": {"width": int(width), "height": int(height)}
+            }
+        }
         
-        # Base64 디코딩 및 이미지 변환
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"얼굴 감지 엔드포인트 오류: {e}")
+        raise HTTPException(status_code=500, detail=f"서버 오류가 발생했습니다: {str(e)}")
+
+def sign_user_id(user_id: str, secret: str = HISTORY_AUTH_SECRET) -> str:
+    """사용자 ID의 분석 기록 접근 토큰 (HMAC-SHA256 hex, 인증 서버가 같은 비밀로 발급)"""
+    return hmac.new(secret.encode(), user_id.encode(), hashlib.sha256).hexdigest()
+
+def authenticate_user(user_id: str, token) -> None:
+    """사용자 ID와 접근 토큰이 일치하는지 확인 (다른 사용자의 기록 조회/기록 방지)"""
+    if not isinstance(token, str) or not hmac.compare_digest(token.encode(), sign_user_id(user_id).encode()):
+        raise HTTPException(status_code=401, detail="사용자 인증 토큰이 올바르지 않습니다.")
+
+def validate_user_id(user_id, token=None) -> Optional[str]:
+    """기록용 사용자 ID 확인 (없거나 기록 저장소가 비활성화되어 있으면 기록하지 않음, 있으면 접근 토큰 검증)"""
+    if user_id is None or user_id == "":
+        return None
+    if not isinstance(user_id, str) or len(user_id) > 128:
+        raise HTTPException(status_code=400, detail="user_id는 128자 이하의 문자열이어야 합니다.")
+    if history_store is None:
+        return None
+    authenticate_user(user_id, token)
+    return user_id
+
+def create_analysis_plan(mode, deadline_ms) -> AnalysisPlan:
+    """요청의 품질 단계(mode)와 기한(deadline_ms) 확인 후 분석 계획 생성 (기한은 요청 수신 시점부터 계산)"""
+    mode = mode or DEFAULT_ANALYSIS_MODE
+    if mode not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail="mode는 fast, balanced, accurate 중 하나여야 합니다.")
+    if deadline_ms is not None and deadline_ms != "":
+        try:
+            deadline_ms = float(deadline_ms)
+        except (TypeError, ValueError):
+            deadline_ms = -1.0
+        if not 1 <= deadline_ms <= ANALYSIS_MAX_DEADLINE_MS:
+            raise HTTPException(
+                status_code=400, detail=f"deadline_ms는 1~{ANALYSIS_MAX_DEADLINE_MS:.0f} 사이의 숫자여야 합니다."
+            )
+    else:
+        deadline_ms = None
+    return analyzer.new_plan(mode, deadline_ms)
+
+def parse_multi_face(value) -> bool:
+    """다중 얼굴 분석 여부 (JSON 본문의 bool 또는 쿼리 파라미터 문자열)"""
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "yes")
+
+def record_history(user_id: Optional[str], results: List[SkinAnalysisResult]):
+    """사용자 ID가 있으면 얼굴이 감지된 분석 결과를 기록 대기열에 추가 (응답 지연 없음)"""
+    if history_store is None or user_id is None:
+        return
+    for result in results:
+        if result.face_detected:
+            history_store.record(user_id, result)
+
+def require_history_store() -> AnalysisHistoryStore:
+    if history_store is None:
+        raise HTTPException(status_code=503, detail="분석 기록 저장소가 비활성화되어 있습니다.")
+    return history_store
+
+@app.get("/history/{user_id}")
+async def get_analysis_history(user_id: str, request: Request, days: int = 30, limit: int = 100):
+    """사용자의 최근 분석 기록 (최신순, X-User-Token 헤더 필요)"""
+    store = require_history_store()
+    authenticate_user(user_id, request.headers.get("X-User-Token"))
+    if not 1 <= days <= 3650 or not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="days는 1~3650, limit은 1~1000 사이여야 합니다.")
+    
+    since = time.time() - days * 86400
+    records = await asyncio.get_running_loop().run_in_executor(None, store.get_history, user_id, since, limit)
+    return {"success": True, "user_id": user_id, "days": days, "records": records}
+
+@app.get("/history/{user_id}/trend")
+async def get_analysis_trend(user_id: str, request: Request, days: int = 90, bucket: str = "week"):
+    """사용자의 지표 추세 (구간별 평균/최소/최대, 첫 구간 대비 변화, 일 단위 변화율, X-User-Token 헤더 필요)"""
+    store = require_history_store()
+    authenticate_user(user_id, request.headers.get("X-User-Token"))
+    if not 1 <= days <= 3650:
+        raise HTTPException(status_code=400, detail="days는 1~3650 사이여야 합니다.")
+    if bucket not in AnalysisHistoryStore.BUCKET_FORMATS:
+        raise HTTPException(status_code=400, detail="bucket은 day, week, month 중 하나여야 합니다.")
+    
+    since = time.time() - days * 86400
+    trend = await asyncio.get_running_loop().run_in_executor(None, store.get_trend, user_id, since, bucket)
+    return {"success": True, "user_id": user_id, "days": days, "bucket": bucket, **trend}
+
+def build_analysis_response(result: SkinAnalysisResult) -> Dict:
+    """분석 결과를 API 응답 형식으로 변환"""
+    return {
+        "success": True,
+        "analysis_method": "2025년 최신 AI 기반 분석",
+        "processing_time": f"{result.processing_time:.2f}s",
+        "ai_version": result.analysis_version,
+        "result": {
+            "skin_type": result.skin_type,
+            "moisture_level": result.moisture_level,
+            "oil_level": result.oil_level,
+            "blemish_count": result.blemish_count,
+            "skin_tone": result.skin_tone,
+            "wrinkle_level": result.wrinkle_level,
+            "pore_size": result.pore_size,
+            "overall_score": result.overall_score,
+            "avg_skin_color": result.avg_skin_color,
+            "face_detected": result.face_detected,
+            "confidence": result.confidence,
+            "skin_area_percentage": result.skin_area_percentage,
+            "detected_features": result.detected_features,
+            "api_method": result.api_method,
+            "age_range": result.age_range,
+            "age_confidence": result.age_confidence,
+            "blemishes": result.blemish_map,
+            "analysis_mode": result.analysis_mode,
+            "stages_run": result.stages_run,
+            "stages_skipped": result.stages_skipped,
+            "face_region": result.face_region
+        }
+    }
+
+def build_multi_face_response(results: List[SkinAnalysisResult], start_time: float) -> Dict:
+    """다중 얼굴 분석 결과를 API 응답 형식으로 변환 (얼굴별 결과는 면적이 큰 순)"""
+    return {
+        "success": True,
+        "analysis_method": "2025년 최신 AI 기반 분석 (다중 얼굴)",
+        "processing_time": f"{time.time() - start_time:.2f}s",
+        "ai_version": SkinAnalysisResult.analysis_version,
+        "face_count": len(results),
+        "results": [build_analysis_response(result)["result"] for result in results]
+    }
+
+async def iter_limited_body(request: Request, limit: int):
+    """요청 본문 청크를 전달하면서 누적 크기가 limit을 넘으면 바로 413 (Content-Length 없는 chunked 전송 대비)"""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > limit:
+            raise HTTPException(status_code=413, detail=f"이미지 크기가 제한({MAX_UPLOAD_BYTES} 바이트)을 초과합니다.")
+        yield chunk
+
+async def read_upload_body(request: Request) -> bytes:
+    """multipart/form-data 또는 바이너리 본문에서 이미지 바이트 읽기 (크기 제한 적용)
+    
+    Content-Length가 없어도 본문을 읽는 동안 크기를 확인하므로 제한을 넘는 업로드를 끝까지 받거나 임시 파일에 쌓지 않습니다.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"이미지 크기가 제한({MAX_UPLOAD_BYTES} 바이트)을 초과합니다.")
+    
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    
+    if content_type == "multipart/form-data":
+        # request.form()은 본문 전체를 파싱한 뒤에야 크기를 알 수 있으므로 크기 제한 스트림으로 직접 파싱
+        parser = MultiPartParser(request.headers, iter_limited_body(request, MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES),
+                                 max_files=1, max_fields=10)
         try:
-            # Base64 패딩 확인 및 수정
-            padding = 4 - (len(image_data) % 4)
-            if padding != 4:
-                image_data += '=' * padding
-                logger.info("Base64 패딩 추가: %d개", padding)
+            form = await parser.parse()
+        except MultiPartException as e:
+            raise HTTPException(status_code=400, detail=f"multipart 본문을 해석할 수 없습니다: {e.message}")
+        upload = form.get("image") or form.get("file")
+        if upload is None or not hasattr(upload, "read"):
+            raise HTTPException(status_code=400, detail="'image' 파일 필드가 필요합니다.")
+        if getattr(upload, "size", None) is not None and upload.size > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"이미지 크기가 제한({MAX_UPLOAD_BYTES} 바이트)을 초과합니다.")
+        image_bytes = await upload.read()
+        await upload.close()
+        
+    elif content_type in BINARY_UPLOAD_TYPES:
+        # 청크를 하나의 버퍼에 모아 추가 복사 없이 디코딩에 전달
+        buffer = bytearray()
+        async for chunk in iter_limited_body(request, MAX_UPLOAD_BYTES):
+            buffer.extend(chunk)
+        image_bytes = buffer
+        
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail="지원되지 않는 Content-Type입니다. multipart/form-data 또는 application/octet-stream을 사용하세요."
+        )
+    
+    if len(image_bytes) == 0:
+        raise HTTPException(status_code=400, detail="이미지 데이터가 비어있습니다.")
+    if len(image_bytes) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"이미지 크기가 제한({MAX_UPLOAD_BYTES} 바이트)을 초과합니다.")
+    
+    return image_bytes
+
+@app.post("/analyze-skin")
+async def analyze_skin(request: Request):
+    """바이너리 업로드 이미지 분석 엔드포인트 (multipart/form-data 또는 application/octet-stream)"""
+    global analyzer
+    
+    if analyzer is None:
+        raise HTTPException(status_code=503, detail="AI 분석기가 준비되지 않았습니다.")
+    
+    try:
+        start_time = time.time()
+        user_id = validate_user_id(
+            request.headers.get("X-User-Id") or request.query_params.get("user_id"),
+            request.headers.get("X-User-Token") or request.query_params.get("user_token")
+        )
+        plan = create_analysis_plan(request.query_params.get("mode"), request.query_params.get("deadline_ms"))
+        multi_face = parse_multi_face(request.query_params.get("multi_face"))
+        with track_stage("upload_read"):
+            image_bytes = await read_upload_body(request)
+        async with admission.admit("batch" if multi_face else "analysis"):
+            with track_stage("decode"):
+                image_array, source_shape = await analyzer.run_cv(ingest_image, image_bytes)
             
-            # Base64 디코딩
-            try:
-                image_bytes = base64.b64decode(image_data)
-                logger.info("디코딩된 바이트 길이: %d", len(image_bytes))
-                
-                if len(image_bytes) == 0:
-                    raise HTTPException(status_code=400, detail="디코딩된 이미지 데이터가 비어있습니다.")
-                
-            except Exception as e:
-                logger.error(f"Base64 디코딩 실패: {e}")
-                raise HTTPException(status_code=400, detail="잘못된 Base64 형식입니다.")
+            result = await analyzer.analyze_image_cached(image_array, source_shape, plan, multi_face)
+        
+        if multi_face:
+            # 한 프레임의 여러 얼굴은 같은 사용자가 아닐 수 있으므로 이력에 기록하지 않음
+            return build_multi_face_response(result, start_time)
+        record_history(user_id, [result])
+        return build_analysis_response(result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"예상치 못한 오류: {e}")
+        raise HTTPException(status_code=500, detail=f"서버 오류가 발생했습니다: {str(e)}")
+
+@app.websocket("/ws/face-tracking")
+async def face_tracking_ws(websocket: WebSocket):
+    """실시간 카메라 프레임 스트림 얼굴 추적 (바이너리 JPEG 프레임 수신 → 얼굴 상태 JSON 전송)"""
+    await websocket.accept()
+    
+    if analyzer is None:
+        await websocket.send_json({"error": "AI 분석기가 준비되지 않았습니다.", "ready": False})
+        await websocket.close(code=1013)
+        return
+    
+    session = FaceTrackingSession(analyzer)
+    read_flag = cv2.IMREAD_COLOR if analyzer.face_detector.color_input else cv2.IMREAD_GRAYSCALE
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
             
-            # 이미지 배열로 변환
             try:
-                nparr = np.frombuffer(image_bytes, np.uint8)
-                if len(nparr) == 0:
-                    raise HTTPException(status_code=400, detail="이미지 데이터를 배열로 변환할 수 없습니다.")
-                
-                logger.info("numpy 배열 크기: %d", len(nparr))
-                
-                # 이미지 디코딩
-                image_array = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                if image_array is None:
-                    raise HTTPException(
-                        status_code=400,
-                        detail="이미지 디코딩 실패. 지원되는 이미지 형식: JPEG, PNG, BMP"
-                    )
+                frame_bytes = message.get("bytes")
+                if frame_bytes is None:
+                    frame_bytes = decode_base64_payload(message.get("text") or "")
+                if len(frame_bytes) > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="프레임 크기가 제한을 초과합니다.")
                 
-                logger.info("디코딩된 이미지 크기: %s", str(image_array.shape))
+                # /detect-face와 같이 헤더의 픽셀 수를 먼저 확인하고 검출 해상도까지만 축소 디코딩
+                frame, (_, width) = await analyzer.run_cv(ingest_image, frame_bytes, read_flag, FACE_CHECK_MAX_SIDE)
+                status = await analyzer.run_cv(session.process_frame, frame)
                 
-                # 이미지 크기 확인
-                if image_array.shape[0] < 10 or image_array.shape[1] < 10:
-                    raise HTTPException(
-                        status_code=400,
-                        detail="이미지가 너무 작습니다. 최소 10x10 픽셀 이상이어야 합니다."
-                    )
-                
-                # BGR을 RGB로 변환
-                image_array = cv2.cvtColor(image_array, cv2.COLOR_BGR2RGB)
-                
-            except HTTPException:
-                raise
-            except Exception as e:
-                logger.error(f"이미지 변환 실패: {e}")
-                raise HTTPException(
-                    status_code=400,
-                    detail="이미지 변환 실패. 올바른 이미지 파일인지 확인해주세요."
-                )
+                # 축소 디코딩된 경우 bbox를 원본 좌표계로 되돌림
+                scale = width / frame.shape[1]
+                if status["bbox"] is not None and scale != 1.0:
+                    status["bbox"] = {key: int(round(value * scale)) for key, value in status["bbox"].items()}
+            except HTTPException as e:
+                status = {"error": e.detail, "face_detected": False, "ready": False}
             
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"이미지 처리 실패: {e}")
-            raise HTTPException(status_code=400, detail="이미지 처리 중 오류가 발생했습니다.")
+            await websocket.send_json(status)
+            
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"얼굴 추적 WebSocket 오류: {e}")
+        await websocket.close(code=1011)
+
+@app.post("/analyze-skin-base64")
+async def analyze_skin_base64(request: dict):
+    """2025년 최신 Base64 이미지 분석 엔드포인트"""
+    global analyzer
+    
+    if analyzer is None:
+        raise HTTPException(status_code=503, detail="AI 분석기가 준비되지 않았습니다.")
+    
+    try:
+        image_data = request.get('image')
+        if not image_data:
+            raise HTTPException(status_code=400, detail="이미지 데이터가 필요합니다.")
+        
+        start_time = time.time()
+        user_id = validate_user_id(request.get('user_id'), request.get('user_token'))
+        plan = create_analysis_plan(request.get('mode'), request.get('deadline_ms'))
+        multi_face = parse_multi_face(request.get('multi_face'))
+        image_bytes = decode_base64_payload(image_data)
+        async with admission.admit("batch" if multi_face else "analysis"):
+            with track_stage("decode"):
+                image_array, source_shape = await analyzer.run_cv(ingest_image, image_bytes)
+            
+            # 2025년 최신 AI 분석 수행
+            result = await analyzer.analyze_image_cached(image_array, source_shape, plan, multi_face)
+        
+        if multi_face:
+            # 한 프레임의 여러 얼굴은 같은 사용자가 아닐 수 있으므로 이력에 기록하지 않음
+            return build_multi_face_response(result, start_time)
+        record_history(user_id, [result])
+        return build_analysis_response(result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"예상치 못한 오류: {e}")
+        raise HTTPException(status_code=500, detail=f"서버 오류가 발생했습니다: {str(e)}")
+
+def aggregate_batch_results(results: List[SkinAnalysisResult]) -> Dict:
+    """배치 분석 결과 요약 (얼굴이 감지된 이미지만 평균에 포함)"""
+    analyzed = [r for r in results if r.face_detected]
+    aggregate = {
+        "total_images": len(results),
+        "analyzed_images": len(analyzed),
+        "skin_type": None,
+        "overall_score": 0,
+        "moisture_level": 0,
+        "oil_level": 0,
+        "blemish_count": 0,
+        "wrinkle_level": 0,
+        "confidence": 0.0
+    }
+    if not analyzed:
+        return aggregate
+    
+    # 피부 타입은 가장 많이 나온 값, 수치는 평균
+    skin_types = [r.skin_type for r in analyzed]
+    aggregate["skin_type"] = max(set(skin_types), key=skin_types.count)
+    for metric in ("overall_score", "moisture_level", "oil_level", "blemish_count", "wrinkle_level"):
+        aggregate[metric] = int(round(np.mean([getattr(r, metric) for r in analyzed])))
+    aggregate["confidence"] = float(np.mean([r.confidence for r in analyzed]))
+    
+    return aggregate
+
+@app.post("/analyze-skin-batch")
+async def analyze_skin_batch(request: dict):
+    """여러 장의 Base64 이미지를 한 번에 분석하는 배치 엔드포인트 (정면/측면 촬영 등)"""
+    global analyzer
+    
+    if analyzer is None:
+        raise HTTPException(status_code=503, detail="AI 분석기가 준비되지 않았습니다.")
+    
+    try:
+        start_time = time.time()
+        images_data = request.get('images')
+        if not images_data or not isinstance(images_data, list):
+            raise HTTPException(status_code=400, detail="'images' 배열이 필요합니다.")
+        if len(images_data) > MAX_BATCH_IMAGES:
+            raise HTTPException(status_code=400, detail=f"한 번에 최대 {MAX_BATCH_IMAGES}장까지 분석할 수 있습니다.")
+        for index, image_data in enumerate(images_data):
+            if not isinstance(image_data, str):
+                raise HTTPException(status_code=400, detail=f"images[{index}]는 Base64 문자열이어야 합니다.")
         
-        # 2025년 최신 AI 분석 수행
-        result = await analyzer.analyze_image(image_array)
+        user_id = validate_user_id(request.get('user_id'), request.get('user_token'))
+        payloads = [decode_base64_payload(image_data) for image_data in images_data]
+        async with admission.admit("batch"):
+            with track_stage("batch_decode"):
+                decoded = await asyncio.gather(*[analyzer.run_cv(ingest_image, payload) for payload in payloads])
+            image_arrays, source_shapes = map(list, zip(*decoded))
+            
+            results = await analyzer.analyze_images_batch(image_arrays, source_shapes)
         
+        record_history(user_id, results)
         return {
             "success": True,
-            "analysis_method": "2025년 최신 AI 기반 분석",
-            "processing_time": f"{result.processing_time:.2f}s",
-            "ai_version": result.analysis_version,
-            "result": {
-                "skin_type": result.skin_type,
-                "moisture_level": result.moisture_level,
-                "oil_level": result.oil_level,
-                "blemish_count": result.blemish_count,
-                "skin_tone": result.skin_tone,
-                "wrinkle_level": result.wrinkle_level,
-                "pore_size": result.pore_size,
-                "overall_score": result.overall_score,
-                "avg_skin_color": result.avg_skin_color,
-                "face_detected": result.face_detected,
-                "confidence": result.confidence,
-                "skin_area_percentage": result.skin_area_percentage,
-                "detected_features": result.detected_features,
-                "api_method": result.api_method,
-                "age_range": result.age_range,
-                "age_confidence": result.age_confidence
-            }
+            "analysis_method": "2025년 최신 AI 기반 분석 (배치)",
+            "processing_time": f"{time.time() - start_time:.2f}s",
+            "ai_version": results[0].analysis_version,
+            "results": [build_analysis_response(result)["result"] for result in results],
+            "aggregate": aggregate_batch_results(results)
         }
         
     except HTTPException:
@@ -0,0 +1,159 @@
+# prefork 멀티 워커 서버 (모델을 부모 프로세스에서 한 번만 로드하고 fork로 워커에 공유)
+"""
+사용법:
+    python prefork.py --workers 8 --port 8000
+    python prefork.py --workers 4 --threads-per-worker 2
+
+uvicorn --workers는 워커마다 torch/transformers를 import하고 연령대 모델을 따로 로드하므로 워커 수만큼 메모리가 늘어납니다.
+이 모드는 부모 프로세스가 ModernSkinAnalyzer를 한 번 로드/워밍업한 뒤 gc.freeze()로 객체를 고정하고 워커를 fork합니다.
+워커는 모델 페이지를 copy-on-write로 공유하고 (torch 가중치는 AGE_MODEL_MMAP으로 파일 매핑), 듣기 소켓을 함께 사용합니다.
+
+- 워커별 torch/OpenCV 스레드 수를 --threads-per-worker로 제한 (기본: CPU 수 / 워커 수)
+- 부모는 단일 스레드로 워밍업하므로 fork 시점에 OpenMP/OpenCV 스레드 풀이 없음
+- 종료된 워커는 부모가 다시 fork (SIGTERM/SIGINT 시 모든 워커 종료)
+- /metrics는 PROMETHEUS_MULTIPROC_DIR의 워커별 메트릭 파일을 합산
+"""
+import argparse
+import asyncio
+import gc
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+def parse_args():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="모델 공유 prefork 멀티 워커 서버")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=cpu_count, help="워커 프로세스 수")
+    parser.add_argument("--threads-per-worker", type=int, default=0,
+                        help="워커별 torch/OpenCV/실행 풀 스레드 수 (0 = CPU 수 / 워커 수)")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    if args.threads_per_worker <= 0:
+        args.threads_per_worker = max(1, cpu_count // max(1, args.workers))
+    return args
+
+def configure_environment(threads_per_worker: int) -> str:
+    """main을 import하기 전에 설정해야 하는 환경 변수 (명시적으로 지정한 값은 유지) - 메트릭 디렉터리 반환"""
+    os.environ.setdefault("CV_EXECUTOR_WORKERS", str(threads_per_worker))
+    os.environ.setdefault("AGE_MODEL_MMAP", "1")
+    os.environ["MODEL_LOADING_MODE"] = "eager"
+
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or tempfile.mkdtemp(prefix="skin-analyzer-metrics-")
+    # 이전 실행의 워커 메트릭 파일이 합산되지 않도록 비움
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+    return metrics_dir
+
+def apply_thread_budget(threads: int):
+    """OpenCV/torch 연산 스레드 수 제한 (torch가 없는 배포는 OpenCV만)"""
+    import cv2
+
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """모든 워커가 공유할 듣기 소켓"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def load_shared_analyzer():
+    """부모 프로세스에서 분석기를 로드/워밍업하여 main.analyzer로 공개 (워커 lifespan은 로딩을 건너뜀)"""
+    import main
+
+    # fork 전에 연산 스레드 풀이 만들어지지 않도록 단일 스레드로 로드/워밍업
+    apply_thread_budget(1)
+    instance = main.ModernSkinAnalyzer()
+    asyncio.run(instance.warm_up())
+    instance.prepare_fork()
+    main.analyzer = instance
+    return main
+
+def run_worker(main, sock: socket.socket, args):
+    """워커 프로세스: 스레드 예산 적용, fork로 잃은 자원 재생성 후 공유 소켓으로 서비스"""
+    import uvicorn
+
+    gc.enable()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    apply_thread_budget(args.threads_per_worker)
+    main.analyzer.reset_after_fork(args.threads_per_worker)
+
+    config = uvicorn.Config(main.app, log_level=args.log_level, access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+def spawn_worker(main, sock: socket.socket, args) -> int:
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            run_worker(main, sock, args)
+        except BaseException as e:
+            print(f"❌ 워커 {os.getpid()} 오류: {e}", file=sys.stderr)
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    return pid
+
+def main():
+    args = parse_args()
+    metrics_dir = configure_environment(args.threads_per_worker)
+    sock = bind_socket(args.host, args.port, args.backlog)
+
+    # 로딩 중 생성된 객체가 워커의 GC 순회로 건드려져 공유 페이지가 복사되지 않도록 고정
+    gc.disable()
+    app_module = load_shared_analyzer()
+    from prometheus_client import multiprocess
+    gc.freeze()
+
+    workers = {spawn_worker(app_module, sock, args) for _ in range(args.workers)}
+    print(f"🚀 prefork 서버: http://{args.host}:{args.port} (워커 {args.workers}개 × 스레드 {args.threads_per_worker}개)")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        multiprocess.mark_process_dead(pid)
+        if not stopping:
+            print(f"⚠️ 워커 {pid} 종료 (상태 {status}), 다시 시작합니다", file=sys.stderr)
+            time.sleep(1)  # 시작 직후 반복 종료 시 과도한 fork 방지
+            workers.add(spawn_worker(app_module, sock, args))
+
+    sock.close()
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
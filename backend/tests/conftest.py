@@ -0,0 +1,17 @@
+# 백엔드 테스트 공통 설정 (backend/ 모듈을 import 경로에 추가하고 분석기 fixture 제공)
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope="session")
+def analyzer():
+    """원격 호출을 끈 분석기 (연령대 모델이 없으면 폴백 경로 사용)"""
+    import main
+    analyzer = main.ModernSkinAnalyzer()
+    analyzer.remote.enabled = False
+    yield analyzer
+    asyncio.run(analyzer.close_session())
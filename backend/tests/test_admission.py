@@ -0,0 +1,79 @@
+# 수락 제어: 우선순위, 429 거부의 Retry-After, 대기 중 취소된 요청의 슬롯 반납 확인
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import main
+
+def rejected_count(traffic_class: str, reason: str) -> float:
+    value = main.REGISTRY.get_sample_value(
+        "skin_analyzer_admission_rejected_total", {"traffic_class": traffic_class, "reason": reason}
+    )
+    return value or 0.0
+
+def test_face_check_runs_before_queued_analysis():
+    async def run():
+        controller = main.AdmissionController(max_concurrency=1, max_queue=8, queue_slo_ms=5000)
+        order = []
+        
+        async def request(traffic_class: str):
+            async with controller.admit(traffic_class):
+                order.append(traffic_class)
+        
+        await controller.acquire("analysis")
+        queued = [asyncio.create_task(request("analysis")), asyncio.create_task(request("batch"))]
+        await asyncio.sleep(0)
+        face_check = asyncio.create_task(request("face_check"))
+        await asyncio.sleep(0)
+        assert len(controller.waiters) == 3
+        
+        controller.release("analysis")
+        await asyncio.gather(face_check, *queued)
+        return order
+    
+    assert asyncio.run(run()) == ["face_check", "analysis", "batch"]
+
+@pytest.mark.parametrize("reason, max_queue, queue_slo_ms", [("queue_full", 1, 5000), ("slo", 8, 50)])
+def test_rejections_carry_retry_after(reason, max_queue, queue_slo_ms):
+    async def run():
+        controller = main.AdmissionController(max_concurrency=1, max_queue=max_queue, queue_slo_ms=queue_slo_ms)
+        await controller.acquire("analysis")
+        if reason == "queue_full":
+            waiter = asyncio.create_task(controller.acquire("analysis"))
+            await asyncio.sleep(0)
+        
+        with pytest.raises(HTTPException) as error:
+            await controller.acquire("analysis")
+        
+        if reason == "queue_full":
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+        return error.value
+    
+    before = rejected_count("analysis", reason)
+    error = asyncio.run(run())
+    
+    assert error.status_code == 429
+    assert int(error.headers["Retry-After"]) >= 1
+    assert rejected_count("analysis", reason) == before + 1
+
+def test_slot_is_released_when_granted_waiter_is_cancelled():
+    async def run():
+        controller = main.AdmissionController(max_concurrency=1, max_queue=8, queue_slo_ms=5000)
+        await controller.acquire("analysis")
+        waiter = asyncio.create_task(controller.acquire("analysis"))
+        await asyncio.sleep(0)
+        
+        # 슬롯을 넘겨받았지만 대기 중인 요청이 깨어나기 전에 클라이언트가 연결을 끊음
+        controller.release("analysis")
+        assert controller.active == 1 and not controller.waiters
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        
+        assert controller.active == 0
+        await asyncio.wait_for(controller.acquire("analysis"), 1)
+        assert controller.active == 1
+    
+    asyncio.run(run())
@@ -0,0 +1,60 @@
+# 연령대 추론 워커 프로세스: 추론 중 워커가 종료되면 요청이 실패 처리되고 재시작 후 다시 처리되는지 확인
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import main
+
+INFERENCE_SECONDS = 0.5
+
+class SlowAgeBackend(main.AgeModelBackend):
+    """모델 없이 고정 확률을 반환하는 느린 백엔드 (추론 도중 워커를 종료할 시간 확보)"""
+    name = "slow"
+    
+    def predict(self, pixel_values: np.ndarray) -> np.ndarray:
+        time.sleep(INFERENCE_SECONDS)
+        return np.full((len(pixel_values), 9), 1 / 9, dtype=np.float32)
+
+def slow_age_worker(*args):
+    """spawn된 워커에서 모델 로딩만 SlowAgeBackend로 바꾸고 실제 워커 루프 실행"""
+    main.load_age_model = lambda: (SlowAgeBackend(), (32, 0.5, 0.5))
+    main.run_age_inference_worker(*args)
+
+@pytest.fixture
+def backend(monkeypatch):
+    monkeypatch.setattr(main, "run_age_inference_worker", slow_age_worker)
+    backend = main.ProcessAgeBackend(slots=2, size=32, cpus="", num_threads=1, timeout=10, start_timeout=60)
+    yield backend
+    backend.close()
+
+def test_worker_crash_fails_request_and_restarts(backend):
+    face = np.full((64, 64, 3), 128, dtype=np.uint8)
+    outcome = {}
+    
+    def request():
+        try:
+            outcome["result"] = backend.predict_faces([face], backend.input_spec)
+        except Exception as e:
+            outcome["error"] = e
+    
+    thread = threading.Thread(target=request)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not backend.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(INFERENCE_SECONDS / 5)
+    crashed = backend.process
+    crashed.kill()
+    thread.join(timeout=5)
+    
+    # 요청 시간 제한(10초)을 기다리지 않고 실패하며 슬롯도 반납됨
+    assert not thread.is_alive()
+    assert isinstance(outcome.get("error"), RuntimeError)
+    assert len(backend.free_slots) == 2 and not backend.pending
+    
+    assert backend.ready.wait(60)
+    assert backend.process is not crashed and backend.process.is_alive()
+    probs = backend.predict_faces([face, face], backend.input_spec)
+    assert probs.shape == (2, 9)
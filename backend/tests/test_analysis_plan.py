@@ -0,0 +1,38 @@
+# 분석 계획: 단계가 실패하면 미리 시작한 연령대 추론을 취소하는지 확인
+import asyncio
+
+import numpy as np
+import pytest
+
+import main
+
+def test_age_task_is_cancelled_when_parsing_fails(analyzer, monkeypatch):
+    started, cancelled = asyncio.Event(), []
+    
+    async def slow_age(face_image):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+    
+    async def failing_parsing(face_image, context, plan):
+        await started.wait()
+        raise RuntimeError("parsing failed")
+    
+    monkeypatch.setattr(analyzer, "analyze_age_async", slow_age)
+    monkeypatch.setattr(analyzer, "advanced_face_parsing", failing_parsing)
+    frame = np.full((200, 200, 3), 180, dtype=np.uint8)
+    detection = {"face_detected": True, "confidence": 0.9, "bbox": {"xmin": 50, "ymin": 50, "width": 100, "height": 100}}
+    
+    async def run():
+        with pytest.raises(RuntimeError):
+            await analyzer.analyze_located_face(
+                detection, frame, main.FrameContext(frame), analyzer.new_plan("accurate"), 0.0
+            )
+        await asyncio.sleep(0)
+        # 이벤트 루프 종료 시의 일괄 취소가 아니라 실패 직후에 취소되어야 함
+        assert cancelled == [True]
+    
+    asyncio.run(run())
@@ -0,0 +1,12 @@
+# 배치 분석: 요청 검증과 결과 요약 확인
+from fastapi.testclient import TestClient
+
+import main
+
+def test_non_string_image_is_rejected_with_index(analyzer, monkeypatch):
+    monkeypatch.setattr(main, "analyzer", analyzer)
+    
+    response = TestClient(main.app).post("/analyze-skin-batch", json={"images": ["aGVsbG8=", {"data": "x"}]})
+    
+    assert response.status_code == 400
+    assert "images[1]" in response.json()["detail"]
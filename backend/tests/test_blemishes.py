@@ -0,0 +1,84 @@
+# 잡티 감지: 타일 처리 일치, full 모드 마스크 배치, 알려진 개수의 잡티 집계 확인
+import numpy as np
+import cv2
+
+import main
+
+def synthetic_skin(height: int = 1100, width: int = 1500, spots: int = 400, seed: int = 0) -> tuple:
+    """완만한 밝기 변화 위에 작은 어두운 점을 흩뿌린 L 채널과 타원형 피부 마스크"""
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:height, 0:width]
+    l_channel = (170 + 20 * np.sin(xs / 150) + 15 * np.cos(ys / 110)).astype(np.uint8)
+    for x, y, radius in zip(rng.integers(0, width, spots), rng.integers(0, height, spots), rng.integers(2, 6, spots)):
+        cv2.circle(l_channel, (int(x), int(y)), int(radius), int(rng.integers(90, 140)), -1)
+    skin_binary = np.zeros((height, width), dtype=np.uint8)
+    cv2.ellipse(skin_binary, (width // 2, height // 2), (width * 2 // 5, height * 2 // 5), 0, 0, 360, 255, -1)
+    return l_channel, skin_binary
+
+def blemish_set(stats: np.ndarray) -> set:
+    areas = stats[:, cv2.CC_STAT_AREA]
+    keep = (areas > main.BLEMISH_MIN_AREA) & (areas < main.BLEMISH_MAX_AREA)
+    return {tuple(int(v) for v in row) for row in stats[keep]}
+
+def test_tiled_components_match_whole_image(analyzer):
+    l_channel, skin_binary = synthetic_skin()
+    
+    whole, _ = main.ModernSkinAnalyzer.blemish_components(l_channel, skin_binary)
+    tiled, centroids = analyzer.blemish_components_tiled(l_channel, skin_binary, tile_size=400, halo=24)
+    
+    assert len(blemish_set(whole)) > 100
+    assert blemish_set(tiled) == blemish_set(whole)
+    assert len(centroids) == len(tiled)
+
+def test_full_mode_places_face_mask_in_frame(analyzer, monkeypatch):
+    monkeypatch.setattr(main, "PIPELINE_MODE", "full")
+    frame = np.full((300, 400, 3), 180, dtype=np.uint8)
+    bbox = {"xmin": 100, "ymin": 50, "width": 120, "height": 150}
+    face = analyzer.crop_face(frame, bbox)
+    face_mask = np.full(face.shape[:2], 255, dtype=np.uint8)
+    
+    image, mask, _ = analyzer.blemish_inputs(
+        frame, main.FrameContext(frame), face, main.FrameContext(face), bbox, face_mask, main.AnalysisPlan("accurate")
+    )
+    
+    assert image is frame
+    assert mask.shape == frame.shape[:2]
+    assert np.count_nonzero(mask) == face_mask.size
+    assert analyzer.crop_face(mask, bbox).min() == 255
+
+def known_blemish_face(spots: int = 12) -> tuple:
+    """잡티 spots개와 잡티가 아닌 요소(머리카락 선, 마스크 경계의 점, 주변과 거의 같은 밝기의 점)를 그린 프레임"""
+    frame = np.full((300, 400, 3), 180, dtype=np.uint8)
+    bbox = {"xmin": 100, "ymin": 50, "width": 200, "height": 200}
+    face = main.ModernSkinAnalyzer.crop_face(frame, bbox)
+    face_mask = np.zeros(face.shape[:2], dtype=np.uint8)
+    cv2.ellipse(face_mask, (100, 100), (92, 96), 0, 0, 360, 255, -1)
+    
+    for i in range(spots):
+        cv2.circle(face, (40 + 40 * (i % 4), 45 + 35 * (i // 4)), 3, (110, 110, 110), -1)
+    for i in range(8):
+        cv2.line(face, (50 + 28 * (i % 4), 150 + 12 * (i // 4)), (68 + 28 * (i % 4), 150 + 12 * (i // 4)), (90, 90, 90), 3)
+    for angle in np.linspace(0, 2 * np.pi, 24, endpoint=False):
+        center = (int(100 + 92 * np.cos(angle)), int(100 + 96 * np.sin(angle)))
+        cv2.circle(face, center, 3, (110, 110, 110), -1)
+    for i in range(12):
+        cv2.circle(face, (60 + 40 * (i % 3), 28 + 35 * (i // 3)), 3, (175, 175, 175), -1)
+    return frame, bbox, face, face_mask
+
+def test_full_mode_counts_known_blemishes_below_cap(analyzer, monkeypatch):
+    monkeypatch.setattr(main, "PIPELINE_MODE", "full")
+    frame, bbox, face, face_mask = known_blemish_face(spots=12)
+    image, mask, context = analyzer.blemish_inputs(
+        frame, main.FrameContext(frame), face, main.FrameContext(face), bbox, face_mask, main.AnalysisPlan("accurate")
+    )
+    
+    blemishes = analyzer.detect_blemishes_ai_2025(image, mask, context)
+    assert blemishes["total"] == blemishes["count"] == 12 < main.BLEMISH_COUNT_CAP
+    
+    # 후보 조건 없이 면적만 보면 같은 프레임이 상한에 걸림
+    monkeypatch.setattr(main, "BLEMISH_MIN_CONTRAST", 3)
+    monkeypatch.setattr(main, "BLEMISH_EDGE_MARGIN", 0)
+    monkeypatch.setattr(main, "BLEMISH_MIN_FILL", 0.0)
+    monkeypatch.setattr(main, "BLEMISH_MAX_ASPECT", float("inf"))
+    unfiltered = analyzer.detect_blemishes_ai_2025(image, mask, main.FrameContext(frame))
+    assert unfiltered["total"] > main.BLEMISH_COUNT_CAP
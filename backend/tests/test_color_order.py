@@ -0,0 +1,24 @@
+# 분석 파이프라인 채널 순서 (디코딩 이후 모든 단계가 RGB를 받는지) 확인
+import cv2
+import numpy as np
+
+import main
+
+def red_png() -> bytes:
+    image = np.zeros((120, 160, 3), dtype=np.uint8)
+    image[..., 2] = 255  # OpenCV 인코딩 입력은 BGR
+    return cv2.imencode(".png", image)[1].tobytes()
+
+def test_decode_returns_rgb():
+    decoded = main.decode_image_bytes(red_png())
+    assert decoded[60, 80].tolist() == [255, 0, 0]
+
+def test_preprocess_keeps_rgb(analyzer):
+    decoded = main.decode_image_bytes(red_png())
+    processed = analyzer.preprocess_image_2025(decoded)
+    assert processed[60, 80].tolist() == [255, 0, 0]
+
+def test_face_roi_keeps_rgb(analyzer):
+    decoded = main.decode_image_bytes(red_png())
+    roi, _, _ = analyzer.extract_face_roi(decoded, {"xmin": 40, "ymin": 30, "width": 60, "height": 60})
+    assert roi[roi.shape[0] // 2, roi.shape[1] // 2].tolist() == [255, 0, 0]
@@ -0,0 +1,46 @@
+# 분석 기록: 접근 토큰이 맞는 사용자만 기록을 추가/조회할 수 있는지 확인
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = main.AnalysisHistoryStore(str(tmp_path / "history.db"), flush_interval_ms=10)
+    monkeypatch.setattr(main, "history_store", store)
+    yield store
+    store.close()
+
+def make_result() -> main.SkinAnalysisResult:
+    return main.SkinAnalysisResult(
+        skin_type="보통", moisture_level=50, oil_level=50, blemish_count=2, skin_tone="중간 웜톤 (Type IV)",
+        wrinkle_level=1, pore_size="보통", overall_score=80, avg_skin_color={}, face_detected=True,
+        confidence=0.9, skin_area_percentage=30.0, detected_features=[], processing_time=0.0, api_method="test"
+    )
+
+def test_recording_requires_matching_token(store):
+    with pytest.raises(HTTPException) as error:
+        main.validate_user_id("alice", main.sign_user_id("bob"))
+    assert error.value.status_code == 401
+    
+    assert main.validate_user_id("alice", main.sign_user_id("alice")) == "alice"
+
+def test_user_id_is_ignored_when_history_is_disabled(monkeypatch):
+    monkeypatch.setattr(main, "history_store", None)
+    assert main.validate_user_id("alice") is None
+
+def test_history_is_only_readable_with_the_users_token(store):
+    main.record_history(main.validate_user_id("alice", main.sign_user_id("alice")), [make_result()])
+    time.sleep(0.2)
+    client = TestClient(main.app)
+    
+    own = client.get("/history/alice", headers={"X-User-Token": main.sign_user_id("alice")})
+    assert own.status_code == 200
+    assert len(own.json()["records"]) == 1
+    
+    assert client.get("/history/alice").status_code == 401
+    assert client.get("/history/alice", headers={"X-User-Token": main.sign_user_id("bob")}).status_code == 401
+    assert client.get("/history/alice/trend", headers={"X-User-Token": "0" * 64}).status_code == 401
@@ -0,0 +1,81 @@
+# 이미지 수신: EXIF 방향, 스트리밍 업로드 제한, 얼굴 추적 프레임의 헤더 확인
+import asyncio
+import io
+
+import cv2
+import pytest
+from fastapi import HTTPException, Request
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import main
+
+def rotated_jpeg(orientation: int) -> bytes:
+    image = Image.new("RGB", (1600, 1200), (200, 120, 90))
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", exif=exif.tobytes())
+    return buffer.getvalue()
+
+@pytest.mark.parametrize("orientation, shape", [(1, (1200, 1600)), (3, (1200, 1600)), (6, (1600, 1200)), (8, (1600, 1200))])
+def test_source_shape_follows_exif_orientation(orientation, shape):
+    data = rotated_jpeg(orientation)
+    frame, source_shape = main.ingest_image(data, cv2.IMREAD_COLOR, 300)
+    assert source_shape == shape
+    # 축소 디코딩 배율이 두 축에서 같아야 bbox를 원본 좌표로 되돌릴 수 있음
+    assert source_shape[1] / frame.shape[1] == source_shape[0] / frame.shape[0]
+
+def chunked_request(content_type: str, chunks: list, received: list) -> Request:
+    """Content-Length 없이 chunks를 차례로 보내는 요청 (received에 전달한 청크 수 기록)"""
+    async def receive():
+        received.append(1)
+        index = len(received) - 1
+        return {"type": "http.request", "body": chunks[index], "more_body": index < len(chunks) - 1}
+    
+    scope = {"type": "http", "method": "POST", "path": "/analyze-skin", "headers": [(b"content-type", content_type.encode())]}
+    return Request(scope, receive)
+
+@pytest.mark.parametrize("content_type, head", [
+    ("multipart/form-data; boundary=xyz",
+     b'--xyz\r\nContent-Disposition: form-data; name="image"; filename="a.jpg"\r\nContent-Type: image/jpeg\r\n\r\n'),
+    ("application/octet-stream", b""),
+])
+def test_oversized_chunked_upload_is_rejected_while_streaming(content_type, head, monkeypatch):
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 64 * 1024)
+    monkeypatch.setattr(main, "MULTIPART_OVERHEAD_BYTES", 1024)
+    chunks = [head] + [b"\0" * 16 * 1024] * 64
+    received = []
+    
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.read_upload_body(chunked_request(content_type, chunks, received)))
+    
+    assert error.value.status_code == 413
+    assert len(received) < 10
+
+def test_chunked_multipart_upload_within_limit_is_read():
+    image = rotated_jpeg(1)
+    chunks = [
+        b'--xyz\r\nContent-Disposition: form-data; name="image"; filename="a.jpg"\r\nContent-Type: image/jpeg\r\n\r\n',
+        image[:1000], image[1000:], b"\r\n--xyz--\r\n"
+    ]
+    
+    body = asyncio.run(main.read_upload_body(chunked_request("multipart/form-data; boundary=xyz", chunks, [])))
+    assert bytes(body) == image
+
+def test_face_tracking_rejects_oversized_frame_header(analyzer, monkeypatch):
+    monkeypatch.setattr(main, "analyzer", analyzer)
+    monkeypatch.setattr(main, "MAX_IMAGE_PIXELS", 1600 * 1200 - 1)
+    frame = rotated_jpeg(1)
+    
+    with TestClient(main.app).websocket_connect("/ws/face-tracking") as websocket:
+        websocket.send_bytes(frame)
+        rejected = websocket.receive_json()
+        monkeypatch.setattr(main, "MAX_IMAGE_PIXELS", 1600 * 1200)
+        websocket.send_bytes(frame)
+        accepted = websocket.receive_json()
+    
+    # 헤더 단계에서 거부되어 디코딩/검출을 거치지 않음
+    assert "error" in rejected and "frame" not in rejected
+    assert rejected["ready"] is False
+    assert accepted["frame"] == 1
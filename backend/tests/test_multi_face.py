@@ -0,0 +1,35 @@
+# 다중 얼굴 감지: 검출기 점수와 피부색 비율로 후보를 채택하고 신뢰도를 보고하는지 확인
+import numpy as np
+
+import main
+
+class FixedDetector(main.FaceDetector):
+    """고정된 후보 목록을 반환하는 검출기"""
+    name = "fixed"
+    
+    def __init__(self, faces):
+        super().__init__()
+        self.faces = faces
+    
+    def detect(self, image, min_size=(30, 30)):
+        return list(self.faces)
+
+def skin_and_gray_frame() -> np.ndarray:
+    frame = np.full((400, 800, 3), 128, dtype=np.uint8)
+    frame[:, :400] = (224, 172, 140)  # 왼쪽 절반은 피부색 (RGB)
+    return frame
+
+def test_rejects_candidates_without_skin(analyzer, monkeypatch):
+    detector = FixedDetector([(100, 100, 200, 200, 0.9), (500, 100, 200, 200, 1.0)])
+    monkeypatch.setattr(analyzer, "face_detector", detector)
+    
+    faces = analyzer.detect_all_faces(skin_and_gray_frame())
+    
+    assert [face["bbox"]["xmin"] for face in faces] == [100]
+    assert faces[0]["confidence"] == 0.9
+
+def test_rejects_low_detector_scores(analyzer, monkeypatch):
+    detector = FixedDetector([(100, 100, 200, 200, main.MULTI_FACE_MIN_CONFIDENCE / 2)])
+    monkeypatch.setattr(analyzer, "face_detector", detector)
+    
+    assert analyzer.detect_all_faces(skin_and_gray_frame()) == []
@@ -0,0 +1,67 @@
+# 원격 추론 클라이언트: 재시도, 서킷 브레이커, 헤징과 취소 시 슬롯 반환을 대체 API 서버로 확인
+import asyncio
+
+from fake_hf_server import start_fake_hf_server
+
+import main
+
+MODELS = {"face_parsing": "jonathandinu/face-parsing"}
+
+async def with_server(scenario, status: int = 200, latency_ms: float = 0.0, **client_options):
+    """대체 서버와 클라이언트를 띄워 scenario(client, state) 실행"""
+    runner, base_url = await start_fake_hf_server(latency_ms=latency_ms, status=status)
+    options = {"attempt_timeout": 2.0, "deadline": 4.0, "hedge_delay_ms": 0.0, "probe_interval": 60.0, **client_options}
+    client = main.RemoteInferenceClient(base_url, MODELS, token="", enabled=True, **options)
+    try:
+        return await scenario(client, runner.app["state"])
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+def test_retries_retryable_errors_up_to_max_attempts():
+    async def scenario(client, state):
+        result = await client.infer("face_parsing", b"image")
+        return result, state["responses"][503]
+    
+    result, responses = asyncio.run(with_server(scenario, status=503, max_attempts=3, breaker_failures=10))
+    assert result["error"] == "model_loading"
+    assert responses == 3
+
+def test_breaker_opens_after_consecutive_failures_and_skips_calls():
+    async def scenario(client, state):
+        for _ in range(2):
+            await client.infer("face_parsing", b"image")
+        skipped = await client.infer("face_parsing", b"image")
+        return skipped, state["responses"][500], client.is_available("face_parsing")
+    
+    skipped, responses, available = asyncio.run(
+        with_server(scenario, status=500, max_attempts=1, breaker_failures=2)
+    )
+    assert skipped["error"] == "circuit_open"
+    assert responses == 2
+    assert not available
+
+def test_hedge_sends_second_request_when_first_is_slow():
+    async def scenario(client, state):
+        result = await client.infer("face_parsing", b"image")
+        await asyncio.sleep(0.1)
+        return result, client.active_requests
+    
+    hedges = main.REMOTE_HEDGES.labels("face_parsing")._value.get()
+    result, active = asyncio.run(with_server(scenario, latency_ms=200, hedge_delay_ms=50, max_attempts=1))
+    assert result["success"]
+    assert main.REMOTE_HEDGES.labels("face_parsing")._value.get() == hedges + 1
+    assert active == 0
+
+def test_cancelled_caller_releases_hedged_attempts():
+    async def scenario(client, state):
+        task = asyncio.ensure_future(client.infer("face_parsing", b"image"))
+        await asyncio.sleep(0.15)
+        in_flight = client.active_requests
+        task.cancel()
+        await asyncio.sleep(0.05)
+        return in_flight, client.active_requests
+    
+    in_flight, active = asyncio.run(with_server(scenario, latency_ms=1000, hedge_delay_ms=50, max_attempts=1))
+    assert in_flight == 2
+    assert active == 0
@@ -0,0 +1,67 @@
+# 결과 캐시: 기한이 있는 요청의 합류 방지와 캐시 적중 결과의 단계 기록 확인
+import asyncio
+
+import numpy as np
+
+import main
+
+def make_result(plan: main.AnalysisPlan) -> main.SkinAnalysisResult:
+    return main.SkinAnalysisResult(
+        skin_type="보통", moisture_level=50, oil_level=50, blemish_count=0, skin_tone="중간 웜톤 (Type IV)",
+        wrinkle_level=1, pore_size="보통", overall_score=80, avg_skin_color={"r": 0.0, "g": 0.0, "b": 0.0},
+        face_detected=True, confidence=0.9, skin_area_percentage=30.0, detected_features=[], processing_time=0.0,
+        api_method="test", analysis_mode=plan.mode, stages_run=list(plan.stages_run),
+        stages_skipped=list(plan.stages_skipped)
+    )
+
+def install_fake_analysis(analyzer, monkeypatch, delays):
+    """호출 순서대로 delays만큼 걸리는 분석으로 교체하고 호출 기록 목록 반환"""
+    calls = []
+    
+    async def analyze_image(image, source_shape=None, plan=None):
+        delay = delays[len(calls)]
+        calls.append(plan.deadline)
+        await asyncio.sleep(delay)
+        plan.ran("skin_analysis")
+        return make_result(plan)
+    
+    monkeypatch.setattr(analyzer, "result_cache", main.AnalysisResultCache(8, 60.0))
+    monkeypatch.setattr(analyzer, "analyze_image", analyze_image)
+    return calls
+
+def test_deadline_request_does_not_wait_for_in_flight_computation(analyzer, monkeypatch):
+    calls = install_fake_analysis(analyzer, monkeypatch, [1.0, 0.0])
+    image = np.zeros((32, 32, 3), dtype=np.uint8)
+    
+    async def run():
+        slow = asyncio.ensure_future(analyzer.analyze_image_cached(image, None, main.AnalysisPlan("accurate")))
+        await asyncio.sleep(0.05)
+        start = asyncio.get_running_loop().time()
+        await analyzer.analyze_image_cached(image, None, main.AnalysisPlan("accurate", deadline_ms=300))
+        time_now = asyncio.get_running_loop().time()
+        await slow
+        return time_now - start
+    
+    elapsed = asyncio.run(run())
+    assert len(calls) == 2
+    assert elapsed < 0.5
+
+def test_cache_hit_reports_its_own_stages(analyzer, monkeypatch):
+    install_fake_analysis(analyzer, monkeypatch, [0.0])
+    image = np.zeros((32, 32, 3), dtype=np.uint8)
+    
+    first = asyncio.run(analyzer.analyze_image_cached(image, None, main.AnalysisPlan("accurate")))
+    second = asyncio.run(analyzer.analyze_image_cached(image, None, main.AnalysisPlan("accurate")))
+    
+    assert first.stages_run == ["skin_analysis"]
+    assert second.stages_run == ["result_cache"]
+    assert second.overall_score == first.overall_score
+
+def test_similar_images_do_not_share_a_key():
+    cache = main.AnalysisResultCache(8, 60.0)
+    image = np.full((64, 64, 3), 120, dtype=np.uint8)
+    similar = image.copy()
+    similar[10, 10] = 121
+    
+    assert cache.make_key(image) == cache.make_key(image.copy())
+    assert cache.make_key(image) != cache.make_key(similar)
@@ -0,0 +1,29 @@
+# 서버 시작: 워밍업에 실패한 분석기의 자원이 정리되는지 확인
+import asyncio
+
+import main
+
+class FailingAnalyzer:
+    """워밍업에서 실패하는 분석기"""
+    instances = []
+    
+    def __init__(self):
+        self.closed = False
+        FailingAnalyzer.instances.append(self)
+    
+    async def warm_up(self):
+        raise RuntimeError("warm-up failed")
+    
+    async def close_session(self):
+        self.closed = True
+
+def test_load_analyzer_closes_analyzer_when_warm_up_fails(monkeypatch):
+    monkeypatch.setattr(main, "ModernSkinAnalyzer", FailingAnalyzer)
+    monkeypatch.setattr(main, "analyzer", None)
+    monkeypatch.setattr(main, "analyzer_loading_error", None)
+    
+    asyncio.run(main.load_analyzer())
+    
+    assert main.analyzer is None
+    assert main.analyzer_loading_error == "warm-up failed"
+    assert [instance.closed for instance in FailingAnalyzer.instances] == [True]
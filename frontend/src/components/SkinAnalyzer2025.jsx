@@ -2,6 +2,10 @@
 import React, { useState, useRef, useEffect, useCallback } from 'react';
 import { Camera, Upload, RotateCw, CheckCircle, AlertCircle, Loader, Sparkles, Brain, Zap } from 'lucide-react';
 
+// 얼굴 감지용 프레임 너비(px)와 WebSocket 프레임 전송 최소 간격(ms)
+const FACE_CHECK_WIDTH = 320;
+const FACE_STREAM_INTERVAL = 100;
+
 const SkinAnalyzer2025 = () => {
   const [currentStep, setCurrentStep] = useState('capture');
   const [capturedImage, setCapturedImage] = useState(null);
@@ -20,6 +24,7 @@ const SkinAnalyzer2025 = () => {
   const fileInputRef = useRef(null);
   const streamRef = useRef(null);
   const faceCheckInterval = useRef(null);
+  const faceSocketRef = useRef(null);
   const countDownInterval = useRef(null);
   const dropZoneRef = useRef(null);
 
@@ -158,31 +163,68 @@ const SkinAnalyzer2025 = () => {
     }, 1000);
   }, [capturePhoto]);
 
-  // 얼굴 감지 상태 확인
-  const checkFaceDetection = useCallback(async () => {
-    if (!videoRef.current || !canvasRef.current || !cameraActive) return;
+  // 얼굴 감지용 축소 프레임을 캔버스에 그림 (얼굴 감지에는 작은 프레임이면 충분)
+  const drawFaceCheckFrame = useCallback(() => {
+    if (!videoRef.current || !canvasRef.current) return null;
 
     const video = videoRef.current;
     
     // 비디오가 준비되지 않은 경우 얼굴 감지를 시도하지 않음
     if (video.videoWidth === 0 || video.videoHeight === 0) {
       console.log('비디오가 아직 준비되지 않았습니다.');
-      return;
+      return null;
     }
 
     const canvas = canvasRef.current;
-    canvas.width = video.videoWidth;
-    canvas.height = video.videoHeight;
+    const scale = Math.min(1, FACE_CHECK_WIDTH / video.videoWidth);
+    canvas.width = Math.round(video.videoWidth * scale);
+    canvas.height = Math.round(video.videoHeight * scale);
     
     const ctx = canvas.getContext('2d');
     ctx.imageSmoothingEnabled = true;
-    ctx.imageSmoothingQuality = 'high';
-    ctx.drawImage(video, 0, 0);
+    ctx.imageSmoothingQuality = 'low';
+    ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
+    return canvas;
+  }, []);
+
+  // 얼굴 감지 결과에 따라 카운트다운 시작/초기화
+  const applyFaceDetection = useCallback((newFaceDetected) => {
+    const video = videoRef.current;
+
+    // 얼굴 감지 상태가 변경되었을 때
+    if (newFaceDetected !== faceDetected) {
+      setFaceDetected(newFaceDetected);
+      
+      if (newFaceDetected && !countDown) {
+        console.log('얼굴 감지됨, 카운트다운 시작 시도');
+        // 비디오가 준비된 상태에서만 카운트다운 시작
+        if (video && video.videoWidth > 0 && video.videoHeight > 0) {
+          startCountDown();
+        } else {
+          console.log('비디오가 준비되지 않아 카운트다운을 연기합니다.');
+        }
+      }
+    }
+    
+    // 카운트다운 중 얼굴이 감지되지 않으면 초기화
+    if (!newFaceDetected && countDown) {
+      console.log('카운트다운 중 얼굴 감지 실패, 카운트다운 초기화');
+      clearInterval(countDownInterval.current);
+      setCountDown(null);
+    }
+  }, [faceDetected, countDown, startCountDown]);
+
+  // 얼굴 감지 상태 확인 (WebSocket을 사용할 수 없을 때의 HTTP 폴링)
+  const checkFaceDetection = useCallback(async () => {
+    if (!cameraActive) return;
+
+    const canvas = drawFaceCheckFrame();
+    if (!canvas) return;
     
     try {
-      const imageData = canvas.toDataURL('image/jpeg', 0.95);
+      const imageData = canvas.toDataURL('image/jpeg', 0.7);
       
-      const response = await fetch(`${API_BASE_URL}/analyze-skin-base64`, {
+      const response = await fetch(`${API_BASE_URL}/detect-face`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -199,29 +241,7 @@ const SkinAnalyzer2025 = () => {
       const data = await response.json();
       console.log('얼굴 감지 응답:', data);
       
-      const newFaceDetected = data.result.face_detected && data.result.confidence >= 0.8;
-      
-      // 얼굴 감지 상태가 변경되었을 때
-      if (newFaceDetected !== faceDetected) {
-        setFaceDetected(newFaceDetected);
-        
-        if (newFaceDetected && !countDown) {
-          console.log('얼굴 감지됨, 카운트다운 시작 시도');
-          // 비디오가 준비된 상태에서만 카운트다운 시작
-          if (video.videoWidth > 0 && video.videoHeight > 0) {
-            startCountDown();
-          } else {
-            console.log('비디오가 준비되지 않아 카운트다운을 연기합니다.');
-          }
-        }
-      }
-      
-      // 카운트다운 중 얼굴이 감지되지 않으면 초기화
-      if (!newFaceDetected && countDown) {
-        console.log('카운트다운 중 얼굴 감지 실패, 카운트다운 초기화');
-        clearInterval(countDownInterval.current);
-        setCountDown(null);
-      }
+      applyFaceDetection(data.result.face_detected && data.result.confidence >= 0.8);
       
     } catch (error) {
       console.error('얼굴 감지 오류:', error);
@@ -232,7 +252,15 @@ const SkinAnalyzer2025 = () => {
         setCountDown(null);
       }
     }
-  }, [API_BASE_URL, cameraActive, faceDetected, countDown, startCountDown]);
+  }, [API_BASE_URL, cameraActive, countDown, drawFaceCheckFrame, applyFaceDetection]);
+
+  // WebSocket 핸들러에서 항상 최신 콜백을 쓰기 위한 ref
+  const applyFaceDetectionRef = useRef(applyFaceDetection);
+  const checkFaceDetectionRef = useRef(checkFaceDetection);
+  useEffect(() => {
+    applyFaceDetectionRef.current = applyFaceDetection;
+    checkFaceDetectionRef.current = checkFaceDetection;
+  }, [applyFaceDetection, checkFaceDetection]);
 
   // 2025년 API 상태 확인
   const checkApiHealth = useCallback(async () => {
@@ -337,18 +365,84 @@ const SkinAnalyzer2025 = () => {
     };
   }, []);
 
-  // 카메라 시작 시 얼굴 감지 시작
+  // 카메라 시작 시 얼굴 감지 시작 (WebSocket 프레임 스트림, 연결 실패 시 HTTP 폴링으로 대체)
   useEffect(() => {
-    if (cameraActive && videoRef.current) {
-      // 더 자주 체크하도록 간격 줄임 (1초 -> 500ms)
-      faceCheckInterval.current = setInterval(checkFaceDetection, 500);
-      return () => {
-        if (faceCheckInterval.current) {
-          clearInterval(faceCheckInterval.current);
+    if (!cameraActive || !videoRef.current) return;
+
+    let closed = false;
+    let awaitingResponse = false;
+    let sendTimer = null;
+
+    const startPolling = () => {
+      if (closed || faceCheckInterval.current) return;
+      console.log('WebSocket을 사용할 수 없어 HTTP 폴링으로 얼굴 감지');
+      faceCheckInterval.current = setInterval(() => checkFaceDetectionRef.current(), 500);
+    };
+
+    // 이전 프레임의 응답을 받은 뒤에만 다음 프레임 전송 (서버 과부하 방지)
+    const sendFrame = () => {
+      const socket = faceSocketRef.current;
+      if (closed || !socket || socket.readyState !== WebSocket.OPEN || awaitingResponse) return;
+
+      const canvas = drawFaceCheckFrame();
+      if (!canvas) {
+        sendTimer = setTimeout(sendFrame, FACE_STREAM_INTERVAL);
+        return;
+      }
+
+      awaitingResponse = true;
+      canvas.toBlob((blob) => {
+        if (closed || !blob || socket.readyState !== WebSocket.OPEN) {
+          awaitingResponse = false;
+          sendTimer = setTimeout(sendFrame, FACE_STREAM_INTERVAL);
+          return;
         }
-      };
-    }
-  }, [cameraActive, checkFaceDetection]);
+        socket.send(blob);
+      }, 'image/jpeg', 0.7);
+    };
+
+    const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/ws/face-tracking`);
+    faceSocketRef.current = socket;
+
+    socket.onopen = () => {
+      console.log('얼굴 추적 WebSocket 연결됨');
+      sendFrame();
+    };
+
+    socket.onmessage = (event) => {
+      awaitingResponse = false;
+      try {
+        const data = JSON.parse(event.data);
+        if (data.error) {
+          console.error('얼굴 추적 오류:', data.error);
+        }
+        // 서버가 연속 프레임 기준으로 촬영 준비(ready)를 판정
+        applyFaceDetectionRef.current(Boolean(data.ready));
+      } catch (error) {
+        console.error('얼굴 추적 응답 처리 오류:', error);
+      }
+      sendTimer = setTimeout(sendFrame, FACE_STREAM_INTERVAL);
+    };
+
+    socket.onerror = () => {
+      console.error('얼굴 추적 WebSocket 오류');
+    };
+
+    socket.onclose = () => {
+      faceSocketRef.current = null;
+      startPolling();
+    };
+
+    return () => {
+      closed = true;
+      clearTimeout(sendTimer);
+      socket.close();
+      if (faceCheckInterval.current) {
+        clearInterval(faceCheckInterval.current);
+        faceCheckInterval.current = null;
+      }
+    };
+  }, [API_BASE_URL, cameraActive, drawFaceCheckFrame]);
 
   // 카메라 렌더링
   const renderCamera = () => (
@@ -555,14 +649,14 @@ const SkinAnalyzer2025 = () => {
     }, 500);
 
     try {
-      const response = await fetch(`${API_BASE_URL}/analyze-skin-base64`, {
+      // Base64 대신 바이너리(multipart)로 전송하여 전송량과 서버 디코딩 비용 절감
+      const imageBlob = await (await fetch(capturedImage)).blob();
+      const formData = new FormData();
+      formData.append('image', imageBlob, 'capture.jpg');
+
+      const response = await fetch(`${API_BASE_URL}/analyze-skin`, {
         method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          image: capturedImage
-        }),
+        body: formData,
       });
 
       clearInterval(progressInterval);